@@ -0,0 +1,133 @@
+"""Content negotiation for pre-serialized, pre-compressed analysis documents."""
+
+import gzip
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Optional
+
+import brotli
+import orjson
+from fastapi.responses import Response
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Codings we can produce, preferred in this order when equally acceptable
+SUPPORTED_ENCODINGS = ("br", "gzip")
+
+# Brotli quality for cached encodings; each document version is compressed once
+BROTLI_QUALITY = 9
+
+
+class BrotliCache:
+    """
+    In-process LRU of brotli encodings of stored documents, bounded by size.
+
+    Stored documents are gzip bytes; the brotli form is made on first
+    request and kept under the document's digest, which changes whenever
+    the report does.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[bytes, bytes] = OrderedDict()
+        self._size = 0
+
+    def encode(self, document: bytes) -> bytes:
+        """Return the brotli encoding of a gzip-compressed document."""
+        key = hashlib.blake2b(document, digest_size=16).digest()
+        body = self._entries.get(key)
+        if body is not None:
+            self._entries.move_to_end(key)
+            return body
+
+        body = brotli.compress(gzip.decompress(document), quality=BROTLI_QUALITY)
+        self._entries[key] = body
+        self._size += len(body)
+        while self._size > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+        return body
+
+
+# Global cache instance
+_brotli_cache: Optional[BrotliCache] = None
+
+
+def get_brotli_cache() -> BrotliCache:
+    """Get or create the global brotli cache instance."""
+    global _brotli_cache
+    if _brotli_cache is None:
+        _brotli_cache = BrotliCache(max_bytes=settings.brotli_cache_max_bytes)
+    return _brotli_cache
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick the response encoding for an Accept-Encoding header.
+
+    The supported coding with the highest q-value wins; ``*`` stands for
+    codings not listed explicitly. On a tie brotli is preferred, since its
+    output is smaller and its encoding is cached like the gzip one.
+    """
+    if not accept_encoding:
+        return None
+
+    qualities: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for coding in SUPPORTED_ENCODINGS:
+        quality = qualities.get(coding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def document_response(
+    document: bytes,
+    accept_encoding: Optional[str],
+    headers: Optional[dict[str, str]] = None,
+    extra: Optional[dict[str, Any]] = None,
+) -> Response:
+    """
+    Serve a gzip-compressed JSON document in the client's preferred encoding.
+
+    ``extra`` holds per-request top-level fields to append to the stored
+    object; the document then has to be decompressed and re-encoded.
+    """
+    headers = {**(headers or {}), "Vary": "Accept-Encoding"}
+    encoding = negotiate_encoding(accept_encoding)
+
+    if extra:
+        # Splice the fields in before the document's closing brace
+        raw = gzip.decompress(document)[:-1] + b"," + orjson.dumps(extra)[1:]
+        if encoding == "gzip":
+            body = gzip.compress(raw, compresslevel=6, mtime=0)
+        elif encoding == "br":
+            body = brotli.compress(raw, quality=5)
+        else:
+            body = raw
+    elif encoding == "gzip":
+        body = document
+    elif encoding == "br":
+        body = get_brotli_cache().encode(document)
+    else:
+        body = gzip.decompress(document)
+
+    if encoding:
+        headers["Content-Encoding"] = encoding
+
+    return Response(content=body, media_type="application/json", headers=headers)
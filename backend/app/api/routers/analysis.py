@@ -1,34 +1,73 @@
+import asyncio
+import hashlib
 import logging
+import random
 import uuid
 from datetime import datetime
-from typing import Any
-
-from fastapi import APIRouter, HTTPException
-
-from app.pipeline.graph import get_analysis_pipeline
+from typing import Awaitable, Callable, Iterator, Optional, TypeVar
+
+from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+
+from app.api.encoding import document_response
+from app.core import metrics
+from app.core.config import settings
+from app.core.timing import TimingCollector, record_cache, stage, start_collecting
+from app.pipeline.graph import load_analysis_pipeline
+from app.pipeline.incremental import analyze_incremental, build_block_index
+from app.pipeline.judge_nodes import judge_score_node
+from app.pipeline.lint import lint_prompt
+from app.schemas.pipeline import PipelineState
 from app.schemas.prompts import (
+    AnalysisReuse,
     AnalyzeRequest,
     AnalyzeResponse,
     ApplyPatchesRequest,
     ClarifyAnswer,
-    ClarifyQuestion,
     ClarifyRequest,
-    Contradiction,
-    MetricScore,
+    IncrementalAnalyzeRequest,
+    LintReport,
+    LintRequest,
+    MetricReport,
     Patch,
+    PatchConflict,
     PromptImproved,
-    SemanticEntropy,
 )
+from app.services.admission import AdmissionRejected, Lane, get_admission_controller
+from app.services.analysis_history import get_analysis_history
+from app.services.analysis_store import (
+    content_fingerprint,
+    decode_report,
+    get_analysis_store,
+)
+from app.services.export_cache import get_export_cache
+from app.services.patches import apply_patches as apply_span_patches
+from app.services.patches import unified_diff
+from app.services.semantic_cache import get_semantic_cache
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/analyze", tags=["analysis"])
 
-# In-memory storage for demo (replace with database in production)
-analysis_cache: dict[str, Any] = {}
+# Pipeline runs in progress in this process, keyed by content fingerprint,
+# and how many requests are waiting on each
+_inflight_analyses: dict[str, asyncio.Task] = {}
+_inflight_waiters: dict[str, int] = {}
+
+# A stored report together with its serialized, compressed response document
+StoredAnalysis = tuple[MetricReport, bytes]
+
+T = TypeVar("T")
 
 
 @router.post("/", response_model=AnalyzeResponse)
-async def analyze_prompt(request: AnalyzeRequest):
+async def analyze_prompt(
+    request: AnalyzeRequest,
+    raw_request: Request,
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+    accept_encoding: Optional[str] = Header(default=None),
+    lane: Lane = Header(default="interactive", alias="X-Analysis-Lane"),
+    timings: bool = False,
+):
     """
     Analyze a prompt for quality, consistency, and potential improvements.
 
@@ -41,118 +80,407 @@ async def analyze_prompt(request: AnalyzeRequest):
     - LLM-as-judge scoring
     - Improvement patch generation
     - Clarification questions
-    """
-    try:
-        prompt_id = str(uuid.uuid4())
-        prompt_content = request.prompt.content
 
-        logger.info(f"Starting analysis for prompt {prompt_id}")
+    Identical content analyzed within the dedupe window, and retries
+    carrying the same Idempotency-Key, return the stored report.
 
-        # Run the comprehensive analysis pipeline
-        pipeline = get_analysis_pipeline()
-        pipeline_state = await pipeline.analyze(
-            prompt_content=prompt_content,
-            format_type=request.prompt.format_type or "text",
+    The response body is the document serialized when the report was
+    stored, sent gzip- or brotli-compressed when the client accepts it.
+
+    New pipeline runs go through admission control; when the worker is
+    saturated the request is rejected with 429 and a Retry-After delay.
+    Bulk callers should send ``X-Analysis-Lane: batch`` so interactive
+    requests are admitted ahead of them.
+
+    With ``?timings=true`` the response carries a ``Server-Timing`` header
+    and a ``timings`` block with per-node and per-LLM-call latency, token
+    counts and cache hits. A request that joins an identical run already in
+    progress reports only its own lookups, since the run is timed for the
+    request that started it.
+    """
+    _check_entropy_mode(request.entropy_mode)
+    collector = _start_timings(timings)
+    try:
+        store = get_analysis_store()
+        format_type = request.prompt.format_type or "text"
+        fingerprint = content_fingerprint(
+            request.prompt.content, format_type, request.entropy_mode
         )
 
-        # Convert pipeline state to API response format
-        report = pipeline_state.to_metric_report()
-        report.prompt_id = prompt_id
-        report.original_prompt = prompt_content
-        report.analyzed_at = datetime.utcnow()
-
-        # Convert patches to API format
-        api_patches = []
-        for patch in pipeline_state.patches:
-            api_patches.append(
-                Patch(
-                    id=patch.id,
-                    type=patch.type,
-                    category=patch.category,
-                    description=patch.description,
-                    original=patch.original,
-                    improved=patch.improved,
-                    rationale=patch.rationale,
-                    confidence=patch.confidence,
+        stored = await _find_reusable_report(
+            request, format_type, fingerprint, idempotency_key
+        )
+        record_cache("analysis_store", stored is not None)
+
+        if stored is None:
+            # Concurrent identical requests share one pipeline run
+            task = _inflight_analyses.get(fingerprint)
+            record_cache("inflight", task is not None)
+            if task is None:
+                task = asyncio.create_task(
+                    _admitted(lane, lambda: _run_analysis(request, format_type, fingerprint))
                 )
+                _inflight_analyses[fingerprint] = task
+                task.add_done_callback(lambda done: _forget_inflight(fingerprint, done))
+            stored = await _await_while_connected(raw_request, task, fingerprint)
+
+        report, document = stored
+        if idempotency_key:
+            await store.put_alias(
+                f"idempotency:{idempotency_key}",
+                f"{report.prompt_id}:{fingerprint}",
+                settings.analysis_idempotency_ttl_seconds,
+            )
+
+        return _timed_response(document, accept_encoding, collector, timings)
+
+    except AdmissionRejected as e:
+        raise _too_busy(e)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Analysis failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+
+async def _await_while_connected(
+    raw_request: Request, task: asyncio.Task, fingerprint: Optional[str] = None
+):
+    """
+    Wait for a pipeline task, abandoning it if the client disconnects.
+
+    The task is cancelled when the client goes away, which cancels the
+    pending graph nodes and LLM requests with it. A shared run (keyed by
+    ``fingerprint``) is only cancelled once every request waiting on it has
+    gone. Cancelling the waiting request itself never cancels the task.
+    """
+    if fingerprint:
+        _inflight_waiters[fingerprint] = _inflight_waiters.get(fingerprint, 0) + 1
+
+    try:
+        while True:
+            done, _ = await asyncio.wait(
+                {task}, timeout=settings.analysis_disconnect_poll_seconds
             )
+            if done:
+                return task.result()
+            if await raw_request.is_disconnected():
+                break
+    finally:
+        remaining = 0
+        if fingerprint:
+            remaining = _inflight_waiters.pop(fingerprint) - 1
+            if remaining:
+                _inflight_waiters[fingerprint] = remaining
+
+    if not remaining and not task.done():
+        # Later identical requests must start a fresh run, not join this one
+        if fingerprint:
+            _forget_inflight(fingerprint, task)
+        task.cancel()
+        metrics.increment("analysis.abandoned_runs")
+        logger.info(f"Client disconnected, abandoned pipeline run for {raw_request.url.path}")
+
+    raise HTTPException(status_code=499, detail="Client closed request")
+
+
+async def _admitted(lane: Lane, run: Callable[[], Awaitable[T]]) -> T:
+    """Run a pipeline coroutine once admission control grants it a slot."""
+    async with get_admission_controller().admit(lane):
+        return await run()
+
+
+def _too_busy(rejection: AdmissionRejected) -> HTTPException:
+    """429 response for a run that admission control turned away."""
+    return HTTPException(
+        status_code=429,
+        detail=f"Analysis capacity exhausted ({rejection.reason}), retry later",
+        headers={"Retry-After": str(rejection.retry_after)},
+    )
+
+
+def _check_entropy_mode(entropy_mode: Optional[str]) -> None:
+    """Reject a logprob entropy override before the estimator is calibrated."""
+    if entropy_mode == "logprob" and not settings.logprob_entropy_available:
+        raise HTTPException(
+            status_code=400,
+            detail="Logprob entropy is not calibrated on this server",
+        )
+
+
+def _start_timings(requested: bool) -> Optional[TimingCollector]:
+    """Collect timings for this request if it asked for them or they are always on."""
+    if requested or settings.analysis_timings_enabled:
+        return start_collecting()
+    return None
+
+
+def _timed_response(
+    document: bytes,
+    accept_encoding: Optional[str],
+    collector: Optional[TimingCollector],
+    include_body: bool,
+) -> Response:
+    """Serve a stored document with the request's Server-Timing header and timings block."""
+    if collector is None:
+        return document_response(document, accept_encoding)
+
+    extra = None
+    if include_body:
+        extra = {"timings": collector.to_timings().model_dump(mode="json")}
+    return document_response(
+        document, accept_encoding, {"Server-Timing": collector.server_timing()}, extra
+    )
 
-        # Convert questions to API format
-        api_questions = []
-        for question in pipeline_state.clarify_questions:
-            api_questions.append(
-                ClarifyQuestion(
-                    id=question.id,
-                    question=question.question,
-                    category=question.category,
-                    importance=question.priority,
+
+def _forget_inflight(fingerprint: str, task: asyncio.Task) -> None:
+    """Drop a finished or abandoned run from the in-flight table."""
+    if _inflight_analyses.get(fingerprint) is task:
+        del _inflight_analyses[fingerprint]
+
+
+async def _find_reusable_report(
+    request: AnalyzeRequest,
+    format_type: str,
+    fingerprint: str,
+    idempotency_key: Optional[str],
+) -> Optional[StoredAnalysis]:
+    """Return a stored analysis for a retried or repeated request, if any."""
+    store = get_analysis_store()
+
+    if idempotency_key:
+        alias = await store.get_alias(f"idempotency:{idempotency_key}")
+        if alias:
+            prompt_id, _, original_fingerprint = alias.partition(":")
+            if original_fingerprint != fingerprint:
+                raise HTTPException(
+                    status_code=409,
+                    detail="Idempotency-Key was already used for a different request",
                 )
+            document = await store.get_raw(prompt_id)
+            if document is not None:
+                logger.info(f"Returning analysis {prompt_id} for retried request")
+                return decode_report(document), document
+
+    window = settings.analysis_dedupe_window_seconds
+    if window <= 0:
+        return None
+
+    prompt_id = await store.get_alias(f"content:{fingerprint}")
+    if not prompt_id:
+        return None
+
+    document = await store.get_raw(prompt_id)
+    if document is None:
+        return None
+
+    report = decode_report(document)
+    age = (datetime.utcnow() - report.analyzed_at).total_seconds()
+    if age > window:
+        return None
+
+    # Clarification re-analysis replaces the report under the same ID
+    analyzed = content_fingerprint(report.original_prompt, format_type, request.entropy_mode)
+    if analyzed != fingerprint:
+        return None
+
+    logger.info(f"Reusing analysis {prompt_id} for identical content")
+    return report, document
+
+
+async def _run_analysis(
+    request: AnalyzeRequest, format_type: str, fingerprint: str
+) -> StoredAnalysis:
+    """Run the pipeline for a request and store the resulting report."""
+    prompt_id = str(uuid.uuid4())
+    prompt_content = request.prompt.content
+    store = get_analysis_store()
+
+    logger.info(f"Starting analysis for prompt {prompt_id}")
+
+    # Look for a near-duplicate whose judge and entropy results can be reused
+    cache = get_semantic_cache()
+    variant = f"{format_type}:{request.entropy_mode or ''}"
+    embedding = None
+    source, similarity = None, 0.0
+    with stage("semantic_cache_lookup"):
+        if settings.semantic_cache_enabled:
+            embedding = await cache.embed(prompt_content)
+        if embedding is not None:
+            metrics.increment("semantic_cache.lookups")
+            match = cache.search(variant, embedding)
+            if match is not None:
+                source = await store.get(match[0])
+                similarity = match[1]
+            metrics.increment("semantic_cache.hits" if source else "semantic_cache.misses")
+            record_cache("semantic_cache", source is not None)
+
+    # Run the comprehensive analysis pipeline; nothing is stored until it
+    # completes, so an abandoned run leaves no partial report behind
+    pipeline = await load_analysis_pipeline()
+    try:
+        pipeline_state = await pipeline.analyze(
+            prompt_content=prompt_content,
+            format_type=format_type,
+            entropy_mode=request.entropy_mode,
+            reuse=source,
+        )
+    except asyncio.CancelledError:
+        logger.info(f"Analysis {prompt_id} cancelled before completion")
+        raise
+
+    # Convert pipeline state to API response format
+    report = _build_report(pipeline_state, prompt_id, prompt_content, "Analysis completed")
+
+    if source is not None:
+        report.reuse = AnalysisReuse(
+            source_prompt_id=source.prompt_id,
+            similarity=similarity,
+            reused=["judge_score", "semantic_entropy"],
+        )
+        if random.random() < settings.semantic_cache_audit_rate:
+            _schedule_reuse_audit(prompt_content, report.judge_score.score)
+    elif embedding is not None:
+        # Only fresh analyses are indexed, so reuse never chains
+        cache.add(prompt_id, variant, embedding)
+        metrics.set_gauge("semantic_cache.entries", len(cache))
+
+    # Store the analysis and its block index, index it by content and
+    # queue it for persistence
+    with stage("store"):
+        document = await store.put(prompt_id, report)
+        await store.put_blocks(prompt_id, build_block_index(pipeline_state))
+        metrics.observe("analysis_store.document_bytes", len(document))
+        if settings.analysis_dedupe_window_seconds > 0:
+            await store.put_alias(
+                f"content:{fingerprint}", prompt_id, settings.analysis_dedupe_window_seconds
             )
+    get_analysis_history().enqueue(report)
+
+    logger.info(
+        f"Analysis completed for prompt {prompt_id}, score: {report.overall_score:.1f}"
+        + (f", reused from {source.prompt_id} ({similarity:.3f})" if source else "")
+    )
+
+    return report, document
+
+
+# Background reuse audits, kept referenced until they finish
+_audit_tasks: set[asyncio.Task] = set()
+
+
+def _schedule_reuse_audit(prompt_content: str, reused_score: float) -> None:
+    """Re-judge a reused analysis in the background and record the score drift."""
+
+    async def audit():
+        state = await judge_score_node(PipelineState(prompt_content=prompt_content))
+        if state.errors:
+            return
+        drift = abs((state.llm_judge_score or 0.0) - reused_score)
+        metrics.observe("semantic_cache.judge_drift", drift)
+        logger.info(f"Semantic cache audit: judge drift {drift:.2f}")
+
+    task = asyncio.create_task(audit())
+    _audit_tasks.add(task)
+    task.add_done_callback(_audit_tasks.discard)
+
 
-        # Create semantic entropy object
-        semantic_entropy = SemanticEntropy(
-            entropy=pipeline_state.entropy_score or 0.0,
-            spread=pipeline_state.entropy_spread or 0.0,
-            clusters=pipeline_state.entropy_clusters or 1,
-            samples=pipeline_state.semantic_samples[:3]
-            if pipeline_state.semantic_samples
-            else [],
+@router.post("/lint", response_model=LintReport)
+def lint_prompt_endpoint(request: LintRequest):
+    """
+    Lint a prompt with the deterministic stages only.
+
+    Returns markup, vocabulary and pattern-contradiction findings plus
+    patches (safe markup fixes, risky vocabulary rewrites), without any LLM
+    calls. Declared sync so FastAPI runs the
+    CPU-bound work in its threadpool instead of on the event loop. Prompts
+    longer than ``lint_max_chars`` are rejected with 413, since they could
+    not be linted within the latency target; /analyze takes them instead.
+    """
+    if len(request.prompt.content) > settings.lint_max_chars:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Lint accepts prompts of up to {settings.lint_max_chars} characters",
         )
 
-        # Create judge score object
-        judge_score = MetricScore(
-            score=pipeline_state.llm_judge_score or 5.0,
-            rationale=pipeline_state.llm_judge_reasoning or "Analysis completed",
-            details={},
+    report = lint_prompt(request.prompt.content)
+
+    metrics.observe("lint.duration_ms", report.duration_ms)
+    if report.duration_ms > settings.lint_p99_target_ms:
+        metrics.increment("lint.over_target")
+        logger.warning(
+            f"Lint took {report.duration_ms:.1f} ms for {len(request.prompt.content)} chars, "
+            f"target {settings.lint_p99_target_ms:.0f} ms"
         )
 
-        # Create contradictions list
-        contradictions = []
-        for contradiction in pipeline_state.contradictions:
-            contradictions.append(
-                Contradiction(
-                    type="intra" if contradiction.get("type") != "inter" else "inter",
-                    description=contradiction.get("description", ""),
-                    severity=contradiction.get("severity", "medium"),
-                    locations=[
-                        contradiction.get("sentence_1", ""),
-                        contradiction.get("sentence_2", ""),
-                    ],
-                )
+    return report
+
+
+@router.post("/incremental", response_model=AnalyzeResponse)
+async def analyze_prompt_incrementally(
+    request: IncrementalAnalyzeRequest,
+    raw_request: Request,
+    accept_encoding: Optional[str] = Header(default=None),
+    lane: Lane = Header(default="interactive", alias="X-Analysis-Lane"),
+    timings: bool = False,
+):
+    """
+    Re-analyze an edited prompt against an earlier analysis.
+
+    Meant for editor integrations that re-analyze on every edit: only the
+    paragraphs that changed are re-analyzed, and judge, entropy and other
+    LLM results are carried over unless the edit is large. The analysis is
+    replaced under the previous ID, so an editing session holds one store
+    entry however many edits it sends; edits are not written to the
+    analysis history, which keeps the analysis as first run.
+    """
+    _check_entropy_mode(request.entropy_mode)
+    collector = _start_timings(timings)
+    previous = await _load_report(request.previous_prompt_id)
+    store = get_analysis_store()
+
+    try:
+        index = await store.get_blocks(previous.prompt_id)
+        task = asyncio.create_task(
+            _admitted(
+                lane,
+                lambda: analyze_incremental(
+                    previous,
+                    index,
+                    request.prompt.content,
+                    format_type=request.prompt.format_type or "text",
+                    entropy_mode=request.entropy_mode,
+                ),
             )
+        )
+        pipeline_state, new_index, update = await _await_while_connected(raw_request, task)
 
-        # Update report with converted data
-        report.judge_score = judge_score
-        report.semantic_entropy = semantic_entropy
-        report.contradictions = contradictions
-        report.patches = api_patches
-        report.clarify_questions = api_questions
-
-        # Calculate overall score
-        overall_score = pipeline_state.llm_judge_score or 5.0
-        report.overall_score = overall_score
-        report.improvement_priority = (
-            "high" if overall_score < 6 else "medium" if overall_score < 8 else "low"
+        prompt_id = previous.prompt_id
+        report = _build_report(
+            pipeline_state, prompt_id, request.prompt.content, "Incremental analysis completed"
         )
+        report.incremental = update
 
-        # Cache the analysis
-        analysis_cache[prompt_id] = {
-            "report": report,
-            "patches": api_patches,
-            "questions": api_questions,
-            "pipeline_state": pipeline_state,
-        }
+        with stage("store"):
+            document = await store.put(prompt_id, report)
+            await store.put_blocks(prompt_id, new_index)
+        metrics.increment(
+            "incremental.global_recomputed" if update.recomputed_global else "incremental.global_reused"
+        )
 
         logger.info(
-            f"Analysis completed for prompt {prompt_id}, score: {overall_score:.1f}"
+            f"Incremental analysis of {prompt_id}: "
+            f"{update.blocks_analyzed}/{update.blocks_total} blocks re-analyzed"
         )
 
-        return AnalyzeResponse(
-            report=report, patches=api_patches, questions=api_questions
-        )
+        return _timed_response(document, accept_encoding, collector, timings)
 
+    except AdmissionRejected as e:
+        raise _too_busy(e)
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Analysis failed: {str(e)}")
+        logger.error(f"Incremental analysis failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
@@ -161,56 +489,44 @@ async def apply_patches(request: ApplyPatchesRequest):
     """
     Apply selected improvement patches to a prompt.
     """
-    if request.prompt_id not in analysis_cache:
-        raise HTTPException(status_code=404, detail="Prompt analysis not found")
-
-    cached_data = analysis_cache[request.prompt_id]
-    original_prompt = cached_data["report"].original_prompt
-    available_patches = {p.id: p for p in cached_data["patches"]}
+    report = await _load_report(request.prompt_id)
+    original_prompt = report.original_prompt
+    available_patches = {p.id: p for p in report.patches}
 
     # Determine which patches to apply
     patches_to_apply = []
+    conflicts = []
     if request.apply_safe_all:
         patches_to_apply = [p for p in available_patches.values() if p.type == "safe"]
     else:
-        patches_to_apply = [
-            available_patches[pid]
-            for pid in request.patch_ids
-            if pid in available_patches
-        ]
+        for pid in request.patch_ids:
+            if pid in available_patches:
+                patches_to_apply.append(available_patches[pid])
+            else:
+                conflicts.append(PatchConflict(patch_id=pid, reason="Unknown patch ID"))
 
     if not patches_to_apply:
         raise HTTPException(status_code=400, detail="No valid patches to apply")
 
-    # Apply patches (improved implementation)
-    improved_prompt = original_prompt
-    applied_patch_ids = []
-
-    for patch in patches_to_apply:
-        # For quality patches that may rewrite the entire prompt
-        if patch.category == "clarity" and patch.type == "risky":
-            # Use LLM-suggested improvement as the new prompt
-            improved_prompt = patch.improved
-            applied_patch_ids.append(patch.id)
-        # For vocabulary and markup patches - exact string replacement
-        elif patch.original and patch.original in improved_prompt:
-            improved_prompt = improved_prompt.replace(patch.original, patch.improved)
-            applied_patch_ids.append(patch.id)
-        # For patches where original text doesn't match exactly - still apply LLM suggestion
-        elif patch.category in ["vocabulary", "markup", "structure"]:
-            # Apply the improvement anyway (this is what the user requested)
-            applied_patch_ids.append(patch.id)
-            # For now, keep original prompt but log that patch was "applied"
+    # Apply patches by span in one pass; overlapping or stale patches are reported
+    improved_prompt, applied_patch_ids, apply_conflicts = apply_span_patches(
+        original_prompt, patches_to_apply
+    )
+    conflicts.extend(apply_conflicts)
 
     # Calculate quality improvement estimate
     quality_gain = len(applied_patch_ids) * 0.5  # Simple estimate
 
+    applied_ids = set(applied_patch_ids)
     improvement_summary = f"Applied {len(applied_patch_ids)} patches: " + ", ".join(
-        [p.category for p in patches_to_apply]
+        [p.category for p in patches_to_apply if p.id in applied_ids]
     )
+    if conflicts:
+        improvement_summary += f" ({len(conflicts)} skipped due to conflicts)"
 
     logger.info(
-        f"Applied {len(applied_patch_ids)} patches to prompt {request.prompt_id}"
+        f"Applied {len(applied_patch_ids)} patches to prompt {request.prompt_id}, "
+        f"{len(conflicts)} conflicts"
     )
 
     return PromptImproved(
@@ -219,140 +535,112 @@ async def apply_patches(request: ApplyPatchesRequest):
         applied_patches=applied_patch_ids,
         improvement_summary=improvement_summary,
         quality_gain=quality_gain,
+        conflicts=conflicts,
+        diff=unified_diff(original_prompt, improved_prompt, name=request.prompt_id),
     )
 
 
 @router.post("/clarify", response_model=AnalyzeResponse)
-async def process_clarification(request: ClarifyRequest):
+async def process_clarification(
+    request: ClarifyRequest,
+    raw_request: Request,
+    accept_encoding: Optional[str] = Header(default=None),
+    lane: Lane = Header(default="interactive", alias="X-Analysis-Lane"),
+    timings: bool = False,
+):
     """
     Process clarification answers and provide updated analysis.
     """
-    if request.prompt_id not in analysis_cache:
-        raise HTTPException(status_code=404, detail="Prompt analysis not found")
+    collector = _start_timings(timings)
 
-    # Get cached analysis data
-    cached_data = analysis_cache[request.prompt_id]
-    original_report = cached_data["report"]
+    # Get stored analysis data
+    original_document = await _load_document(request.prompt_id)
+    original_report = decode_report(original_document)
     original_prompt = original_report.original_prompt
 
     # Build context from clarification answers
     clarification_context = _build_clarification_context(request.answers)
-    
+
     # Create enhanced prompt with clarification context
     enhanced_prompt = f"{original_prompt}\n\nClarifications:\n{clarification_context}"
-    
+
     logger.info(
         f"Re-analyzing prompt {request.prompt_id} with {len(request.answers)} clarification answers"
     )
 
     try:
         # Re-run analysis with enhanced prompt
-        pipeline = get_analysis_pipeline()
-        pipeline_state = await pipeline.analyze(
-            prompt_content=enhanced_prompt,
-            format_type="text",
-        )
-
-        # Update report
-        updated_report = pipeline_state.to_metric_report()
-        updated_report.prompt_id = request.prompt_id
-        updated_report.original_prompt = enhanced_prompt  # Show the enhanced version
-        updated_report.analyzed_at = datetime.utcnow()
-
-        # Convert pipeline results to API format (same logic as analyze endpoint)
-        api_patches = []
-        for patch in pipeline_state.patches:
-            api_patches.append(
-                Patch(
-                    id=patch.id,
-                    type=patch.type,
-                    category=patch.category,
-                    description=patch.description,
-                    original=patch.original,
-                    improved=patch.improved,
-                    rationale=patch.rationale,
-                    confidence=patch.confidence,
-                )
+        pipeline = await load_analysis_pipeline()
+        task = asyncio.create_task(
+            _admitted(
+                lane, lambda: pipeline.analyze(prompt_content=enhanced_prompt, format_type="text")
             )
-
-        api_questions = []
-        for question in pipeline_state.clarify_questions:
-            api_questions.append(
-                ClarifyQuestion(
-                    id=question.id,
-                    question=question.question,
-                    category=question.category,
-                    importance=question.priority,
-                )
-            )
-
-        # Update report with analysis results
-        semantic_entropy = SemanticEntropy(
-            entropy=pipeline_state.entropy_score or 0.0,
-            spread=pipeline_state.entropy_spread or 0.0,
-            clusters=pipeline_state.entropy_clusters or 1,
-            samples=pipeline_state.semantic_samples[:3]
-            if pipeline_state.semantic_samples
-            else [],
         )
+        pipeline_state = await _await_while_connected(raw_request, task)
 
-        judge_score = MetricScore(
-            score=pipeline_state.llm_judge_score or 5.0,
-            rationale=pipeline_state.llm_judge_reasoning or "Re-analysis completed",
-            details={},
-        )
-
-        contradictions = []
-        for contradiction in pipeline_state.contradictions:
-            contradictions.append(
-                Contradiction(
-                    type="intra" if contradiction.get("type") != "inter" else "inter",
-                    description=contradiction.get("description", ""),
-                    severity=contradiction.get("severity", "medium"),
-                    locations=[
-                        contradiction.get("sentence_1", ""),
-                        contradiction.get("sentence_2", ""),
-                    ],
-                )
-            )
-
-        updated_report.judge_score = judge_score
-        updated_report.semantic_entropy = semantic_entropy
-        updated_report.contradictions = contradictions
-        updated_report.patches = api_patches
-        updated_report.clarify_questions = api_questions
-
-        # Calculate overall score
-        overall_score = pipeline_state.llm_judge_score or 5.0
-        updated_report.overall_score = overall_score
-        updated_report.improvement_priority = (
-            "high" if overall_score < 6 else "medium" if overall_score < 8 else "low"
+        # Show the enhanced version as the analyzed prompt
+        updated_report = _build_report(
+            pipeline_state, request.prompt_id, enhanced_prompt, "Re-analysis completed"
         )
 
-        # Update cache with new results
-        analysis_cache[request.prompt_id] = {
-            "report": updated_report,
-            "patches": api_patches,
-            "questions": api_questions,
-            "pipeline_state": pipeline_state,
-        }
+        # Update store with new results
+        with stage("store"):
+            document = await get_analysis_store().put(request.prompt_id, updated_report)
+        get_analysis_history().enqueue(updated_report)
 
         logger.info(
-            f"Re-analysis completed for prompt {request.prompt_id}, new score: {overall_score:.1f}"
+            f"Re-analysis completed for prompt {request.prompt_id}, "
+            f"new score: {updated_report.overall_score:.1f}"
         )
 
-        return AnalyzeResponse(
-            report=updated_report, patches=api_patches, questions=api_questions
-        )
+        return _timed_response(document, accept_encoding, collector, timings)
 
+    except AdmissionRejected as e:
+        raise _too_busy(e)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Re-analysis failed: {str(e)}")
-        # Return cached analysis if re-analysis fails
-        return AnalyzeResponse(
-            report=cached_data["report"],
-            patches=cached_data["patches"],
-            questions=cached_data["questions"],
-        )
+        # Return stored analysis if re-analysis fails
+        return _timed_response(original_document, accept_encoding, collector, timings)
+
+
+async def _load_document(prompt_id: str) -> bytes:
+    """Fetch a stored analysis document, falling back to history, or raise 404."""
+    store = get_analysis_store()
+    document = await store.get_raw(prompt_id)
+    if document is not None:
+        return document
+
+    # Evicted or written before a restart; re-warm the store from history
+    report = await get_analysis_history().load(prompt_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Prompt analysis not found")
+
+    return await store.put(prompt_id, report)
+
+
+async def _load_report(prompt_id: str) -> MetricReport:
+    """Fetch a stored analysis report, falling back to history, or raise 404."""
+    return decode_report(await _load_document(prompt_id))
+
+
+def _build_report(
+    pipeline_state: PipelineState,
+    prompt_id: str,
+    original_prompt: str,
+    default_rationale: str,
+) -> MetricReport:
+    """Convert a finished pipeline state into the API report."""
+    report = pipeline_state.to_metric_report()
+    report.prompt_id = prompt_id
+    report.original_prompt = original_prompt
+    report.analyzed_at = datetime.utcnow()
+
+    if not pipeline_state.llm_judge_reasoning:
+        report.judge_score.rationale = default_rationale
+
+    return report
 
 
 def _build_clarification_context(answers: list[ClarifyAnswer]) -> str:
@@ -369,204 +657,235 @@ def _build_clarification_context(answers: list[ClarifyAnswer]) -> str:
     return "\n".join(context_lines)
 
 
+# Media type and filename extension for each export format
+EXPORT_FORMATS = {
+    "md": "text/markdown",
+    "xml": "application/xml",
+}
+
+# Rendered export text is flushed to the client in chunks of about this size
+EXPORT_CHUNK_SIZE = 16 * 1024
+
+
 @router.get("/export/{prompt_id}.{format_type}")
-async def export_prompt(prompt_id: str, format_type: str):
+async def export_prompt(
+    prompt_id: str,
+    format_type: str,
+    if_none_match: Optional[str] = Header(default=None),
+):
     """
     Export analyzed prompt in specified format (md or xml).
+
+    Exports are rendered once per report version and cached; the ETag
+    identifies that version so unchanged exports revalidate with a 304.
     """
-    if format_type not in ["md", "xml"]:
+    if format_type not in EXPORT_FORMATS:
         raise HTTPException(status_code=400, detail="Format must be 'md' or 'xml'")
-    
-    if prompt_id not in analysis_cache:
-        raise HTTPException(status_code=404, detail="Prompt analysis not found")
-    
-    cached_data = analysis_cache[prompt_id]
-    report = cached_data["report"]
-    patches = cached_data["patches"]
-    
-    try:
-        if format_type == "md":
-            content = _export_as_markdown(report, patches)
-            media_type = "text/markdown"
-            filename = f"prompt-analysis-{prompt_id}.md"
-        else:  # xml
-            content = _export_as_xml(report, patches)
-            media_type = "application/xml"
-            filename = f"prompt-analysis-{prompt_id}.xml"
-        
-        from fastapi.responses import Response
-        
-        return Response(
-            content=content,
-            media_type=media_type,
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
-        
-    except Exception as e:
-        logger.error(f"Export failed for {prompt_id}: {e}")
-        raise HTTPException(status_code=500, detail="Export failed")
+
+    document = await _load_document(prompt_id)
+
+    # The stored document is deterministic, so its hash versions the report
+    version = hashlib.blake2b(document, digest_size=8).hexdigest()
+    etag = f'"{format_type}-{version}"'
+    headers = {
+        "ETag": etag,
+        "Content-Disposition": f"attachment; filename=prompt-analysis-{prompt_id}.{format_type}",
+    }
+
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    media_type = EXPORT_FORMATS[format_type]
+    cache = get_export_cache()
+    content = cache.get(prompt_id, format_type, version)
+    if content is not None:
+        return Response(content=content, media_type=media_type, headers=headers)
+
+    report = decode_report(document)
+    renderer = _export_as_markdown if format_type == "md" else _export_as_xml
+    chunks = cache.render_through(
+        prompt_id, format_type, version, _encode_lines(renderer(report, report.patches))
+    )
+
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison)."""
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _encode_lines(lines: Iterator[str]) -> Iterator[bytes]:
+    """Join rendered lines with newlines and yield them as UTF-8 chunks."""
+    buffer: list[str] = []
+    size = 0
+    first = True
+
+    for line in lines:
+        if not first:
+            buffer.append("\n")
+        first = False
+        buffer.append(line)
+        size += len(line) + 1
+
+        if size >= EXPORT_CHUNK_SIZE:
+            yield "".join(buffer).encode("utf-8")
+            buffer.clear()
+            size = 0
+
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
 
 
 @router.get("/report/{prompt_id}.json")
-async def download_report(prompt_id: str):
+async def download_report(
+    prompt_id: str,
+    accept_encoding: Optional[str] = Header(default=None),
+):
     """
     Download full analysis report as JSON.
     """
-    if prompt_id not in analysis_cache:
-        raise HTTPException(status_code=404, detail="Prompt analysis not found")
-    
-    cached_data = analysis_cache[prompt_id]
-    
-    from fastapi.responses import JSONResponse
-    
-    return JSONResponse(
-        content={
-            "report": cached_data["report"].model_dump(mode="json"),
-            "patches": [p.model_dump(mode="json") for p in cached_data["patches"]],
-            "questions": [q.model_dump(mode="json") for q in cached_data["questions"]],
-            "exported_at": datetime.utcnow().isoformat()
-        },
-        headers={"Content-Disposition": f"attachment; filename=analysis-{prompt_id}.json"}
+    document = await _load_document(prompt_id)
+
+    return document_response(
+        document,
+        accept_encoding,
+        headers={"Content-Disposition": f"attachment; filename=analysis-{prompt_id}.json"},
     )
 
 
-def _export_as_markdown(report, patches: list[Patch]) -> str:
-    """Export analysis as Markdown format."""
-    lines = []
-    
+def _export_as_markdown(report: MetricReport, patches: list[Patch]) -> Iterator[str]:
+    """Render analysis as Markdown, line by line."""
+
     # Header
-    lines.append(f"# Prompt Analysis Report")
-    lines.append(f"")
-    lines.append(f"**Analyzed At:** {report.analyzed_at}")
-    lines.append(f"**Language:** {report.detected_language}")
-    lines.append(f"**Overall Score:** {report.overall_score:.1f}/10")
-    lines.append(f"")
+    yield f"# Prompt Analysis Report"
+    yield f""
+    yield f"**Analyzed At:** {report.analyzed_at}"
+    yield f"**Language:** {report.detected_language}"
+    yield f"**Overall Score:** {report.overall_score:.1f}/10"
+    yield f""
     
     # Original Prompt
-    lines.append(f"## Original Prompt")
-    lines.append(f"")
-    lines.append(f"```")
-    lines.append(report.original_prompt)
-    lines.append(f"```")
-    lines.append(f"")
+    yield f"## Original Prompt"
+    yield f""
+    yield f"```"
+    yield report.original_prompt
+    yield f"```"
+    yield f""
     
     # Metrics
-    lines.append(f"## Analysis Metrics")
-    lines.append(f"")
-    lines.append(f"- **Judge Score:** {report.judge_score.score:.1f}/10")
-    lines.append(f"- **Semantic Entropy:** {report.semantic_entropy.entropy:.3f}")
-    lines.append(f"- **Clusters:** {report.semantic_entropy.clusters}")
-    lines.append(f"- **Length:** {report.length_words} words, {report.length_chars} characters")
-    lines.append(f"- **Complexity:** {report.complexity_score:.1f}/10")
-    lines.append(f"")
+    yield f"## Analysis Metrics"
+    yield f""
+    yield f"- **Judge Score:** {report.judge_score.score:.1f}/10"
+    yield f"- **Semantic Entropy:** {report.semantic_entropy.entropy:.3f}"
+    yield f"- **Clusters:** {report.semantic_entropy.clusters}"
+    yield f"- **Length:** {report.length_words} words, {report.length_chars} characters"
+    yield f"- **Complexity:** {report.complexity_score:.1f}/10"
+    yield f""
     
     # Contradictions
     if report.contradictions:
-        lines.append(f"## Contradictions Detected")
-        lines.append(f"")
+        yield f"## Contradictions Detected"
+        yield f""
         for i, contradiction in enumerate(report.contradictions, 1):
-            lines.append(f"{i}. **{contradiction.severity.upper()}:** {contradiction.description}")
-        lines.append(f"")
+            yield f"{i}. **{contradiction.severity.upper()}:** {contradiction.description}"
+        yield f""
     
     # Improvement Patches
     if patches:
-        lines.append(f"## Suggested Improvements")
-        lines.append(f"")
+        yield f"## Suggested Improvements"
+        yield f""
         
         safe_patches = [p for p in patches if p.type == "safe"]
         risky_patches = [p for p in patches if p.type == "risky"]
         
         if safe_patches:
-            lines.append(f"### Safe Improvements")
-            lines.append(f"")
+            yield f"### Safe Improvements"
+            yield f""
             for patch in safe_patches:
-                lines.append(f"- **{patch.category.title()}:** {patch.description}")
-                lines.append(f"  - *Confidence:* {patch.confidence:.0%}")
-                lines.append(f"  - *Rationale:* {patch.rationale}")
-                lines.append(f"")
+                yield f"- **{patch.category.title()}:** {patch.description}"
+                yield f"  - *Confidence:* {patch.confidence:.0%}"
+                yield f"  - *Rationale:* {patch.rationale}"
+                yield f""
         
         if risky_patches:
-            lines.append(f"### Advanced Improvements (Review Required)")
-            lines.append(f"")
+            yield f"### Advanced Improvements (Review Required)"
+            yield f""
             for patch in risky_patches:
-                lines.append(f"- **{patch.category.title()}:** {patch.description}")
-                lines.append(f"  - *Confidence:* {patch.confidence:.0%}")
-                lines.append(f"  - *Rationale:* {patch.rationale}")
-                lines.append(f"")
+                yield f"- **{patch.category.title()}:** {patch.description}"
+                yield f"  - *Confidence:* {patch.confidence:.0%}"
+                yield f"  - *Rationale:* {patch.rationale}"
+                yield f""
     
     # Judge Feedback
-    lines.append(f"## Judge Feedback")
-    lines.append(f"")
-    lines.append(report.judge_score.rationale)
-    lines.append(f"")
+    yield f"## Judge Feedback"
+    yield f""
+    yield report.judge_score.rationale
+    yield f""
     
     # Generated by
-    lines.append(f"---")
-    lines.append(f"*Generated by Curestry AI Prompt Analysis System*")
-    
-    return "\n".join(lines)
-
-
-def _export_as_xml(report, patches: list[Patch]) -> str:
-    """Export analysis as XML format."""
-    lines = []
-    
-    lines.append('<?xml version="1.0" encoding="UTF-8"?>')
-    lines.append('<prompt-analysis>')
-    lines.append(f'  <metadata>')
-    lines.append(f'    <prompt-id>{report.prompt_id}</prompt-id>')
-    lines.append(f'    <analyzed-at>{report.analyzed_at}</analyzed-at>')
-    lines.append(f'    <language>{report.detected_language}</language>')
-    lines.append(f'    <overall-score>{report.overall_score:.1f}</overall-score>')
-    lines.append(f'  </metadata>')
-    lines.append('')
+    yield f"---"
+    yield f"*Generated by Curestry AI Prompt Analysis System*"
+
+
+def _export_as_xml(report: MetricReport, patches: list[Patch]) -> Iterator[str]:
+    """Render analysis as XML, line by line."""
+
+    yield '<?xml version="1.0" encoding="UTF-8"?>'
+    yield '<prompt-analysis>'
+    yield f'  <metadata>'
+    yield f'    <prompt-id>{report.prompt_id}</prompt-id>'
+    yield f'    <analyzed-at>{report.analyzed_at}</analyzed-at>'
+    yield f'    <language>{report.detected_language}</language>'
+    yield f'    <overall-score>{report.overall_score:.1f}</overall-score>'
+    yield f'  </metadata>'
+    yield ''
     
     # Original prompt
-    lines.append(f'  <original-prompt>')
-    lines.append(f'    <![CDATA[{report.original_prompt}]]>')
-    lines.append(f'  </original-prompt>')
-    lines.append('')
+    yield f'  <original-prompt>'
+    yield f'    <![CDATA[{report.original_prompt}]]>'
+    yield f'  </original-prompt>'
+    yield ''
     
     # Metrics
-    lines.append(f'  <metrics>')
-    lines.append(f'    <judge-score>{report.judge_score.score:.1f}</judge-score>')
-    lines.append(f'    <semantic-entropy>{report.semantic_entropy.entropy:.3f}</semantic-entropy>')
-    lines.append(f'    <clusters>{report.semantic_entropy.clusters}</clusters>')
-    lines.append(f'    <length-words>{report.length_words}</length-words>')
-    lines.append(f'    <length-chars>{report.length_chars}</length-chars>')
-    lines.append(f'    <complexity>{report.complexity_score:.1f}</complexity>')
-    lines.append(f'  </metrics>')
-    lines.append('')
+    yield f'  <metrics>'
+    yield f'    <judge-score>{report.judge_score.score:.1f}</judge-score>'
+    yield f'    <semantic-entropy>{report.semantic_entropy.entropy:.3f}</semantic-entropy>'
+    yield f'    <clusters>{report.semantic_entropy.clusters}</clusters>'
+    yield f'    <length-words>{report.length_words}</length-words>'
+    yield f'    <length-chars>{report.length_chars}</length-chars>'
+    yield f'    <complexity>{report.complexity_score:.1f}</complexity>'
+    yield f'  </metrics>'
+    yield ''
     
     # Contradictions
     if report.contradictions:
-        lines.append(f'  <contradictions>')
+        yield f'  <contradictions>'
         for contradiction in report.contradictions:
-            lines.append(f'    <contradiction type="{contradiction.type}" severity="{contradiction.severity}">')
-            lines.append(f'      <description><![CDATA[{contradiction.description}]]></description>')
-            lines.append(f'    </contradiction>')
-        lines.append(f'  </contradictions>')
-        lines.append('')
+            yield f'    <contradiction type="{contradiction.type}" severity="{contradiction.severity}">'
+            yield f'      <description><![CDATA[{contradiction.description}]]></description>'
+            yield f'    </contradiction>'
+        yield f'  </contradictions>'
+        yield ''
     
     # Patches
     if patches:
-        lines.append(f'  <improvements>')
+        yield f'  <improvements>'
         for patch in patches:
-            lines.append(f'    <patch id="{patch.id}" type="{patch.type}" category="{patch.category}">')
-            lines.append(f'      <description><![CDATA[{patch.description}]]></description>')
-            lines.append(f'      <original><![CDATA[{patch.original}]]></original>')
-            lines.append(f'      <improved><![CDATA[{patch.improved}]]></improved>')
-            lines.append(f'      <rationale><![CDATA[{patch.rationale}]]></rationale>')
-            lines.append(f'      <confidence>{patch.confidence:.2f}</confidence>')
-            lines.append(f'    </patch>')
-        lines.append(f'  </improvements>')
-        lines.append('')
+            yield f'    <patch id="{patch.id}" type="{patch.type}" category="{patch.category}">'
+            yield f'      <description><![CDATA[{patch.description}]]></description>'
+            yield f'      <original><![CDATA[{patch.original}]]></original>'
+            yield f'      <improved><![CDATA[{patch.improved}]]></improved>'
+            yield f'      <rationale><![CDATA[{patch.rationale}]]></rationale>'
+            yield f'      <confidence>{patch.confidence:.2f}</confidence>'
+            yield f'    </patch>'
+        yield f'  </improvements>'
+        yield ''
     
     # Judge feedback
-    lines.append(f'  <judge-feedback>')
-    lines.append(f'    <![CDATA[{report.judge_score.rationale}]]>')
-    lines.append(f'  </judge-feedback>')
-    
-    lines.append('</prompt-analysis>')
+    yield f'  <judge-feedback>'
+    yield f'    <![CDATA[{report.judge_score.rationale}]]>'
+    yield f'  </judge-feedback>'
     
-    return "\n".join(lines)
+    yield '</prompt-analysis>'
@@ -1,4 +1,4 @@
-from typing import Literal
+from typing import Literal, Optional
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -14,6 +14,19 @@ class Settings(BaseSettings):
     # General settings
     env: Literal["development", "production"] = Field(default="development")
     log_level: Literal["DEBUG", "INFO", "WARNING", "ERROR"] = Field(default="INFO")
+    log_queue_size: int = Field(
+        default=10000, description="Log records buffered for the writer thread before dropping"
+    )
+    log_debug_sample_rate: float = Field(
+        default=0.1, description="Share of DEBUG records written when DEBUG is enabled"
+    )
+
+    # Startup: "eager" builds the analysis graph and tables before serving,
+    # "background" right after, "lazy" builds the graph on the first analysis
+    startup_preload: Literal["eager", "background", "lazy"] = Field(default="background")
+    startup_import_profile: bool = Field(
+        default=False, description="Log an import-time breakdown by package at startup"
+    )
 
     # Database settings
     postgres_user: str = Field(default="curestry")
@@ -26,6 +39,93 @@ class Settings(BaseSettings):
     # Redis settings
     redis_url: str = Field(default="redis://redis:6379/0")
 
+    # Analysis store: memory:// keeps reports per process, redis:// shares them
+    analysis_store_url: str = Field(default="memory://")
+    analysis_store_max_entries: int = Field(default=1000)
+    analysis_store_max_bytes: int = Field(
+        default=64 * 1024 * 1024, description="Compressed size bound for the memory store"
+    )
+    analysis_store_ttl_seconds: int = Field(default=24 * 60 * 60)
+    brotli_cache_max_bytes: int = Field(
+        default=16 * 1024 * 1024, description="Brotli encodings of stored documents kept per process"
+    )
+    analysis_dedupe_window_seconds: int = Field(
+        default=60 * 60, description="Reuse analyses of identical content this fresh (0 disables)"
+    )
+    analysis_idempotency_ttl_seconds: int = Field(default=24 * 60 * 60)
+    analysis_disconnect_poll_seconds: float = Field(
+        default=0.5, description="How often waiting requests check that the client is still there"
+    )
+    analysis_timings_enabled: bool = Field(
+        default=False,
+        description="Time every analysis and send a Server-Timing header, not only when requested",
+    )
+
+    # Background health monitor of OpenAI, Postgres and Redis
+    health_probe_interval_seconds: float = Field(default=15.0)
+    health_probe_timeout_seconds: float = Field(default=3.0)
+    health_probe_max_backoff_seconds: float = Field(
+        default=120.0, description="Longest delay between probes of a failing dependency"
+    )
+    health_stale_after_seconds: float = Field(
+        default=60.0, description="Age after which a probe result no longer counts as healthy"
+    )
+    health_required_dependencies: list[str] = Field(
+        default=["openai", "redis"], description="Dependencies that must be up for /readyz"
+    )
+
+    # Admission control of pipeline runs per worker process
+    admission_max_in_flight: int = Field(default=8, description="Concurrent pipeline runs")
+    admission_max_queue: int = Field(default=16, description="Runs waiting for a free slot")
+    admission_queue_timeout_seconds: float = Field(
+        default=5.0, description="How long a run may wait for a slot before it is rejected"
+    )
+    admission_interactive_reserved: int = Field(
+        default=2, description="Run slots that batch callers may not take"
+    )
+
+    # Semantic cache: reuse judge and entropy results of near-duplicate prompts.
+    # Off by default: every lookup costs an embedding round-trip before the
+    # pipeline starts, and the index is per worker
+    semantic_cache_enabled: bool = Field(default=False)
+    semantic_cache_threshold: float = Field(
+        default=0.97, description="Cosine similarity above which results are reused"
+    )
+    semantic_cache_max_entries: int = Field(default=2000)
+    semantic_cache_audit_rate: float = Field(
+        default=0.05, description="Share of reuses re-judged in the background to track drift"
+    )
+
+    # Write-behind persistence of analyses into analysis_results
+    analysis_history_enabled: bool = Field(default=True)
+    analysis_history_batch_size: int = Field(default=50)
+    analysis_history_flush_seconds: float = Field(default=2.0)
+    analysis_history_max_pending: int = Field(
+        default=5000, description="Buffered reports kept while the database is unavailable"
+    )
+
+    # Incremental re-analysis of edited prompts
+    incremental_recompute_ratio: float = Field(
+        default=0.2,
+        description="Share of changed text at which judge, entropy and other LLM nodes rerun",
+    )
+
+    # Deterministic /analyze/lint stages
+    lint_p99_target_ms: float = Field(
+        default=10.0, description="Lint runs slower than this are counted and logged"
+    )
+    # Lint costs about 1 ms per KB on dense prompts (python -m benchmarks.lint),
+    # so larger prompts could not meet the p99 target and are rejected
+    lint_max_chars: int = Field(
+        default=4096, description="Longest prompt /analyze/lint accepts, in characters"
+    )
+
+    # Rendered /analyze/export documents, cached per report version
+    export_cache_max_bytes: int = Field(default=32 * 1024 * 1024)
+    export_cache_max_entry_bytes: int = Field(
+        default=1024 * 1024, description="Larger exports are streamed without being cached"
+    )
+
     # OpenAI settings
     openai_api_key: str = Field(
         default="",
@@ -37,11 +137,65 @@ class Settings(BaseSettings):
         default="gpt-4o-mini", alias="OPENAI_MODEL_STANDARD"
     )
     openai_model_premium: str = Field(default="gpt-4o", alias="OPENAI_MODEL_PREMIUM")
+    llm_structured_output: bool = Field(
+        default=True,
+        description="Request schema-constrained JSON from LLM-backed pipeline nodes",
+    )
+    llm_max_concurrency: int = Field(
+        default=4, description="Maximum concurrent LLM requests issued by one pipeline stage"
+    )
 
     # Analysis configuration
     entropy_n: int = Field(
         default=8, description="Number of samples for semantic entropy"
     )
+    entropy_temperature: float = Field(
+        default=1.0, description="Sampling temperature for entropy samples"
+    )
+    entropy_mode: Literal["sampling", "logprob"] = Field(
+        default="sampling",
+        description="Entropy estimator: sampled embeddings or single-call token logprobs",
+    )
+
+    # Logprob entropy estimator, calibrated onto the sampling estimator's scale.
+    # Unavailable until both values are fitted with
+    # ``python -m app.pipeline.entropy_calibration``
+    entropy_logprob_top_k: int = Field(default=5, description="Top logprobs per token")
+    entropy_logprob_max_tokens: int = Field(default=80)
+    entropy_logprob_scale: Optional[float] = Field(
+        default=None, description="Calibration slope from mean token entropy (nats)"
+    )
+    entropy_logprob_offset: Optional[float] = Field(
+        default=None, description="Calibration intercept"
+    )
+
+    # Adaptive entropy sampling: draw waves until the estimate is tight enough
+    entropy_adaptive: bool = Field(default=True)
+    entropy_wave_size: int = Field(
+        default=3, description="Samples drawn concurrently per wave"
+    )
+    entropy_min_n: int = Field(
+        default=3,
+        description="Samples drawn before stopping early; at most entropy_wave_size "
+        "so a clear prompt can stop after one wave",
+    )
+    entropy_max_n: int = Field(default=12, description="Upper bound on samples drawn")
+    entropy_ci_width: float = Field(
+        default=0.05, description="95% confidence interval width that stops sampling"
+    )
+
+    # LLM judge cascade: score on the cheap tier, escalate only when uncertain
+    judge_cascade_enabled: bool = Field(default=True)
+    judge_escalation_tier: Literal["standard", "premium"] = Field(
+        default="premium", description="Tier used when the cheap verdict is uncertain"
+    )
+    judge_uncertainty_margin: float = Field(
+        default=0.5,
+        description="Distance from the 6/8 priority thresholds treated as borderline",
+    )
+    judge_disagreement_threshold: float = Field(
+        default=4.0, description="Spread between dimension scores that forces escalation"
+    )
 
     @property
     def is_development(self) -> bool:
@@ -53,6 +207,14 @@ class Settings(BaseSettings):
         """Check if running in production mode."""
         return self.env == "production"
 
+    @property
+    def logprob_entropy_available(self) -> bool:
+        """Whether the logprob entropy estimator has been calibrated."""
+        return (
+            self.entropy_logprob_scale is not None
+            and self.entropy_logprob_offset is not None
+        )
+
 
 # Global settings instance
 settings = Settings()
@@ -1,49 +1,87 @@
+import asyncio
 import logging
-from typing import AsyncGenerator, Generator
+from typing import TYPE_CHECKING, AsyncGenerator, Generator, Optional
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 from sqlmodel import Session, SQLModel, create_engine, select
 
 from app.core.config import settings
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
 logger = logging.getLogger(__name__)
 
-# Create synchronous engine for migrations and setup
-sync_engine = create_engine(
-    settings.database_url,
-    echo=settings.is_development,  # Log SQL queries in development
-    pool_pre_ping=True,  # Verify connections before use
-    pool_recycle=300,  # Recycle connections every 5 minutes
-)
-
-# Create async engine for application use
-async_database_url = settings.database_url.replace("postgresql+psycopg://", "postgresql+asyncpg://")
-async_engine = create_async_engine(
-    async_database_url,
-    echo=settings.is_development,
-    pool_pre_ping=True,
-    pool_recycle=300,
-)
-
-# Create session factories
-SessionLocal = sessionmaker(
-    bind=sync_engine,
-    class_=Session,
-    expire_on_commit=False,
-)
-
-AsyncSessionLocal = sessionmaker(
-    bind=async_engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-)
+# Engines are created on first use: creating them imports the database
+# drivers and the asyncio extension, which startup does not need
+_sync_engine: Optional[Engine] = None
+_async_engine: Optional["AsyncEngine"] = None
+_session_factory: Optional[sessionmaker] = None
+_async_session_factory: Optional[sessionmaker] = None
+
+
+def get_sync_engine() -> Engine:
+    """Get or create the synchronous engine used for setup and the prompt base."""
+    global _sync_engine
+    if _sync_engine is None:
+        _sync_engine = create_engine(
+            settings.database_url,
+            echo=settings.is_development,  # Log SQL queries in development
+            pool_pre_ping=True,  # Verify connections before use
+            pool_recycle=300,  # Recycle connections every 5 minutes
+        )
+    return _sync_engine
+
+
+def get_async_engine() -> "AsyncEngine":
+    """Get or create the async engine for application use."""
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        async_database_url = settings.database_url.replace(
+            "postgresql+psycopg://", "postgresql+asyncpg://"
+        )
+        _async_engine = create_async_engine(
+            async_database_url,
+            echo=settings.is_development,
+            pool_pre_ping=True,
+            pool_recycle=300,
+        )
+    return _async_engine
+
+
+def SessionLocal() -> Session:
+    """Open a sync session, creating the engine on first use."""
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = sessionmaker(
+            bind=get_sync_engine(),
+            class_=Session,
+            expire_on_commit=False,
+        )
+    return _session_factory()
+
+
+def AsyncSessionLocal() -> "AsyncSession":
+    """Open an async session, creating the engine on first use."""
+    global _async_session_factory
+    if _async_session_factory is None:
+        from sqlalchemy.ext.asyncio import AsyncSession
+
+        _async_session_factory = sessionmaker(
+            bind=get_async_engine(),
+            class_=AsyncSession,
+            expire_on_commit=False,
+        )
+    return _async_session_factory()
 
 
 def create_tables():
     """Create all database tables."""
     try:
-        SQLModel.metadata.create_all(sync_engine)
+        SQLModel.metadata.create_all(get_sync_engine())
         logger.info("Database tables created successfully")
     except Exception as e:
         logger.error(f"Failed to create database tables: {e}")
@@ -63,7 +101,7 @@ def get_session() -> Generator[Session, None, None]:
             session.close()
 
 
-async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+async def get_async_session() -> AsyncGenerator["AsyncSession", None]:
     """Dependency to get async database session."""
     async with AsyncSessionLocal() as session:
         try:
@@ -82,8 +120,8 @@ async def init_db():
         # Import models to register them
         from app.models.prompts import AnalysisResult, Prompt, PromptRelation
 
-        # Create tables
-        create_tables()
+        # Create tables; the sync engine's blocking I/O runs off the event loop
+        await asyncio.to_thread(create_tables)
 
         # Add any initial data here if needed
         logger.info("Database initialized successfully")
@@ -113,7 +151,7 @@ class DatabaseManager:
     async def get_session_count() -> int:
         """Get current number of database sessions."""
         try:
-            return async_engine.pool.size()
+            return get_async_engine().pool.size()
         except:
             return 0
 
@@ -133,7 +171,7 @@ class DatabaseManager:
             health_data["connected"] = await check_db_connection()
 
             # Pool statistics
-            pool = async_engine.pool
+            pool = get_async_engine().pool
             health_data["pool_size"] = pool.size()
             health_data["pool_checked_in"] = pool.checkedin()
             health_data["pool_checked_out"] = pool.checkedout()
@@ -0,0 +1,156 @@
+"""Structured JSON logging written off the event loop by a background thread."""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from datetime import datetime
+from typing import Optional
+
+import orjson
+
+from app.core import metrics
+
+# Attributes every LogRecord carries; anything else was passed through `extra`
+RESERVED_ATTRS = frozenset(
+    vars(logging.LogRecord("", logging.INFO, "", 0, "", None, None))
+) | {"message", "asctime", "taskName"}
+
+
+class JSONFormatter(logging.Formatter):
+    """Render a record and its `extra` fields as one JSON line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        log_entry = {
+            "timestamp": datetime.utcfromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+        }
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            log_entry["exception"] = record.exc_text
+
+        for key, value in record.__dict__.items():
+            if key not in RESERVED_ATTRS:
+                log_entry[key] = value
+
+        return orjson.dumps(log_entry, default=str).decode("utf-8")
+
+
+class DebugSampler(logging.Filter):
+    """Pass only a sample of DEBUG records; other levels always pass."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or random.random() < self.rate:
+            return True
+        metrics.increment("logging.sampled_out")
+        return False
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue records for the writer thread without ever blocking the caller.
+
+    Only the message interpolation and exception text are rendered here,
+    since arguments and tracebacks may change once the caller moves on;
+    serialization and I/O happen on the writer thread. When the queue
+    holds ``max_size`` records the record is dropped and counted instead.
+    The bound is checked without locking, so it is approximate under
+    concurrent logging from several threads.
+    """
+
+    def __init__(self, log_queue: queue.SimpleQueue, max_size: int):
+        super().__init__(log_queue)
+        self.max_size = max_size
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.queue.qsize() >= self.max_size:
+            self.dropped += 1
+            metrics.increment("logging.dropped")
+            return
+        self.queue.put_nowait(record)
+
+
+class DropReportingListener(logging.handlers.QueueListener):
+    """Queue listener that logs a warning whenever records were dropped."""
+
+    def __init__(self, queue_handler: DroppingQueueHandler, *handlers: logging.Handler):
+        super().__init__(queue_handler.queue, *handlers, respect_handler_level=True)
+        self.queue_handler = queue_handler
+        self._reported = 0
+
+    def handle(self, record: logging.LogRecord) -> None:
+        dropped = self.queue_handler.dropped
+        if dropped > self._reported:
+            super().handle(logging.makeLogRecord({
+                "name": __name__,
+                "levelno": logging.WARNING,
+                "levelname": "WARNING",
+                "msg": f"Log queue full, dropped {dropped - self._reported} records",
+                "dropped_total": dropped,
+            }))
+            self._reported = dropped
+        super().handle(record)
+
+
+_listener: Optional[DropReportingListener] = None
+
+
+def configure_logging(level: str, queue_size: int, debug_sample_rate: float) -> None:
+    """
+    Route all logging through a bounded queue to a JSON writer thread.
+
+    The root logger gets a single non-blocking queue handler, so a log call
+    on the event loop costs an enqueue; formatting and writing to stderr
+    happen on the listener thread.
+    """
+    global _listener
+    shutdown_logging()
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(JSONFormatter())
+
+    queue_handler = DroppingQueueHandler(queue.SimpleQueue(), queue_size)
+    if debug_sample_rate < 1.0:
+        queue_handler.addFilter(DebugSampler(debug_sample_rate))
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(getattr(logging, level))
+
+    _listener = DropReportingListener(queue_handler, stream_handler)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """
+    Stop the writer thread after it has written everything queued.
+
+    Later records are written directly, so shutdown messages are not lost.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        logging.getLogger().handlers = list(_listener.handlers)
+        _listener = None
@@ -0,0 +1,58 @@
+"""In-process counters, gauges and running summaries for operational metrics."""
+
+import threading
+from typing import Any
+
+_lock = threading.Lock()
+_counters: dict[str, float] = {}
+_gauges: dict[str, float] = {}
+_summaries: dict[str, list[float]] = {}  # name -> [count, total, min, max]
+
+
+def increment(name: str, value: float = 1.0) -> None:
+    """Add to a monotonically increasing counter."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0.0) + value
+
+
+def set_gauge(name: str, value: float) -> None:
+    """Record the current value of a gauge."""
+    with _lock:
+        _gauges[name] = value
+
+
+def observe(name: str, value: float) -> None:
+    """Add an observation to a running count/mean/min/max summary."""
+    with _lock:
+        summary = _summaries.get(name)
+        if summary is None:
+            _summaries[name] = [1, value, value, value]
+        else:
+            summary[0] += 1
+            summary[1] += value
+            summary[2] = min(summary[2], value)
+            summary[3] = max(summary[3], value)
+
+
+def get_counter(name: str) -> float:
+    """Current value of a counter (0 if never incremented)."""
+    with _lock:
+        return _counters.get(name, 0.0)
+
+
+def snapshot() -> dict[str, Any]:
+    """Point-in-time copy of every metric."""
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "gauges": dict(_gauges),
+            "summaries": {
+                name: {
+                    "count": int(count),
+                    "mean": total / count if count else 0.0,
+                    "min": low,
+                    "max": high,
+                }
+                for name, (count, total, low, high) in _summaries.items()
+            },
+        }
@@ -0,0 +1,120 @@
+"""Startup timing: what importing the app costs and which heavy modules are deferred.
+
+Run ``python -m app.core.startup`` from the backend directory for an
+import-time breakdown; with ``--budget-ms`` it fails when importing the app
+takes longer or loads a module that should be deferred until first use.
+"""
+
+import argparse
+import logging
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Set when app.main starts importing, which imports this module first
+IMPORT_STARTED = time.perf_counter()
+
+# Loaded on first use (first LLM call, database session or graph build)
+DEFERRED_MODULES = ("openai", "langgraph", "sqlalchemy.ext.asyncio", "asyncpg", "psycopg")
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+logger = logging.getLogger(__name__)
+
+
+def import_breakdown(module: str = "app.main", limit: int = 15) -> list[tuple[str, float]]:
+    """
+    Import a module in a fresh interpreter and sum import time per top-level package.
+
+    Uses ``-X importtime`` self times, so each module is counted once under
+    the package it belongs to. Returns (package, milliseconds), slowest first.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    totals: dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # Column header
+        package = name.strip().split(".")[0]
+        totals[package] = totals.get(package, 0.0) + int(self_us) / 1000
+
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+def measure_import(module: str = "app.main", runs: int = 5) -> tuple[float, list[str]]:
+    """Median wall time in ms to import a module in a fresh interpreter, and deferred modules it loaded."""
+    code = (
+        "import sys, time\n"
+        "started = time.perf_counter()\n"
+        f"import {module}\n"
+        "print((time.perf_counter() - started) * 1000)\n"
+        f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))\n"
+    )
+    timings = []
+    loaded: list[str] = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        )
+        elapsed, modules = result.stdout.splitlines()[-2:]
+        timings.append(float(elapsed))
+        loaded = [m for m in modules.split(",") if m]
+    return statistics.median(timings), loaded
+
+
+def report_startup() -> None:
+    """Log how long importing and starting the app took."""
+    elapsed_ms = (time.perf_counter() - IMPORT_STARTED) * 1000
+    loaded = [m for m in DEFERRED_MODULES if m in sys.modules]
+    logger.info(
+        f"Startup completed in {elapsed_ms:.0f} ms since import",
+        extra={"startup_ms": round(elapsed_ms), "deferred_modules_loaded": loaded},
+    )
+
+
+def log_import_breakdown() -> None:
+    """Log the per-package import-time breakdown of the app."""
+    breakdown = import_breakdown()
+    logger.info(
+        "Import time by package: "
+        + ", ".join(f"{package} {ms:.0f} ms" for package, ms in breakdown),
+        extra={"import_breakdown_ms": {package: round(ms, 1) for package, ms in breakdown}},
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, help="Fail if the median import is slower")
+    args = parser.parse_args()
+
+    for package, ms in import_breakdown(args.module):
+        print(f"{package:<24} {ms:8.1f} ms")
+
+    median_ms, loaded = measure_import(args.module, args.runs)
+    print(f"\nimport {args.module}: {median_ms:.0f} ms median of {args.runs} runs")
+
+    failed = False
+    if loaded:
+        print(f"FAIL: loaded modules that should be deferred: {', '.join(loaded)}")
+        failed = True
+    if args.budget_ms is not None and median_ms > args.budget_ms:
+        print(f"FAIL: over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
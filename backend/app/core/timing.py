@@ -0,0 +1,154 @@
+"""Per-request timing of pipeline stages, LLM calls and cache lookups.
+
+A collector is bound to the request's context only when timings were asked
+for; every recording function first checks for it, so collection costs a
+context variable lookup per node or call when it is off. Tasks and
+``asyncio.to_thread`` calls started from the request inherit the collector.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Awaitable, Callable, Iterator, Optional, TypeVar
+
+from app.schemas.prompts import AnalysisTimings, CacheStats, LLMCallTiming, StageTiming
+
+T = TypeVar("T")
+
+_collector: ContextVar[Optional["TimingCollector"]] = ContextVar("timing_collector", default=None)
+
+
+class TimingCollector:
+    """Timings gathered while serving one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: list[StageTiming] = []
+        self.llm_calls: list[LLMCallTiming] = []
+        self.cache: dict[str, CacheStats] = {}
+
+    def to_timings(self) -> AnalysisTimings:
+        return AnalysisTimings(
+            total_ms=_elapsed_ms(self.started),
+            stages=self.stages,
+            llm_calls=self.llm_calls,
+            cache=self.cache,
+        )
+
+    def server_timing(self) -> str:
+        """
+        Render the timings as a Server-Timing header value.
+
+        Each stage is its own metric; LLM calls are summed per operation,
+        and cache lookups are reported as hit/miss descriptions.
+        """
+        metrics = [f"{stage.name};dur={stage.duration_ms:.1f}" for stage in self.stages]
+
+        operations: dict[str, list[float]] = {}
+        for call in self.llm_calls:
+            operations.setdefault(call.operation, []).append(call.duration_ms)
+        for operation, durations in operations.items():
+            metrics.append(
+                f'llm-{operation};dur={sum(durations):.1f};desc="{len(durations)} calls"'
+            )
+
+        for name, stats in self.cache.items():
+            metrics.append(f'cache-{name};desc="{stats.hits} hit, {stats.misses} miss"')
+
+        metrics.append(f"total;dur={_elapsed_ms(self.started):.1f}")
+        return ", ".join(metrics)
+
+
+def start_collecting() -> TimingCollector:
+    """Bind a new collector to the current context and return it."""
+    collector = TimingCollector()
+    _collector.set(collector)
+    return collector
+
+
+def current_collector() -> Optional[TimingCollector]:
+    return _collector.get()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block as a named stage."""
+    collector = _collector.get()
+    if collector is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        collector.stages.append(StageTiming(name=name, duration_ms=_elapsed_ms(started)))
+
+
+def record_stage(name: str, started: float) -> None:
+    """Record a stage that began at ``started`` (a perf_counter value)."""
+    collector = _collector.get()
+    if collector is not None:
+        collector.stages.append(StageTiming(name=name, duration_ms=_elapsed_ms(started)))
+
+
+def timed_node(name: str, node: Callable[[T], Awaitable[T]]) -> Callable[[T], Awaitable[T]]:
+    """Wrap a pipeline node so its wall time is recorded under ``name``."""
+
+    @wraps(node)
+    async def run(state: T) -> T:
+        collector = _collector.get()
+        if collector is None:
+            return await node(state)
+
+        started = time.perf_counter()
+        try:
+            return await node(state)
+        finally:
+            collector.stages.append(StageTiming(name=name, duration_ms=_elapsed_ms(started)))
+
+    return run
+
+
+def record_llm_call(
+    operation: str,
+    model: str,
+    started: float,
+    usage: Any = None,
+    tier: Optional[str] = None,
+    failed: bool = False,
+) -> None:
+    """Record an OpenAI call and its token usage, as returned in ``response.usage``."""
+    collector = _collector.get()
+    if collector is None:
+        return
+
+    details = getattr(usage, "prompt_tokens_details", None)
+    collector.llm_calls.append(LLMCallTiming(
+        operation=operation,
+        model=model,
+        tier=tier,
+        duration_ms=_elapsed_ms(started),
+        prompt_tokens=getattr(usage, "prompt_tokens", None),
+        completion_tokens=getattr(usage, "completion_tokens", None),
+        cached_tokens=getattr(details, "cached_tokens", None),
+        failed=failed,
+    ))
+
+
+def record_cache(name: str, hit: bool, count: int = 1) -> None:
+    """Count ``count`` cache lookups as hits or misses."""
+    collector = _collector.get()
+    if collector is None:
+        return
+
+    stats = collector.cache.setdefault(name, CacheStats())
+    if hit:
+        stats.hits += count
+    else:
+        stats.misses += count
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 2)
@@ -1,63 +1,26 @@
-import json
+from app.core.startup import log_import_breakdown, report_startup  # noqa: I001 - first, to time the imports below
+
+import asyncio
 import logging
-from datetime import datetime
+import time
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.routers import analysis, prompt_base
+from app.core import metrics
 from app.core.config import settings
-from app.core.database import db_manager, init_db
-from app.schemas.prompts import HealthResponse
-from app.services.llm import get_llm_service
-
-
-# Configure structured JSON logging
-class JSONFormatter(logging.Formatter):
-    def format(self, record):
-        log_entry = {
-            "timestamp": datetime.utcnow().isoformat(),
-            "level": record.levelname,
-            "message": record.getMessage(),
-            "module": record.module,
-            "function": record.funcName,
-            "line": record.lineno,
-        }
-
-        # Add extra fields if present
-        if hasattr(record, "__dict__"):
-            for key, value in record.__dict__.items():
-                if key not in [
-                    "name",
-                    "msg",
-                    "args",
-                    "levelname",
-                    "levelno",
-                    "pathname",
-                    "filename",
-                    "module",
-                    "lineno",
-                    "funcName",
-                    "created",
-                    "msecs",
-                    "relativeCreated",
-                    "thread",
-                    "threadName",
-                    "processName",
-                    "process",
-                    "getMessage",
-                ]:
-                    log_entry[key] = value
-
-        return json.dumps(log_entry)
-
-
-# Setup logging
-logger = logging.getLogger()
-handler = logging.StreamHandler()
-handler.setFormatter(JSONFormatter())
-logger.handlers = [handler]
-logger.setLevel(getattr(logging, settings.log_level))
+from app.core.database import init_db
+from app.core.logging import configure_logging, shutdown_logging
+from app.pipeline.graph import load_analysis_pipeline
+from app.schemas.prompts import HealthResponse, ReadinessResponse
+from app.services.analysis_history import get_analysis_history
+from app.services.analysis_store import get_analysis_store
+from app.services.health import get_health_monitor
+
+
+# Structured JSON logging, written by a background thread
+configure_logging(settings.log_level, settings.log_queue_size, settings.log_debug_sample_rate)
 
 app_logger = logging.getLogger(__name__)
 
@@ -83,16 +46,32 @@ app.include_router(analysis.router)
 app.include_router(prompt_base.router)
 
 
+# Background startup work, kept referenced until it finishes
+_startup_tasks: set[asyncio.Task] = set()
+
+
 @app.on_event("startup")
 async def startup_event():
     """Application startup event."""
-    # Initialize database
-    try:
-        await init_db()
-        app_logger.info("Database initialized successfully")
-    except Exception as e:
-        app_logger.error(f"Database initialization failed: {e}")
-        # Don't fail startup - allow API to run without DB for demo
+    # Table setup and graph compilation either finish before the server
+    # accepts requests or run alongside the first ones
+    warmups = [_initialize_database()]
+    if settings.startup_preload != "lazy":
+        warmups.append(_compile_analysis_graph())
+
+    if settings.startup_preload == "eager":
+        await asyncio.gather(*warmups)
+    else:
+        for warmup in warmups:
+            task = asyncio.create_task(warmup)
+            _startup_tasks.add(task)
+            task.add_done_callback(_startup_tasks.discard)
+
+    # Persist completed analyses off the request path
+    get_analysis_history().start()
+
+    # Probe dependencies in the background; health endpoints read the cache
+    get_health_monitor().start()
 
     app_logger.info(
         "Curestry API starting up",
@@ -101,48 +80,89 @@ async def startup_event():
             "environment": settings.env,
             "log_level": settings.log_level,
             "openai_configured": bool(settings.openai_api_key),
+            "startup_preload": settings.startup_preload,
         },
     )
 
+    report_startup()
+    if settings.startup_import_profile:
+        # Profiles a fresh import in a subprocess, so it must not delay serving
+        task = asyncio.create_task(asyncio.to_thread(log_import_breakdown))
+        _startup_tasks.add(task)
+        task.add_done_callback(_startup_tasks.discard)
+
+
+async def _initialize_database():
+    """Create missing tables; the API keeps running without a database."""
+    try:
+        await init_db()
+        app_logger.info("Database initialized successfully")
+    except Exception as e:
+        app_logger.error(f"Database initialization failed: {e}")
+        # Don't fail startup - allow API to run without DB for demo
+
+
+async def _compile_analysis_graph():
+    """Build the analysis graph in a worker thread so the event loop keeps serving."""
+    started = time.perf_counter()
+    await load_analysis_pipeline()
+    app_logger.info(f"Analysis graph compiled in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Application shutdown event."""
+    await get_health_monitor().stop()
+    await get_analysis_history().stop()
+    await get_analysis_store().close()
+    shutdown_logging()
+
+
+@app.get("/livez")
+async def liveness_check():
+    """Liveness probe: the process is up and its event loop is serving requests."""
+    return {"status": "alive"}
+
+
+@app.get("/readyz", response_model=ReadinessResponse)
+async def readiness_check(response: Response):
+    """
+    Readiness probe from cached dependency health; never probes itself.
+
+    Returns 503 until every required dependency has a fresh successful probe.
+    """
+    monitor = get_health_monitor()
+    dependencies = monitor.snapshot()
+    ready = monitor.is_ready(settings.health_required_dependencies, dependencies)
+    if not ready:
+        response.status_code = 503
+
+    return ReadinessResponse(ready=ready, dependencies=dependencies)
+
 
 @app.get("/healthz", response_model=HealthResponse)
 async def health_check():
-    """Health check endpoint with OpenAI and database connectivity verification."""
-    openai_configured = bool(settings.openai_api_key)
-
-    # Quick OpenAI connectivity test in development
-    openai_working = openai_configured
-    if settings.is_development and openai_configured:
-        try:
-            # Simple test call to verify OpenAI connectivity
-            llm = get_llm_service()
-            test_response = await llm.ask("cheap", "Test", max_tokens=5)
-            openai_working = bool(test_response)
-        except Exception as e:
-            app_logger.warning(f"OpenAI connectivity test failed: {e}")
-            openai_working = False
-
-    # Check database connectivity
-    db_health = await db_manager.health_check()
-
-    app_logger.info(
-        "Health check performed",
-        extra={
-            "openai_configured": openai_configured,
-            "openai_working": openai_working,
-            "database_connected": db_health["connected"],
-        },
-    )
+    """Health summary with OpenAI, database and Redis status from the background monitor."""
+    monitor = get_health_monitor()
+    dependencies = monitor.snapshot()
+    ready = monitor.is_ready(settings.health_required_dependencies, dependencies)
 
     return HealthResponse(
-        status="healthy",
+        status="healthy" if ready else "degraded",
         message="Curestry API is running",
         version="0.1.0",
         environment=settings.env,
-        openai_configured=openai_working,
+        openai_configured=dependencies["openai"].status == "ok",
+        dependencies=dependencies,
     )
 
 
+@app.get("/metrics")
+async def get_metrics():
+    """In-process operational metrics (cache hit rates, drift, counters)."""
+    return metrics.snapshot()
+
+
 @app.get("/")
 async def root():
     """Root endpoint with basic API information."""
@@ -153,6 +173,8 @@ async def root():
         if settings.is_development
         else "Documentation disabled in production",
         "health": "/healthz",
+        "liveness": "/livez",
+        "readiness": "/readyz",
     }
 
 
@@ -1 +1,4 @@
 """Analysis pipeline package."""
+
+# Bump when node behaviour changes so stored analyses are not reused
+PIPELINE_VERSION = "2"
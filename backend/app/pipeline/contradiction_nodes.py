@@ -2,13 +2,17 @@
 
 import logging
 import re
-from typing import Any, Dict, List, Tuple
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
 
-from app.schemas.pipeline import PipelineState
+from app.core.config import settings
+from app.schemas.pipeline import ContradictionVerdict, PipelineState
 from app.services.llm import get_llm_service
 
 logger = logging.getLogger(__name__)
 
+_SENTENCE_END_RE = re.compile(r'[.!?]+')
+
 
 async def find_contradictions_node(state: PipelineState) -> PipelineState:
     """Detect contradictions within the prompt content."""
@@ -58,7 +62,7 @@ async def _find_intra_prompt_contradictions(content: str) -> List[Dict[str, Any]
 def _split_into_sentences(content: str) -> List[str]:
     """Split content into sentences."""
     # Simple sentence splitting
-    sentences = re.split(r'[.!?]+', content)
+    sentences = _SENTENCE_END_RE.split(content)
 
     # Clean and filter sentences
     cleaned_sentences = []
@@ -70,62 +74,164 @@ def _split_into_sentences(content: str) -> List[str]:
     return cleaned_sentences
 
 
-def _detect_pattern_contradictions(sentences: List[str]) -> List[Dict[str, Any]]:
-    """Detect contradictions using pattern matching."""
-    contradictions = []
-
-    # Define contradiction patterns
-    contradiction_patterns = [
-        # Direct negations
-        {
-            "positive": [r"\\bmust\\b", r"\\brequired\\b", r"\\bmandatory\\b", r"\\bshould\\b"],
-            "negative": [r"\\bmust not\\b", r"\\bshould not\\b", r"\\bforbidden\\b", r"\\bprohibited\\b"],
-            "type": "intra"
-        },
-        {
-            "positive": [r"\\balways\\b", r"\\bever\\b", r"\\binvariably\\b"],
-            "negative": [r"\\bnever\\b", r"\\bnot ever\\b", r"\\bunder no circumstances\\b"],
-            "type": "intra"
-        },
-        {
-            "positive": [r"\\ball\\b", r"\\bevery\\b", r"\\beach\\b"],
-            "negative": [r"\\bnone\\b", r"\\bno\\b(?=\\s+\\w)", r"\\bnot any\\b"],
-            "type": "intra"
-        },
-        {
-            "positive": [r"\\binclude\\b", r"\\badd\\b", r"\\bcontain\\b"],
-            "negative": [r"\\bexclude\\b", r"\\bremove\\b", r"\\bomit\\b"],
-            "type": "intra"
-        }
-    ]
-
-    for i, sentence1 in enumerate(sentences):
-        for j, sentence2 in enumerate(sentences[i+1:], i+1):
-
-            for pattern_group in contradiction_patterns:
-                positive_matches = any(
-                    re.search(pattern, sentence1, re.IGNORECASE)
-                    for pattern in pattern_group["positive"]
-                )
-                negative_matches = any(
-                    re.search(pattern, sentence2, re.IGNORECASE)
-                    for pattern in pattern_group["negative"]
-                )
-
-                # Check both directions
-                if (positive_matches and negative_matches) or \
-                   (any(re.search(p, sentence2, re.IGNORECASE) for p in pattern_group["positive"]) and
-                    any(re.search(n, sentence1, re.IGNORECASE) for n in pattern_group["negative"])):
+# Opposing phrasings; a sentence pair contradicts when one sentence matches a
+# group's positive form and the other its negative form
+CONTRADICTION_PATTERNS = [
+    # Direct negations
+    {
+        "positive": [r"\bmust\b", r"\brequired\b", r"\bmandatory\b", r"\bshould\b"],
+        "negative": [r"\bmust not\b", r"\bshould not\b", r"\bforbidden\b", r"\bprohibited\b"],
+        "type": "intra"
+    },
+    {
+        "positive": [r"\balways\b", r"\bever\b", r"\binvariably\b"],
+        "negative": [r"\bnever\b", r"\bnot ever\b", r"\bunder no circumstances\b"],
+        "type": "intra"
+    },
+    {
+        "positive": [r"\ball\b", r"\bevery\b", r"\beach\b"],
+        "negative": [r"\bnone\b", r"\bno\b(?=\s+\w)", r"\bnot any\b"],
+        "type": "intra"
+    },
+    {
+        "positive": [r"\binclude\b", r"\badd\b", r"\bcontain\b"],
+        "negative": [r"\bexclude\b", r"\bremove\b", r"\bomit\b"],
+        "type": "intra"
+    }
+]
+
+# Every form of every group in one alternation, scanned once per sentence.
+# Negative forms come first, so at a shared position "must not" is taken as
+# the negative form and its "must" is never also read as the positive one.
+# All forms start at a word boundary; testing it once up front lets the scan
+# skip positions inside words without trying every alternative.
+_SIGNAL_RE = re.compile(
+    r"\b(?:" + "|".join(
+        f"(?P<{form[0]}{index}>"
+        + "|".join(pattern.removeprefix(r"\b") for pattern in group[form])
+        + ")"
+        for form in ("negative", "positive")
+        for index, group in enumerate(CONTRADICTION_PATTERNS)
+    ) + ")",
+    re.IGNORECASE,
+)
+
+# Two sentences only conflict when they are about the same thing, so a pair
+# must share a content word. Function words and the pattern vocabulary
+# itself say nothing about the subject or object.
+_TERM_RE = re.compile(r"[^\W\d_]{3,}")
+_IGNORED_TERMS = frozenset({
+    "the", "and", "for", "but", "nor", "yet", "not", "are", "was", "were",
+    "been", "being", "has", "have", "had", "does", "did", "can", "could",
+    "will", "would", "shall", "may", "might", "this", "that", "these",
+    "those", "there", "here", "than", "then", "when", "where", "which",
+    "what", "who", "whom", "whose", "why", "how", "with", "without", "from",
+    "into", "onto", "upon", "about", "over", "under", "out", "off", "only",
+    "also", "just", "very", "too", "you", "your", "yours", "they", "them",
+    "their", "its", "our", "ours", "his", "her", "hers", "she", "him",
+    "any", "some", "such", "other", "more", "most", "less", "least", "both",
+    "either", "neither",
+}) | frozenset(
+    word
+    for group in CONTRADICTION_PATTERNS
+    for form in ("positive", "negative")
+    for pattern in group[form]
+    for word in re.findall(r"[a-z]{3,}", pattern.replace(r"\b", " "))
+)
+
+
+def _detect_pattern_contradictions(
+    sentences: List[str], limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Detect contradictions using pattern matching, keeping the first ``limit``."""
+    return _pair_pattern_contradictions(
+        sentences, [_sentence_signals(sentence) for sentence in sentences], limit
+    )
+
+
+def _sentence_signals(sentence: str) -> Tuple[List[int], List[int]]:
+    """Indices of the pattern groups whose positive and negative forms occur."""
+    positive = set()
+    negative = set()
+
+    for match in _SIGNAL_RE.finditer(sentence):
+        form = match.lastgroup
+        (negative if form[0] == "n" else positive).add(int(form[1:]))
+
+    return sorted(positive), sorted(negative)
+
+
+def _content_terms(sentence: str) -> frozenset[str]:
+    """Lowercased content words of a sentence, with plurals folded."""
+    terms = set()
+    for word in _TERM_RE.findall(sentence.lower()):
+        if word in _IGNORED_TERMS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.add(word)
+    return frozenset(terms)
+
+
+def _pair_pattern_contradictions(
+    sentences: List[str],
+    signals: List[Tuple[List[int], List[int]]],
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Pair up sentences with opposing pattern signals.
+
+    Signals are computed once per sentence, so pairing needs no further
+    regex matching and signals can be cached per sentence. Opposing
+    sentences are only reported when they share a content word, so they
+    are found through an index of signal sentences by group, form and term:
+    the cost follows the number of pairs reported, and with a ``limit``
+    pairing stops once that many have been found.
+    """
+    # (group, is_positive, term) -> ascending sentence indices
+    index_by_term: Dict[Tuple[int, bool, str], List[int]] = {}
+    terms: Dict[int, frozenset[str]] = {}
+    for i, (positive, negative) in enumerate(signals):
+        if not positive and not negative:
+            continue
+        terms[i] = _content_terms(sentences[i])
+        for is_positive, groups in ((True, positive), (False, negative)):
+            for group in groups:
+                for term in terms[i]:
+                    index_by_term.setdefault((group, is_positive, term), []).append(i)
+
+    # Pairs come out ordered by (first sentence, second sentence, group);
+    # either sentence may carry the positive form
+    pairs: List[Tuple[int, int, int]] = []
+    for i in sorted(terms):
+        positive, negative = signals[i]
+        partners = set()
+        for is_positive, groups in ((True, positive), (False, negative)):
+            for group in groups:
+                for term in terms[i]:
+                    later = index_by_term.get((group, not is_positive, term), ())
+                    partners.update(
+                        (j, group) for j in later[bisect_right(later, i):]
+                    )
+        pairs.extend((i, j, group) for j, group in sorted(partners))
+        if limit is not None and len(pairs) >= limit:
+            break
 
-                    contradictions.append({
-                        "type": pattern_group["type"],
-                        "severity": "medium",
-                        "sentence_1": sentence1.strip(),
-                        "sentence_2": sentence2.strip(),
-                        "position_1": i,
-                        "position_2": j,
-                        "description": f"Pattern-based {pattern_group['type'].replace('_', ' ')}"
-                    })
+    contradictions = []
+    for i, j, index in pairs[:limit]:
+        pattern_group = CONTRADICTION_PATTERNS[index]
+        about = ", ".join(sorted(terms[i] & terms[j])[:3])
+        contradictions.append({
+            "type": pattern_group["type"],
+            "severity": "medium",
+            "source": "pattern",
+            "sentence_1": sentences[i].strip(),
+            "sentence_2": sentences[j].strip(),
+            "position_1": i,
+            "position_2": j,
+            "description": f"Pattern-based {pattern_group['type'].replace('_', ' ')} "
+                           f"contradiction about: {about}"
+        })
 
     return contradictions
 
@@ -156,30 +262,26 @@ Are these statements contradictory or conflicting? Respond with:
 - "NO" if they are consistent
 - "MAYBE" if there's potential conflict but not definitive
 
-If YES or MAYBE, provide a brief explanation (max 50 words).
-
-Format: YES/NO/MAYBE: [explanation if needed]"""
+If YES or MAYBE, provide a brief explanation (max 50 words)."""
 
-                response = await llm.ask("cheap", prompt, max_tokens=100)
+                verdict, explanation = await _ask_contradiction_verdict(llm, prompt)
 
-                response = response.strip().upper()
-
-                if response.startswith("YES"):
-                    explanation = response[4:].strip(" :")
+                if verdict == "YES":
                     contradictions.append({
                         "type": "intra",
                         "severity": "high",
+                        "source": "semantic",
                         "sentence_1": sentence1,
                         "sentence_2": sentence2,
                         "position_1": i,
                         "position_2": j,
                         "description": f"Semantic contradiction: {explanation}"
                     })
-                elif response.startswith("MAYBE"):
-                    explanation = response[6:].strip(" :")
+                elif verdict == "MAYBE":
                     contradictions.append({
                         "type": "intra",
                         "severity": "low",
+                        "source": "semantic",
                         "sentence_1": sentence1,
                         "sentence_2": sentence2,
                         "position_1": i,
@@ -193,6 +295,25 @@ Format: YES/NO/MAYBE: [explanation if needed]"""
     return contradictions
 
 
+async def _ask_contradiction_verdict(llm, prompt: str) -> Tuple[str, str]:
+    """Ask for a YES/NO/MAYBE contradiction verdict and its explanation."""
+    if settings.llm_structured_output:
+        result = await llm.ask_structured(
+            "cheap", prompt, ContradictionVerdict, max_tokens=100
+        )
+        return result.verdict, result.explanation.strip()
+
+    prompt += "\n\nFormat: YES/NO/MAYBE: [explanation if needed]"
+    response = await llm.ask("cheap", prompt, max_tokens=100)
+    response = response.strip().upper()
+
+    for verdict in ("YES", "MAYBE"):
+        if response.startswith(verdict):
+            return verdict, response[len(verdict) + 1:].strip(" :")
+
+    return "NO", ""
+
+
 def _calculate_contradiction_score(contradictions: List[Dict[str, Any]]) -> float:
     """Calculate overall contradiction score."""
     if not contradictions:
@@ -0,0 +1,33 @@
+"""Fit the logprob entropy estimator onto the sampling estimator's scale.
+
+Run ``python -m app.pipeline.entropy_calibration`` from the backend directory
+with OPENAI_API_KEY set. Both estimators run over the fixed calibration
+corpus in ``entropy_nodes.CALIBRATION_CORPUS`` and the least-squares fit is
+printed as the two settings that make ``entropy_mode="logprob"`` available.
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+
+from app.core.config import settings
+from app.pipeline.entropy_nodes import calibrate_logprob_entropy
+
+
+def main() -> int:
+    argparse.ArgumentParser(description=__doc__.splitlines()[0]).parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if not settings.openai_api_key:
+        print("OPENAI_API_KEY is not set; calibration calls the OpenAI API")
+        return 2
+
+    scale, offset = asyncio.run(calibrate_logprob_entropy())
+    print(f"ENTROPY_LOGPROB_SCALE={scale:.4f}")
+    print(f"ENTROPY_LOGPROB_OFFSET={offset:.4f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,7 +2,9 @@
 
 import asyncio
 import logging
-from typing import List
+from typing import List, Tuple
+
+import numpy as np
 
 from app.core.config import settings
 from app.schemas.pipeline import PipelineState
@@ -11,23 +13,49 @@ from app.services.llm import get_llm_service
 
 logger = logging.getLogger(__name__)
 
+SAMPLING_PROMPT = """Interpret the following prompt and describe, in 50-150 words, what a response to it should contain and how you would approach it.
+
+Prompt:
+{content}"""
+
 
 async def semantic_entropy_node(state: PipelineState) -> PipelineState:
     """Analyze semantic entropy through sampling and embedding analysis."""
+    if state.reused_from and state.entropy_score is not None:
+        logger.info(f"Reusing semantic entropy from analysis {state.reused_from}")
+        return state
+
     try:
         content = state.get_current_content()
+        embeddings_service = get_embeddings_service()
 
-        # Generate semantic samples
-        samples = await _generate_semantic_samples(content, settings.entropy_n)
-        state.semantic_samples = samples
+        logprob = (state.entropy_mode or settings.entropy_mode) == "logprob"
+        if logprob and not settings.logprob_entropy_available:
+            logger.warning("Logprob entropy is not calibrated, falling back to sampling")
+        elif logprob:
+            # Single-call estimate from token logprobs, no sampling or embeddings
+            sample, entropy_metrics = await _estimate_logprob_entropy(content)
 
-        # Generate embeddings for samples
-        embeddings_service = get_embeddings_service()
+            state.semantic_samples = [sample] if sample else []
+            state.entropy_score = entropy_metrics["entropy"]
+            state.entropy_spread = entropy_metrics["spread"]
+            state.entropy_clusters = entropy_metrics["clusters"]
+
+            logger.info(f"Estimated logprob entropy: {entropy_metrics['entropy']:.3f} "
+                       f"(mean token entropy {entropy_metrics['token_entropy']:.3f} nats)")
+
+            return state
+
+        if settings.entropy_adaptive:
+            samples, embeddings = await _sample_adaptively(content)
+        else:
+            # Generate semantic samples
+            samples = await _generate_semantic_samples(content, settings.entropy_n) or [content]
 
-        # Run sync embedding generation in executor
-        import asyncio
-        loop = asyncio.get_event_loop()
-        embeddings = await loop.run_in_executor(None, embeddings_service.embed_texts, samples)
+            # Run sync embedding generation in executor
+            embeddings = await asyncio.to_thread(embeddings_service.embed_texts, samples)
+
+        state.semantic_samples = samples
         state.semantic_embeddings = embeddings
 
         # Calculate entropy metrics
@@ -39,7 +67,8 @@ async def semantic_entropy_node(state: PipelineState) -> PipelineState:
 
         logger.info(f"Calculated semantic entropy: {entropy_metrics['entropy']:.3f}, "
                    f"spread: {entropy_metrics['spread']:.3f}, "
-                   f"clusters: {entropy_metrics['clusters']}")
+                   f"clusters: {entropy_metrics['clusters']}, "
+                   f"samples: {len(samples)}")
 
         return state
 
@@ -53,118 +82,200 @@ async def semantic_entropy_node(state: PipelineState) -> PipelineState:
         return state
 
 
-async def _generate_semantic_samples(content: str, n_samples: int) -> List[str]:
-    """Generate n different interpretations/responses to the prompt."""
-    try:
-        llm = get_llm_service()
+class _SimilarityStats:
+    """Running statistics of pairwise cosine similarities between samples."""
+
+    def __init__(self):
+        self.vectors: List[np.ndarray] = []
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, embedding: List[float]) -> None:
+        """Add one sample, updating stats with its similarity to every earlier sample."""
+        vector = np.asarray(embedding, dtype=float)
+        norm = np.linalg.norm(vector)
+        vector = vector / norm if norm else vector
+
+        if self.vectors:
+            # Welford update over the new row of the similarity matrix
+            for similarity in np.stack(self.vectors) @ vector:
+                self.count += 1
+                delta = similarity - self.mean
+                self.mean += delta / self.count
+                self.m2 += delta * (similarity - self.mean)
+
+        self.vectors.append(vector)
+
+    @property
+    def entropy(self) -> float:
+        """Standard deviation of pairwise similarities, as in calculate_semantic_entropy."""
+        return float(np.sqrt(self.m2 / self.count)) if self.count else 0.0
+
+    @property
+    def ci_width(self) -> float:
+        """Approximate 95% confidence interval width of the entropy estimate."""
+        n = len(self.vectors)
+        if n < 3:
+            return float("inf")
+        # Standard error of a standard deviation, counting samples rather than
+        # the (correlated) pairs they produce
+        return 2 * 1.96 * self.entropy / np.sqrt(2 * (n - 1))
+
+
+async def _sample_adaptively(content: str) -> Tuple[List[str], List[List[float]]]:
+    """Draw samples in waves until the entropy estimate is tight enough."""
+    embeddings_service = get_embeddings_service()
+
+    max_n = max(2, settings.entropy_max_n)
+    min_n = min(max(2, settings.entropy_min_n), max_n)
+    wave_size = max(1, settings.entropy_wave_size)
+
+    samples: List[str] = []
+    embeddings: List[List[float]] = []
+    stats = _SimilarityStats()
+
+    while len(samples) < max_n:
+        try:
+            wave = await _generate_semantic_samples(
+                content, min(wave_size, max_n - len(samples))
+            )
+        except Exception as e:
+            logger.warning(f"Entropy sample wave failed: {e}")
+            break
+        if not wave:
+            break
+
+        wave_embeddings = await asyncio.to_thread(embeddings_service.embed_texts, wave)
+        for embedding in wave_embeddings:
+            stats.add(embedding)
+
+        samples.extend(wave)
+        embeddings.extend(wave_embeddings)
+
+        if len(samples) >= min_n and stats.ci_width <= settings.entropy_ci_width:
+            break
+
+    logger.debug(
+        f"Adaptive entropy sampling stopped after {len(samples)} samples "
+        f"(entropy {stats.entropy:.3f}, CI width {stats.ci_width:.3f})"
+    )
 
-        # Create sampling prompt
-        sampling_prompt = f"""Given this prompt/instruction, generate {n_samples} different but valid interpretations or responses. Each should capture the essence but vary in approach, focus, or specific details.
+    if not samples:
+        return [content], []
 
-Original prompt:
-{content}
+    return samples, embeddings
 
-Generate {n_samples} variations that are semantically related but show different possible interpretations. Each variation should be 50-200 words.
 
-Format as numbered list:
-1. [First variation]
-2. [Second variation]
-...
-"""
+async def _generate_semantic_samples(content: str, n_samples: int) -> List[str]:
+    """Draw n independent interpretations of the prompt in one round-trip."""
+    llm = get_llm_service()
 
-        # Generate samples
-        response = await llm.ask("cheap", sampling_prompt, max_tokens=n_samples * 100 + 200)
+    responses = await llm.sample_for_entropy(
+        SAMPLING_PROMPT.format(content=content),
+        n=n_samples,
+        temperature=settings.entropy_temperature,
+        max_tokens=250,
+    )
+
+    return [response.strip() for response in responses if response.strip()]
+
+
+# Fixed prompts, from unambiguous to open-ended, used to calibrate the
+# logprob estimator against calculate_semantic_entropy
+CALIBRATION_CORPUS = (
+    "Convert 100 degrees Fahrenheit to Celsius and show the formula.",
+    "List the planets of the solar system in order from the sun.",
+    "Translate 'good morning' into French, Spanish and German.",
+    "Summarize the attached meeting notes in five bullet points for the engineering team.",
+    "Write a short product description for a stainless steel water bottle.",
+    "Explain how our system works to a new user.",
+    "Make it better.",
+    "Write something interesting about the future.",
+)
+
+
+async def _estimate_logprob_entropy(content: str) -> Tuple[str, dict]:
+    """Estimate prompt ambiguity from one interpretation's token distributions."""
+    sample, token_entropies = await _sample_token_entropies(content)
+    raw = float(np.mean(token_entropies)) if token_entropies else 0.0
+    raw_spread = float(np.ptp(token_entropies)) if token_entropies else 0.0
+
+    return sample, {
+        "entropy": _calibrate_logprob_entropy(raw),
+        "spread": max(0.0, settings.entropy_logprob_scale * raw_spread),
+        "clusters": 1,
+        "token_entropy": raw,
+    }
+
+
+async def _sample_token_entropies(content: str) -> Tuple[str, List[float]]:
+    """Draw one interpretation and the entropy of each of its token positions."""
+    llm = get_llm_service()
 
-        # Parse the response into individual samples
-        samples = _parse_numbered_list(response)
+    sample, distributions = await llm.sample_logprobs(
+        SAMPLING_PROMPT.format(content=content),
+        top_k=settings.entropy_logprob_top_k,
+        max_tokens=settings.entropy_logprob_max_tokens,
+        temperature=0,
+    )
 
-        # If parsing failed, generate samples one by one
-        if len(samples) < n_samples // 2:
-            samples = await _generate_samples_individually(content, n_samples)
+    return sample.strip(), [_token_entropy(logprobs) for logprobs in distributions]
 
-        # Ensure we have enough samples
-        while len(samples) < n_samples:
-            samples.append(content)  # Use original as fallback
 
-        return samples[:n_samples]
+def _token_entropy(logprobs: List[float]) -> float:
+    """Entropy in nats of one position's top-k distribution plus its tail mass."""
+    if not logprobs:
+        return 0.0
 
-    except Exception as e:
-        logger.error(f"Sample generation failed: {e}")
-        # Fallback: return original content multiple times
-        return [content] * n_samples
-
-
-async def _generate_samples_individually(content: str, n_samples: int) -> List[str]:
-    """Generate samples one by one if batch generation fails."""
-    samples = []
-
-    prompts = [
-        f"Rephrase this instruction with different wording but same meaning:\\n{content}",
-        f"Interpret this prompt from a different angle:\\n{content}",
-        f"Provide an alternative formulation of this request:\\n{content}",
-        f"Express this same concept using different terminology:\\n{content}",
-        f"Rewrite this prompt with more specific details:\\n{content}",
-        f"Generalize this instruction to be broader:\\n{content}",
-        f"Simplify this prompt while keeping the core intent:\\n{content}",
-        f"Make this instruction more formal:\\n{content}",
-    ]
+    probs = np.exp(np.asarray(logprobs, dtype=float))
+    tail = max(0.0, 1.0 - float(probs.sum()))
+    if tail > 0:
+        probs = np.append(probs, tail)
+    probs = probs[probs > 0]
+    probs = probs / probs.sum()
 
-    llm = get_llm_service()
+    return float(-(probs * np.log(probs)).sum())
 
-    # Generate samples concurrently
-    tasks = []
-    for i in range(min(n_samples, len(prompts))):
-        task = llm.ask("cheap", prompts[i], max_tokens=200)
-        tasks.append(task)
 
-    try:
-        responses = await asyncio.gather(*tasks, return_exceptions=True)
-
-        for response in responses:
-            if isinstance(response, str):
-                samples.append(response.strip())
-            else:
-                logger.warning(f"Sample generation failed: {response}")
-
-    except Exception as e:
-        logger.error(f"Individual sample generation failed: {e}")
+def _calibrate_logprob_entropy(raw: float) -> float:
+    """Map mean token entropy onto the sampling estimator's scale."""
+    return max(0.0, settings.entropy_logprob_scale * raw + settings.entropy_logprob_offset)
 
-    # Fill remaining with variations of the original
-    while len(samples) < n_samples:
-        samples.append(content)
 
-    return samples
+def fit_logprob_calibration(raw: List[float], reference: List[float]) -> Tuple[float, float]:
+    """Least-squares (scale, offset) mapping raw token entropy onto reference entropy."""
+    if len(raw) != len(reference) or len(set(raw)) < 2:
+        raise ValueError("Calibration needs paired values with at least two distinct raw entropies")
 
+    scale, offset = np.polyfit(raw, reference, 1)
+    return float(scale), float(offset)
 
-def _parse_numbered_list(text: str) -> List[str]:
-    """Parse a numbered list from LLM response."""
-    import re
 
-    samples = []
+async def calibrate_logprob_entropy(prompts: Tuple[str, ...] = CALIBRATION_CORPUS) -> Tuple[float, float]:
+    """
+    Run both estimators over a fixed corpus and fit the logprob calibration.
 
-    # Try to match numbered items
-    pattern = r'^\\s*\\d+\\.\\s*(.+?)(?=^\\s*\\d+\\.|$)'
-    matches = re.findall(pattern, text, re.MULTILINE | re.DOTALL)
+    The returned values are meant for ENTROPY_LOGPROB_SCALE and
+    ENTROPY_LOGPROB_OFFSET.
+    """
+    embeddings_service = get_embeddings_service()
 
-    for match in matches:
-        sample = match.strip()
-        if len(sample) > 20:  # Filter out very short samples
-            samples.append(sample)
+    raw, reference = [], []
+    for prompt in prompts:
+        _, token_entropies = await _sample_token_entropies(prompt)
 
-    # If numbered parsing failed, try other formats
-    if not samples:
-        # Try bullet points
-        pattern = r'^\\s*[-*]\\s*(.+?)(?=^\\s*[-*]|$)'
-        matches = re.findall(pattern, text, re.MULTILINE | re.DOTALL)
+        samples = await _generate_semantic_samples(prompt, settings.entropy_n)
+        embeddings = await asyncio.to_thread(embeddings_service.embed_texts, samples)
+        sampling_metrics = embeddings_service.calculate_semantic_entropy(embeddings)
 
-        for match in matches:
-            sample = match.strip()
-            if len(sample) > 20:
-                samples.append(sample)
+        raw.append(float(np.mean(token_entropies)) if token_entropies else 0.0)
+        reference.append(sampling_metrics["entropy"])
+        logger.info(
+            f"Calibration pair: {raw[-1]:.3f} nats -> {reference[-1]:.3f} ({prompt[:40]!r})"
+        )
 
-    # If still no samples, split by paragraphs
-    if not samples:
-        paragraphs = [p.strip() for p in text.split('\\n\\n') if p.strip()]
-        samples = [p for p in paragraphs if len(p) > 20]
+    scale, offset = fit_logprob_calibration(raw, reference)
+    logger.info(f"Logprob entropy calibration: scale={scale:.4f}, offset={offset:.4f}")
 
-    return samples
+    return scale, offset
@@ -1,11 +1,13 @@
 """Format validation and markup fixing pipeline nodes."""
 
 import logging
-import re
-import xml.etree.ElementTree as ET
-from typing import List, Tuple
 
-from app.schemas.pipeline import PipelineState
+from app.pipeline.markup_parser import (
+    apply_markup_fixes,
+    content_digest,
+    parse_markup,
+)
+from app.schemas.pipeline import MarkupDocument, PipelineState
 
 logger = logging.getLogger(__name__)
 
@@ -13,22 +15,21 @@ logger = logging.getLogger(__name__)
 async def ensure_format_node(state: PipelineState) -> PipelineState:
     """Validate and detect the format of the content."""
     try:
-        content = state.get_current_content()
-
-        # Detect format based on content
-        detected_format = _detect_format(content)
-
-        # Validate format
-        is_valid, errors = _validate_format(content, detected_format)
+        document = get_markup_document(state)
 
         # Update state
-        state.format_type = detected_format
-        state.format_valid = is_valid
+        state.format_type = document.format_type
+        state.format_valid = document.is_valid
 
+        errors = document.errors
         if errors:
-            state.add_error(f"Format validation errors: {'; '.join(errors)}")
+            state.add_error(
+                f"Format validation errors: {'; '.join(e.describe() for e in errors)}"
+            )
 
-        logger.info(f"Detected format: {detected_format}, valid: {is_valid}")
+        logger.info(
+            f"Detected format: {document.format_type}, valid: {document.is_valid}"
+        )
 
         return state
 
@@ -44,15 +45,10 @@ async def lint_markup_node(state: PipelineState) -> PipelineState:
     """Apply safe markup fixes to the content."""
     try:
         content = state.get_current_content()
+        document = get_markup_document(state)
 
-        if state.format_type == "xml":
-            fixed_content, fixes = _fix_xml_markup(content)
-        elif state.format_type == "markdown":
-            fixed_content, fixes = _fix_markdown_markup(content)
-        else:
-            # No fixes for plain text
-            fixed_content = content
-            fixes = []
+        # Plain text documents carry no diagnostics, so nothing is fixed
+        fixed_content, fixes = apply_markup_fixes(content, document)
 
         # Update state if fixes were applied
         if fixes:
@@ -69,127 +65,17 @@ async def lint_markup_node(state: PipelineState) -> PipelineState:
         return state
 
 
-def _detect_format(content: str) -> str:
-    """Detect the format of the content."""
-    content_stripped = content.strip()
+def get_markup_document(state: PipelineState) -> MarkupDocument:
+    """Return the parsed document for the current content, parsing at most once."""
+    content = state.get_current_content()
+    document = state.markup_document
 
-    # Check for XML
-    if content_stripped.startswith('<') and '>' in content_stripped:
-        return "xml"
-
-    # Check for Markdown indicators
-    markdown_indicators = [
-        r'^#{1,6}\s+.+$',  # Headers
-        r'^\*{1,3}.+\*{1,3}$',  # Bold/italic
-        r'^```',  # Code blocks
-        r'^\[.+\]\(.+\)$',  # Links
-        r'^[-*+]\s+',  # Lists
-    ]
+    if (
+        document is None
+        or document.source_length != len(content)
+        or document.source_digest != content_digest(content)
+    ):
+        document = parse_markup(content)
+        state.markup_document = document
 
-    lines = content_stripped.split('\n')
-    markdown_score = 0
-
-    for line in lines[:10]:  # Check first 10 lines
-        for pattern in markdown_indicators:
-            if re.search(pattern, line.strip(), re.MULTILINE):
-                markdown_score += 1
-                break
-
-    if markdown_score >= 2:
-        return "markdown"
-
-    return "text"
-
-
-def _validate_format(content: str, format_type: str) -> Tuple[bool, List[str]]:
-    """Validate content against its format."""
-    errors = []
-
-    if format_type == "xml":
-        try:
-            # Try to parse as XML
-            ET.fromstring(f"<root>{content}</root>")
-        except ET.ParseError as e:
-            errors.append(f"XML parsing error: {str(e)}")
-
-    elif format_type == "markdown":
-        # Basic markdown validation
-        lines = content.split('\n')
-
-        # Check for unclosed code blocks
-        code_block_count = content.count('```')
-        if code_block_count % 2 != 0:
-            errors.append("Unclosed code block found")
-
-        # Check for malformed headers
-        for i, line in enumerate(lines, 1):
-            if line.strip().startswith('#'):
-                if not re.match(r'^#{1,6}\s+.+', line.strip()):
-                    errors.append(f"Malformed header at line {i}: {line.strip()[:50]}")
-
-    return len(errors) == 0, errors
-
-
-def _fix_xml_markup(content: str) -> Tuple[str, List[str]]:
-    """Apply safe XML fixes."""
-    fixes = []
-    fixed_content = content
-
-    # Fix common XML issues
-    replacements = [
-        # Fix unclosed tags (basic cases)
-        (r'<([a-zA-Z][a-zA-Z0-9]*)\s*>([^<>]*?)(?!</\1>)', r'<\1>\2</\1>'),
-        # Fix malformed attributes
-        (r'(\w+)=([^"\s>]+)(?=\s|>)', r'\1="\2"'),
-        # Fix & characters
-        (r'&(?!(?:amp|lt|gt|quot|apos);)', '&amp;'),
-    ]
-
-    for pattern, replacement in replacements:
-        new_content = re.sub(pattern, replacement, fixed_content)
-        if new_content != fixed_content:
-            fixes.append(f"Applied XML fix: {pattern[:30]}...")
-            fixed_content = new_content
-
-    return fixed_content, fixes
-
-
-def _fix_markdown_markup(content: str) -> Tuple[str, List[str]]:
-    """Apply safe Markdown fixes."""
-    fixes = []
-    lines = content.split('\n')
-    fixed_lines = []
-
-    in_code_block = False
-
-    for line in lines:
-        original_line = line
-
-        # Track code blocks
-        if line.strip().startswith('```'):
-            in_code_block = not in_code_block
-
-        # Skip fixes inside code blocks
-        if not in_code_block:
-            # Fix headers
-            if line.strip().startswith('#'):
-                # Ensure space after #
-                line = re.sub(r'^(#{1,6})([^\s])', r'\1 \2', line)
-                if line != original_line:
-                    fixes.append("Fixed header spacing")
-
-            # Fix list items
-            if re.match(r'^[-*+]([^\s])', line.strip()):
-                line = re.sub(r'^([-*+])([^\s])', r'\1 \2', line)
-                if line != original_line:
-                    fixes.append("Fixed list item spacing")
-
-        fixed_lines.append(line)
-
-    # Fix unclosed code blocks
-    code_block_count = content.count('```')
-    if code_block_count % 2 != 0:
-        fixed_lines.append('```')
-        fixes.append("Closed unclosed code block")
-
-    return '\n'.join(fixed_lines), fixes
+    return document
@@ -1,11 +1,11 @@
 """LangGraph analysis pipeline assembly."""
 
+import asyncio
 import logging
 from datetime import datetime
-from typing import Any, Dict
-
-from langgraph.graph import END, StateGraph
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
+from app.core.timing import timed_node
 from app.pipeline.contradiction_nodes import find_contradictions_node
 from app.pipeline.entropy_nodes import semantic_entropy_node
 from app.pipeline.format_nodes import ensure_format_node, lint_markup_node
@@ -18,28 +18,38 @@ from app.pipeline.patch_nodes import propose_patches_node
 from app.pipeline.question_nodes import build_questions_node
 from app.pipeline.vocab_nodes import vocab_unify_node
 from app.schemas.pipeline import PipelineState
+from app.schemas.prompts import MetricReport
+
+if TYPE_CHECKING:
+    from langgraph.graph import StateGraph
 
 logger = logging.getLogger(__name__)
 
 
-def create_analysis_graph() -> StateGraph:
+def create_analysis_graph() -> "StateGraph":
     """Create the LangGraph analysis pipeline."""
+    # LangGraph is imported with the first graph rather than at startup
+    from langgraph.graph import END, StateGraph
 
     # Create the graph
     workflow = StateGraph(PipelineState)
 
-    # Add nodes
-    workflow.add_node("detect_language", detect_language_node)
-    workflow.add_node("maybe_translate", maybe_translate_to_english_node)
-    workflow.add_node("ensure_format", ensure_format_node)
-    workflow.add_node("lint_markup", lint_markup_node)
-    workflow.add_node("vocab_unify", vocab_unify_node)
-    workflow.add_node("find_contradictions", find_contradictions_node)
-    workflow.add_node("analyze_entropy", semantic_entropy_node)
-    workflow.add_node("judge_score", judge_score_node)
-    workflow.add_node("propose_patches", propose_patches_node)
-    workflow.add_node("build_questions", build_questions_node)
-    workflow.add_node("finalize", finalize_analysis_node)
+    # Add nodes, each timed when the request collects timings
+    nodes = {
+        "detect_language": detect_language_node,
+        "maybe_translate": maybe_translate_to_english_node,
+        "ensure_format": ensure_format_node,
+        "lint_markup": lint_markup_node,
+        "vocab_unify": vocab_unify_node,
+        "find_contradictions": find_contradictions_node,
+        "analyze_entropy": semantic_entropy_node,
+        "judge_score": judge_score_node,
+        "propose_patches": propose_patches_node,
+        "build_questions": build_questions_node,
+        "finalize": finalize_analysis_node,
+    }
+    for name, node in nodes.items():
+        workflow.add_node(name, timed_node(name, node))
 
     # Define the flow
     workflow.set_entry_point("detect_language")
@@ -101,15 +111,29 @@ class AnalysisPipeline:
     def __init__(self):
         self.graph = create_analysis_graph()
 
-    async def analyze(self, prompt_content: str, format_type: str = "text") -> PipelineState:
-        """Run the complete analysis pipeline on a prompt."""
+    async def analyze(
+        self,
+        prompt_content: str,
+        format_type: str = "text",
+        entropy_mode: Optional[str] = None,
+        reuse: Optional[MetricReport] = None,
+    ) -> PipelineState:
+        """
+        Run the complete analysis pipeline on a prompt.
+
+        When ``reuse`` is given, its judge and entropy results are seeded
+        into the state and those nodes are skipped.
+        """
         try:
             # Create initial state
             initial_state = PipelineState(
                 prompt_content=prompt_content,
                 format_type=format_type,
+                entropy_mode=entropy_mode,
                 processing_started=datetime.utcnow()
             )
+            if reuse is not None:
+                _seed_reused_results(initial_state, reuse)
 
             logger.info(f"Starting analysis pipeline for {len(prompt_content)} character prompt")
 
@@ -156,13 +180,64 @@ class AnalysisPipeline:
         return await self.analyze(prompt_content, format_type)
 
 
-# Global pipeline instance
-_analysis_pipeline: AnalysisPipeline = None
+def _seed_reused_results(state: PipelineState, source: MetricReport) -> None:
+    """Copy judge and entropy results from an earlier report into the state."""
+    state.reused_from = source.prompt_id
+
+    state.entropy_score = source.semantic_entropy.entropy
+    state.entropy_spread = source.semantic_entropy.spread
+    state.entropy_clusters = source.semantic_entropy.clusters
+    state.semantic_samples = list(source.semantic_entropy.samples)
+
+    details = source.judge_score.details or {}
+    state.llm_judge_score = source.judge_score.score
+    state.llm_judge_reasoning = source.judge_score.rationale
+    state.llm_judge_tier = details.get("decided_by_tier")
+    state.llm_judge_escalation = details.get("escalation_reason")
+
+
+# Global pipeline instance, and the compile that request paths await
+_analysis_pipeline: Optional[AnalysisPipeline] = None
+_analysis_pipeline_task: Optional["asyncio.Task[AnalysisPipeline]"] = None
 
 
 def get_analysis_pipeline() -> AnalysisPipeline:
-    """Get or create the global analysis pipeline instance."""
+    """
+    Get or create the global analysis pipeline instance.
+
+    Compiles the graph on the calling thread, so it is for code outside the
+    event loop such as the pre-fork preload; async code awaits
+    ``load_analysis_pipeline`` instead.
+    """
     global _analysis_pipeline
     if _analysis_pipeline is None:
         _analysis_pipeline = AnalysisPipeline()
     return _analysis_pipeline
+
+
+async def load_analysis_pipeline() -> AnalysisPipeline:
+    """
+    Get the global analysis pipeline, compiling it in a worker thread once.
+
+    The first caller, normally the startup warmup, starts the compile as a
+    task; requests arriving meanwhile await that same task, so the event
+    loop keeps serving health checks while the graph is built. A failed
+    compile is retried by the next caller.
+    """
+    global _analysis_pipeline_task
+    if _analysis_pipeline is not None:
+        return _analysis_pipeline
+
+    if _analysis_pipeline_task is None:
+        _analysis_pipeline_task = asyncio.create_task(
+            asyncio.to_thread(get_analysis_pipeline)
+        )
+
+    task = _analysis_pipeline_task
+    try:
+        # Shielded so a cancelled request does not cancel the shared compile
+        return await asyncio.shield(task)
+    except Exception:
+        if _analysis_pipeline_task is task:
+            _analysis_pipeline_task = None
+        raise
@@ -0,0 +1,313 @@
+"""Incremental re-analysis of edited prompts, block by block."""
+
+import asyncio
+import hashlib
+import logging
+import re
+from datetime import datetime
+from typing import Optional
+
+from app.core.config import settings
+from app.core.timing import record_cache, stage
+from app.pipeline.contradiction_nodes import (
+    _detect_semantic_contradictions,
+    _pair_pattern_contradictions,
+    _sentence_signals,
+    _split_into_sentences,
+)
+from app.pipeline.entropy_nodes import semantic_entropy_node
+from app.pipeline.format_nodes import ensure_format_node, lint_markup_node
+from app.pipeline.graph import _seed_reused_results, finalize_analysis_node
+from app.pipeline.judge_nodes import judge_score_node
+from app.pipeline.language_nodes import (
+    detect_language_node,
+    maybe_translate_to_english_node,
+)
+from app.pipeline.patch_nodes import (
+    LLM_PATCH_STAGES,
+    PATCH_STAGE_ORDER,
+    _generate_format_patches,
+    _generate_vocab_patches,
+    propose_patches_node,
+)
+from app.pipeline.question_nodes import build_questions_node
+from app.pipeline.vocab_nodes import _unify_vocabulary
+from app.schemas.pipeline import (
+    BlockAnalysis,
+    BlockIndex,
+    PipelineState,
+    SentenceSignals,
+)
+from app.schemas.prompts import IncrementalUpdate, MetricReport, Patch
+from app.services.patches import anchor_patches
+
+logger = logging.getLogger(__name__)
+
+# Paragraph blocks are separated by one or more blank lines
+BLOCK_SEPARATOR_RE = re.compile(r"\n[ \t]*\n\s*")
+BLOCK_SEPARATOR = "\n\n"
+
+# Counted vocabulary changes, e.g. "Replaced 'x' with 'y' (3 times)"
+COUNTED_CHANGE_RE = re.compile(r"^(.*) \((\d+) times\)$")
+
+
+def split_blocks(content: str) -> list[str]:
+    """Split text into paragraph blocks."""
+    return [block for block in BLOCK_SEPARATOR_RE.split(content.strip()) if block.strip()]
+
+
+def block_hash(block: str) -> str:
+    """Stable digest of a block's text."""
+    return hashlib.blake2b(block.encode("utf-8"), digest_size=12).hexdigest()
+
+
+async def analyze_block(block: str, language: Optional[str]) -> BlockAnalysis:
+    """Run the block-local nodes (translation, vocabulary, sentence signals) on one block."""
+    translated = None
+    if language and language != "en":
+        block_state = PipelineState(prompt_content=block, detected_language=language)
+        block_state = await maybe_translate_to_english_node(block_state)
+        translated = block_state.translated_content
+
+    return _local_block_analysis(block, translated)
+
+
+def build_block_index(state: PipelineState) -> BlockIndex:
+    """
+    Block index of a full analysis, so the first incremental edit can reuse it.
+
+    Block-local results are recomputed from the analyzed text without LLM
+    calls. A translated prompt reuses the full translation when it has the
+    same paragraph structure as the prompt; otherwise its blocks are left
+    out and translated on the first edit.
+    """
+    blocks = split_blocks(state.prompt_content)
+    translations: list[Optional[str]] = [None] * len(blocks)
+    if state.translated and state.translated_content:
+        translated_blocks = split_blocks(state.translated_content)
+        if len(translated_blocks) != len(blocks):
+            return BlockIndex(detected_language=state.detected_language)
+        translations = translated_blocks
+
+    return BlockIndex(
+        detected_language=state.detected_language,
+        blocks={
+            block_hash(block): _local_block_analysis(block, translated)
+            for block, translated in zip(blocks, translations, strict=True)
+        },
+    )
+
+
+def _local_block_analysis(block: str, translated: Optional[str]) -> BlockAnalysis:
+    """Vocabulary and sentence signals of a block, given its translation if any."""
+    content = translated or block
+    unified, changes = _unify_vocabulary(content)
+
+    sentences = []
+    for sentence in _split_into_sentences(content):
+        positive, negative = _sentence_signals(sentence)
+        sentences.append(SentenceSignals(text=sentence, positive=positive, negative=negative))
+
+    return BlockAnalysis(
+        hash=block_hash(block),
+        translated_content=translated,
+        unified_content=unified if changes else None,
+        vocab_changes=changes,
+        sentences=sentences,
+    )
+
+
+async def analyze_incremental(
+    previous: MetricReport,
+    index: Optional[BlockIndex],
+    prompt_content: str,
+    format_type: str = "text",
+    entropy_mode: Optional[str] = None,
+) -> tuple[PipelineState, BlockIndex, IncrementalUpdate]:
+    """
+    Re-analyze an edited prompt, reusing the previous analysis where the text is unchanged.
+
+    The text is split into paragraph blocks. Block-local results are looked
+    up by block hash and recomputed only for new or edited blocks; markup,
+    pattern contradictions and vocabulary patches are then reassembled over
+    the whole text, which needs no LLM calls. Judge, entropy, semantic
+    contradictions, LLM patches and questions are carried over from the
+    previous report unless the changed share of the text reaches
+    ``incremental_recompute_ratio``, in which case those nodes rerun.
+
+    Returns:
+        Tuple of (final state, block index for the next edit, update summary)
+    """
+    blocks = split_blocks(prompt_content)
+    hashes = [block_hash(block) for block in blocks]
+
+    # Size the edit by the text in blocks that were added or removed
+    previous_blocks = {block_hash(block): block for block in split_blocks(previous.original_prompt)}
+    added = sum(len(block) for block, h in zip(blocks, hashes, strict=True) if h not in previous_blocks)
+    current = set(hashes)
+    removed = sum(len(block) for h, block in previous_blocks.items() if h not in current)
+    change_ratio = (added + removed) / max(1, len(prompt_content) + removed)
+    recompute = change_ratio >= settings.incremental_recompute_ratio
+
+    state = PipelineState(
+        prompt_content=prompt_content,
+        format_type=format_type,
+        entropy_mode=entropy_mode,
+        detected_language=previous.detected_language,
+        processing_started=datetime.utcnow(),
+    )
+    if state.detected_language == "unknown" or recompute:
+        with stage("detect_language"):
+            state = await detect_language_node(state)
+
+    # Cached block results are only valid for the language they were made in
+    cached = index.blocks if index and index.detected_language == state.detected_language else {}
+
+    missing = {h: block for block, h in zip(blocks, hashes, strict=True) if h not in cached}
+    limiter = asyncio.Semaphore(max(1, settings.llm_max_concurrency))
+
+    async def analyze_limited(block: str) -> BlockAnalysis:
+        async with limiter:
+            return await analyze_block(block, state.detected_language)
+
+    record_cache("block_index", True, len(blocks) - len(missing))
+    record_cache("block_index", False, len(missing))
+    with stage("analyze_blocks"):
+        analyzed = await asyncio.gather(*(analyze_limited(block) for block in missing.values()))
+    results = {
+        **{h: cached[h] for h in hashes if h in cached},
+        **dict(zip(missing, analyzed, strict=True)),
+    }
+    ordered = [results[h] for h in hashes]
+
+    logger.info(
+        f"Incremental analysis: {len(missing)}/{len(blocks)} blocks analyzed, "
+        f"change ratio {change_ratio:.2f}, global nodes {'rerun' if recompute else 'reused'}"
+    )
+
+    # Reassemble the block-local results over the whole text
+    if any(result.translated_content for result in ordered):
+        state.translated = True
+        state.translated_content = BLOCK_SEPARATOR.join(
+            result.translated_content or block for block, result in zip(blocks, ordered, strict=True)
+        )
+    state.vocab_changes = _merge_vocab_changes(ordered)
+    if state.vocab_changes:
+        state.vocab_unified = True
+        state.working_content = BLOCK_SEPARATOR.join(
+            result.unified_content or result.translated_content or block
+            for block, result in zip(blocks, ordered, strict=True)
+        )
+
+    # Markup structure spans blocks, so it is validated over the whole text
+    with stage("reassemble"):
+        state = await ensure_format_node(state)
+        state = await lint_markup_node(state)
+
+        sentences = [sentence for result in ordered for sentence in result.sentences]
+        state.contradictions = _pair_pattern_contradictions(
+            [sentence.text for sentence in sentences],
+            [(sentence.positive, sentence.negative) for sentence in sentences],
+        )
+
+    carried_over: list[str] = []
+    if recompute:
+        if 2 <= len(sentences) <= 10:
+            with stage("find_contradictions"):
+                state.contradictions.extend(
+                    await _detect_semantic_contradictions([sentence.text for sentence in sentences])
+                )
+        with stage("analyze_entropy"):
+            state = await semantic_entropy_node(state)
+        with stage("judge_score"):
+            state = await judge_score_node(state)
+        with stage("propose_patches"):
+            state = await propose_patches_node(state)
+        with stage("build_questions"):
+            state = await build_questions_node(state)
+    else:
+        with stage("carry_over"):
+            carried_over = await _carry_over_global_results(state, previous, sentences)
+
+    with stage("finalize"):
+        state = await finalize_analysis_node(state)
+
+    update = IncrementalUpdate(
+        previous_prompt_id=previous.prompt_id,
+        blocks_total=len(blocks),
+        blocks_analyzed=len(missing),
+        change_ratio=round(change_ratio, 4),
+        recomputed_global=recompute,
+        carried_over=carried_over,
+    )
+    return state, BlockIndex(detected_language=state.detected_language, blocks=results), update
+
+
+def _merge_vocab_changes(results: list[BlockAnalysis]) -> list[str]:
+    """Combine per-block vocabulary changes, summing the counts of repeated ones."""
+    counts: dict[str, int] = {}
+
+    for result in results:
+        for change in result.vocab_changes:
+            match = COUNTED_CHANGE_RE.match(change)
+            if match:
+                counts[match.group(1)] = counts.get(match.group(1), 0) + int(match.group(2))
+            else:
+                counts.setdefault(change, 0)
+
+    return [
+        f"{change} ({count} times)" if count else change for change, count in counts.items()
+    ]
+
+
+async def _carry_over_global_results(
+    state: PipelineState, previous: MetricReport, sentences: list[SentenceSignals]
+) -> list[str]:
+    """
+    Seed LLM-derived results from the previous report into the state.
+
+    Semantic contradictions and LLM patches are kept only while the text
+    they refer to is still present. Returns the carried-over report sections.
+    """
+    _seed_reused_results(state, previous)
+
+    # Pattern matches have already been recomputed; LLM verdicts are carried over
+    positions = {sentence.text.strip(): i for i, sentence in enumerate(sentences)}
+    for contradiction in previous.contradictions:
+        if contradiction.source != "semantic" or len(contradiction.locations) != 2:
+            continue
+        first, second = contradiction.locations
+        if first in positions and second in positions:
+            state.contradictions.append({
+                "type": contradiction.type,
+                "severity": contradiction.severity,
+                "source": contradiction.source,
+                "sentence_1": first,
+                "sentence_2": second,
+                "position_1": positions[first],
+                "position_2": positions[second],
+                "description": contradiction.description,
+            })
+
+    # Deterministic patches are regenerated; LLM patches are re-anchored
+    stages: dict[str, list[Patch]] = {}
+    if not state.format_valid:
+        stages["format"] = _generate_format_patches(state.prompt_content, state.format_type)
+    if state.vocab_changes:
+        stages["vocab"] = _generate_vocab_patches(state.prompt_content, state.vocab_changes)
+
+    for patch in previous.patches:
+        patch_stage = patch.id.partition("_")[0]
+        if patch_stage in LLM_PATCH_STAGES and patch.original in state.prompt_content:
+            stages.setdefault(patch_stage, []).append(
+                patch.model_copy(update={"start": None, "end": None})
+            )
+
+    state.patches = [
+        patch for patch_stage in PATCH_STAGE_ORDER for patch in stages.get(patch_stage, [])
+    ]
+    anchor_patches(state.prompt_content, state.patches)
+
+    state.clarify_questions = list(previous.clarify_questions)
+
+    return ["judge_score", "semantic_entropy", "semantic_contradictions", "patches", "questions"]
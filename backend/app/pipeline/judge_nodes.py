@@ -2,27 +2,41 @@
 
 import json
 import logging
-from typing import Any
+from typing import Any, Optional
 
-from app.schemas.pipeline import PipelineState
-from app.services.llm import get_llm_service
+from app.core.config import settings
+from app.schemas.pipeline import JudgeEvaluation, PipelineState
+from app.services.llm import ModelTier, get_llm_service
 
 logger = logging.getLogger(__name__)
 
+# Score thresholds that decide improvement_priority (high < 6 <= medium < 8)
+PRIORITY_THRESHOLDS = (6.0, 8.0)
+
+JUDGE_DIMENSIONS = ["clarity", "specificity", "actionability", "completeness", "structure"]
+
 
 async def judge_score_node(state: PipelineState) -> PipelineState:
     """Score the prompt using LLM-as-Judge with rubric."""
+    if state.reused_from and state.llm_judge_score is not None:
+        logger.info(f"Reusing judge score from analysis {state.reused_from}")
+        return state
+
     try:
         content = state.get_current_content()
 
         # Get judge evaluation
-        judge_result = await _evaluate_with_judge(content)
+        judge_result, tier, escalation = await _evaluate_with_cascade(content)
 
         # Update state
         state.llm_judge_score = judge_result["overall_score"]
         state.llm_judge_reasoning = judge_result["reasoning"]
+        state.llm_judge_tier = tier
+        state.llm_judge_escalation = escalation
 
-        logger.info(f"Judge score: {judge_result['overall_score']:.2f}/10")
+        logger.info(
+            f"Judge score: {judge_result['overall_score']:.2f}/10 (decided by {tier} tier)"
+        )
 
         return state
 
@@ -35,7 +49,62 @@ async def judge_score_node(state: PipelineState) -> PipelineState:
         return state
 
 
-async def _evaluate_with_judge(content: str) -> dict[str, Any]:
+async def _evaluate_with_cascade(
+    content: str,
+) -> tuple[dict[str, Any], ModelTier, Optional[str]]:
+    """Judge on the cheap tier first, escalating only when the verdict is uncertain.
+
+    Returns the judge result, the tier that decided it and the reason for
+    escalating (None when the cheap verdict was kept).
+    """
+    escalation_tier = settings.judge_escalation_tier
+    models = get_llm_service().models
+
+    # Escalating to the model that just answered would only pay twice
+    if not settings.judge_cascade_enabled or models["cheap"] == models[escalation_tier]:
+        return await _evaluate_with_judge(content, escalation_tier), escalation_tier, None
+
+    result = await _evaluate_with_judge(content, "cheap")
+    reason = _uncertainty_reason(result)
+    if reason is None:
+        return result, "cheap", None
+
+    logger.info(f"Escalating judge to {escalation_tier} tier: {reason}")
+    escalated = await _evaluate_with_judge(content, escalation_tier)
+
+    # Keep the cheap verdict if the escalated request itself failed
+    if escalated.get("request_failed") and not result.get("request_failed"):
+        return result, "cheap", f"{reason}; escalation failed"
+
+    return escalated, escalation_tier, reason
+
+
+def _uncertainty_reason(result: dict[str, Any]) -> Optional[str]:
+    """Explain why a judge result is too uncertain to keep, or None if it is not."""
+    if result.get("request_failed"):
+        return "judge request failed"
+
+    if result.get("parse_fallback"):
+        return "response needed fallback parsing"
+
+    overall = result["overall_score"]
+    margin = settings.judge_uncertainty_margin
+    for threshold in PRIORITY_THRESHOLDS:
+        if abs(overall - threshold) <= margin:
+            return f"score {overall:.1f} is within {margin} of the {threshold:.0f} threshold"
+
+    scores = [result[d] for d in JUDGE_DIMENSIONS if d in result]
+    if scores:
+        spread = max(scores) - min(scores)
+        if spread >= settings.judge_disagreement_threshold:
+            return f"dimension scores disagree by {spread:.1f} points"
+
+    return None
+
+
+async def _evaluate_with_judge(
+    content: str, model_tier: ModelTier = "standard"
+) -> dict[str, Any]:
     """Evaluate prompt quality using LLM judge."""
 
     llm = get_llm_service()
@@ -77,9 +146,12 @@ Rate each dimension from 1-10 (1=poor, 10=excellent):
    - 4-6: Basic structure but could be better
    - 7-8: Well-structured with minor issues
    - 9-10: Excellent structure and flow
+"""
 
+    # Structured mode gets the response shape from the schema instead
+    json_format = """
 RESPOND IN JSON FORMAT:
-{{
+{
   "clarity": <score>,
   "specificity": <score>,
   "actionability": <score>,
@@ -89,10 +161,18 @@ RESPOND IN JSON FORMAT:
   "reasoning": "<2-3 sentence explanation of the overall assessment>",
   "strengths": ["<strength 1>", "<strength 2>"],
   "weaknesses": ["<weakness 1>", "<weakness 2>"]
-}}"""
+}"""
 
     try:
-        response = await llm.ask("standard", judge_prompt, max_tokens=500)
+        if settings.llm_structured_output:
+            evaluation = await llm.ask_structured(
+                model_tier, judge_prompt, JudgeEvaluation, max_tokens=300
+            )
+            return _clamp_scores(
+                {**evaluation.model_dump(), "strengths": [], "weaknesses": []}
+            )
+
+        response = await llm.ask(model_tier, judge_prompt + json_format, max_tokens=500)
 
         # Try to parse JSON response
         try:
@@ -117,34 +197,13 @@ RESPOND IN JSON FORMAT:
 
         try:
             # Validate required fields
-            required_fields = [
-                "clarity",
-                "specificity",
-                "actionability",
-                "completeness",
-                "structure",
-                "overall_score",
-                "reasoning",
-            ]
+            required_fields = [*JUDGE_DIMENSIONS, "overall_score", "reasoning"]
 
             for field in required_fields:
                 if field not in result:
                     raise ValueError(f"Missing field: {field}")
 
-            # Ensure scores are in valid range
-            for score_field in [
-                "clarity",
-                "specificity",
-                "actionability",
-                "completeness",
-                "structure",
-                "overall_score",
-            ]:
-                score = result[score_field]
-                if not isinstance(score, int | float) or score < 1 or score > 10:
-                    result[score_field] = 5.0  # Default fallback
-
-            return result
+            return _clamp_scores(result)
 
         except (ValueError, KeyError) as e:
             logger.warning(f"Failed to validate judge response: {e}")
@@ -162,9 +221,19 @@ RESPOND IN JSON FORMAT:
             "reasoning": f"Evaluation failed: {str(e)}",
             "strengths": [],
             "weaknesses": ["Evaluation could not be completed"],
+            "request_failed": True,
         }
 
 
+def _clamp_scores(result: dict[str, Any]) -> dict[str, Any]:
+    """Replace scores outside the 1-10 rubric range with the neutral default."""
+    for score_field in [*JUDGE_DIMENSIONS, "overall_score"]:
+        score = result[score_field]
+        if not isinstance(score, int | float) or score < 1 or score > 10:
+            result[score_field] = 5.0  # Default fallback
+    return result
+
+
 def _parse_judge_fallback(response: str) -> dict[str, Any]:
     """Fallback parser if JSON parsing fails."""
     import re
@@ -194,16 +263,7 @@ def _parse_judge_fallback(response: str) -> dict[str, Any]:
 
     # Calculate overall score if not found
     if "overall_score" not in scores:
-        individual_scores = [
-            scores.get(f, 5.0)
-            for f in [
-                "clarity",
-                "specificity",
-                "actionability",
-                "completeness",
-                "structure",
-            ]
-        ]
+        individual_scores = [scores.get(f, 5.0) for f in JUDGE_DIMENSIONS]
         scores["overall_score"] = sum(individual_scores) / len(individual_scores)
 
     # Extract reasoning if possible
@@ -216,4 +276,10 @@ def _parse_judge_fallback(response: str) -> dict[str, Any]:
         else "Unable to parse detailed reasoning"
     )
 
-    return {**scores, "reasoning": reasoning, "strengths": [], "weaknesses": []}
+    return {
+        **scores,
+        "reasoning": reasoning,
+        "strengths": [],
+        "weaknesses": [],
+        "parse_fallback": True,
+    }
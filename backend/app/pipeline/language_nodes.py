@@ -4,9 +4,11 @@ import logging
 import re
 from typing import Any, Dict
 
+from app.core.config import settings
 from app.pipeline.error_handling import with_error_handling
 from app.schemas.pipeline import (
     LanguageDetectionResult,
+    LanguageGuess,
     PipelineState,
     TranslationResult,
 )
@@ -30,16 +32,21 @@ Text: "{sample_text}"
 
 Response format: language_code:confidence (e.g., "en:0.95" or "ru:0.87")"""
 
-        response = await llm.ask("cheap", prompt, max_tokens=10)
-
-        # Parse response
-        try:
-            parts = response.strip().split(':')
-            language = parts[0].strip().lower()
-            confidence = float(parts[1].strip())
-        except (IndexError, ValueError):
-            # Fallback: simple heuristic detection
-            language, confidence = _simple_language_detection(sample_text)
+        if settings.llm_structured_output:
+            guess = await llm.ask_structured("cheap", prompt, LanguageGuess, max_tokens=30)
+            language = guess.language.strip().lower()
+            confidence = min(1.0, max(0.0, guess.confidence))
+        else:
+            response = await llm.ask("cheap", prompt, max_tokens=10)
+
+            # Parse response
+            try:
+                parts = response.strip().split(':')
+                language = parts[0].strip().lower()
+                confidence = float(parts[1].strip())
+            except (IndexError, ValueError):
+                # Fallback: simple heuristic detection
+                language, confidence = _simple_language_detection(sample_text)
 
         # Update state
         state.detected_language = language
@@ -0,0 +1,149 @@
+"""Deterministic lint: the pipeline stages that need no LLM calls."""
+
+import logging
+import re
+import time
+from bisect import bisect_right
+
+from app.pipeline.contradiction_nodes import (
+    _detect_pattern_contradictions,
+    _split_into_sentences,
+)
+from app.pipeline.markup_parser import parse_markup
+from app.pipeline.patch_nodes import _generate_format_patches, _vocab_patch
+from app.pipeline.vocab_nodes import _find_vocabulary_rewrites
+from app.schemas.prompts import Contradiction, LintDiagnostic, LintReport, Patch
+from app.services.patches import anchor_patches
+
+logger = logging.getLogger(__name__)
+
+# Pattern contradictions grow with the square of the sentence count; beyond
+# this many, further ones are summarized rather than listed
+MAX_CONTRADICTIONS = 50
+
+
+def lint_prompt(content: str) -> LintReport:
+    """
+    Lint a prompt in process with the deterministic stages only.
+
+    Runs format detection, markup validation, vocabulary unification and
+    pattern-based contradiction detection on the original text, and returns
+    their findings with patches anchored to it: markup fixes are safe,
+    vocabulary rewrites are risky. No LLM calls are made and no translation
+    happens, so this is cheap enough to run on every save.
+    """
+    started = time.perf_counter()
+    diagnostics: list[LintDiagnostic] = []
+    patches: list[Patch] = []
+
+    # Format and markup; fixable findings become span patches
+    document = parse_markup(content)
+    for i, diagnostic in enumerate(document.diagnostics):
+        diagnostics.append(
+            LintDiagnostic(
+                source="markup",
+                severity=diagnostic.severity,
+                message=diagnostic.message,
+                line=diagnostic.line,
+                column=diagnostic.column,
+            )
+        )
+        if diagnostic.fixable:
+            patches.append(
+                Patch(
+                    id=f"markup_{i}",
+                    type="safe",
+                    category="markup",
+                    description=diagnostic.describe(),
+                    original=content[diagnostic.fix_start:diagnostic.fix_end],
+                    improved=diagnostic.replacement,
+                    rationale="Safe markup fix",
+                    confidence=0.95,
+                    start=diagnostic.fix_start,
+                    end=diagnostic.fix_end,
+                )
+            )
+
+    # Markup whose errors all have safe fixes counts as valid
+    format_valid = document.is_valid or all(d.fixable for d in document.errors)
+    if not format_valid:
+        patches.extend(_generate_format_patches(content, document.format_type))
+
+    # Vocabulary; one risky patch and diagnostic per occurrence
+    newlines = [match.start() for match in re.finditer("\n", content)]
+    for k, (start, end, original, improved) in enumerate(_find_vocabulary_rewrites(content)):
+        line, column = _position(newlines, start)
+        diagnostics.append(
+            LintDiagnostic(
+                source="vocabulary",
+                severity="info",
+                message=f"Replace '{original}' with '{improved}'",
+                line=line,
+                column=column,
+            )
+        )
+        patches.append(_vocab_patch(f"vocab_{k}", start, end, original, improved))
+
+    # Pattern-based contradictions, positioned at their first sentence
+    sentences = _split_into_sentences(content)
+    contradictions = []
+    if len(sentences) >= 2:
+        found_contradictions = _detect_pattern_contradictions(sentences, MAX_CONTRADICTIONS + 1)
+        offsets = _sentence_offsets(content, sentences) if found_contradictions else []
+        for found in found_contradictions[:MAX_CONTRADICTIONS]:
+            contradictions.append(
+                Contradiction(
+                    type=found["type"],
+                    description=found["description"],
+                    severity=found["severity"],
+                    locations=[found["sentence_1"], found["sentence_2"]],
+                    source=found["source"],
+                )
+            )
+            line, column = _position(newlines, offsets[found["position_1"]])
+            diagnostics.append(
+                LintDiagnostic(
+                    source="contradiction",
+                    severity="warning",
+                    message=f"'{found['sentence_1']}' conflicts with '{found['sentence_2']}'",
+                    line=line,
+                    column=column,
+                )
+            )
+        if len(found_contradictions) > MAX_CONTRADICTIONS:
+            diagnostics.append(
+                LintDiagnostic(
+                    source="contradiction",
+                    severity="info",
+                    message=f"Only the first {MAX_CONTRADICTIONS} pattern contradictions are listed",
+                )
+            )
+
+    anchor_patches(content, patches)
+
+    return LintReport(
+        format_type=document.format_type,
+        format_valid=format_valid,
+        diagnostics=diagnostics,
+        contradictions=contradictions,
+        patches=patches,
+        duration_ms=(time.perf_counter() - started) * 1000,
+    )
+
+
+def _position(newlines: list[int], offset: int) -> tuple[int, int]:
+    """Translate an offset into a 1-based (line, column) pair."""
+    line_index = bisect_right(newlines, offset - 1)
+    line_start = newlines[line_index - 1] + 1 if line_index else 0
+    return line_index + 1, offset - line_start + 1
+
+
+def _sentence_offsets(content: str, sentences: list[str]) -> list[int]:
+    """Offset of each split sentence, which occur in order in the content."""
+    offsets = []
+    cursor = 0
+    for sentence in sentences:
+        cursor = content.find(sentence, cursor)
+        offsets.append(cursor)
+        cursor += len(sentence)
+    return offsets
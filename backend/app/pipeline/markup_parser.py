@@ -0,0 +1,520 @@
+"""Single-pass markup parser shared by the format pipeline nodes.
+
+The parser walks the content once and produces a ``MarkupDocument``: the
+detected format, a few structural landmarks and positioned diagnostics.
+Every safe fix is recorded on its diagnostic as a splice of the source, so
+validation and linting both read the same parse instead of rescanning.
+"""
+
+import hashlib
+import re
+from bisect import bisect_right
+from typing import Dict, Iterator, List, Optional, Tuple
+from xml.parsers import expat
+
+from app.schemas.pipeline import MarkupDiagnostic, MarkupDocument, MarkupNode
+
+# Markdown detection only looks at the first lines of the document
+_DETECTION_LINES = 10
+_MARKDOWN_INDICATORS = [
+    re.compile(r'^#{1,6}\s+.+$'),  # Headers
+    re.compile(r'^\*{1,3}.+\*{1,3}$'),  # Bold/italic
+    re.compile(r'^```'),  # Code blocks
+    re.compile(r'^\[.+\]\(.+\)$'),  # Links
+    re.compile(r'^[-*+]\s+'),  # Lists
+]
+_MD_HEADER_RE = re.compile(r'^(#{1,6})\s+(.+)')
+_MD_HEADER_SPACING_RE = re.compile(r'^(#{1,6})[^\s#]')
+_MD_LIST_SPACING_RE = re.compile(r'^[-*+][^\s]')
+_CODE_FENCE = '```'
+
+# Landmarks kept on the document model; diagnostics are never capped
+_MAX_NODES = 500
+
+# Token patterns for the XML scanner. Each one is anchored with
+# ``match``/``search`` at an explicit position and has no nested quantifiers,
+# so no input can make them backtrack.
+_XML_MARKUP_CHAR_RE = re.compile(r'[<&]')
+_XML_NAME_RE = re.compile(r'[^\W\d][\w.\-:]*')
+_XML_SPACE_RE = re.compile(r'\s*')
+_XML_ENTITY_RE = re.compile(r'&(?:amp|lt|gt|quot|apos|#[0-9]+|#x[0-9a-fA-F]+);')
+_XML_QUOTED_VALUE_RE = {
+    '"': re.compile(r'"[^"<]*"'),
+    "'": re.compile(r"'[^'<]*'"),
+}
+_XML_UNQUOTED_VALUE_RE = re.compile(r'[^\s"\'<>=`]+')
+
+# Constructs copied through verbatim up to their terminator
+_XML_VERBATIM_SECTIONS = (
+    ('<!--', '-->', "comment"),
+    ('<![CDATA[', ']]>', "CDATA section"),
+    ('<?', '?>', "processing instruction"),
+)
+
+
+def content_digest(content: str) -> str:
+    """Digest used to check that a cached document matches the content."""
+    return hashlib.blake2b(
+        content.encode("utf-8", "surrogatepass"), digest_size=16
+    ).hexdigest()
+
+
+def parse_markup(content: str) -> MarkupDocument:
+    """Detect the format of the content and parse it in one pass."""
+    digest = content_digest(content)
+
+    first_char = _first_non_space(content)
+    if first_char == '<' and '>' in content:
+        # Well-formed documents go through expat in C; only malformed ones
+        # need the repairing scanner
+        return _parse_well_formed_xml(content, digest) or _XmlParser(
+            content, digest
+        ).parse()
+
+    return _MarkdownParser(content, digest).parse()
+
+
+def apply_markup_fixes(
+    content: str, document: MarkupDocument
+) -> Tuple[str, List[str]]:
+    """Apply every safe fix recorded on the document in one linear pass."""
+    fixable = sorted(
+        (d for d in document.diagnostics if d.fixable),
+        key=lambda d: d.fix_start,
+    )
+    if not fixable:
+        return content, []
+
+    pieces = []
+    fixes = []
+    cursor = 0
+    for diagnostic in fixable:
+        if diagnostic.fix_start < cursor:
+            # Overlapping splice; the parser never emits these, but never
+            # corrupt the text if it does
+            continue
+        pieces.append(content[cursor:diagnostic.fix_start])
+        pieces.append(diagnostic.replacement)
+        cursor = diagnostic.fix_end
+        fixes.append(diagnostic.describe())
+    pieces.append(content[cursor:])
+
+    return ''.join(pieces), fixes
+
+
+def _first_non_space(content: str) -> str:
+    for char in content:
+        if not char.isspace():
+            return char
+    return ''
+
+
+def _iter_lines(content: str) -> Iterator[Tuple[int, int, str]]:
+    """Yield (line number, start offset, line) without splitting the content."""
+    start = 0
+    number = 1
+    length = len(content)
+    while start <= length:
+        end = content.find('\n', start)
+        if end == -1:
+            end = length
+        yield number, start, content[start:end]
+        start = end + 1
+        number += 1
+
+
+def _parse_well_formed_xml(content: str, digest: str) -> Optional[MarkupDocument]:
+    """Parse content with expat, returning None if it is not well-formed."""
+    nodes: List[MarkupNode] = []
+    depth = 0
+    parser = expat.ParserCreate()
+
+    def start_element(name, _attrs):
+        nonlocal depth
+        depth += 1
+        # Depth 1 is the synthetic wrapper element
+        if depth == 2 and len(nodes) < _MAX_NODES:
+            nodes.append(MarkupNode(
+                kind="element", line=parser.CurrentLineNumber, name=name
+            ))
+
+    def end_element(_name):
+        nonlocal depth
+        depth -= 1
+
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+
+    try:
+        # Feed the wrapper separately so fragments with several top-level
+        # elements parse without copying the content
+        parser.Parse("<root>", False)
+        parser.Parse(content, False)
+        parser.Parse("</root>", True)
+    except expat.ExpatError:
+        return None
+
+    return MarkupDocument(
+        format_type="xml",
+        source_length=len(content),
+        source_digest=digest,
+        line_count=content.count('\n') + 1,
+        nodes=nodes,
+    )
+
+
+class _MarkdownParser:
+    """Line-oriented Markdown parser that also decides markdown vs text."""
+
+    def __init__(self, content: str, digest: str):
+        self.content = content
+        self.digest = digest
+        self.nodes: List[MarkupNode] = []
+        self.diagnostics: List[MarkupDiagnostic] = []
+
+    def parse(self) -> MarkupDocument:
+        content = self.content
+        markdown_score = 0
+        detection_lines = 0
+        in_code_block = False
+        fence_count = 0
+        fence_line = 1
+
+        for number, start, line in _iter_lines(content):
+            stripped = line.strip()
+
+            # Format detection over the first non-blank lines
+            if detection_lines < _DETECTION_LINES and (stripped or detection_lines):
+                detection_lines += 1
+                if any(p.search(stripped) for p in _MARKDOWN_INDICATORS):
+                    markdown_score += 1
+                if detection_lines == _DETECTION_LINES and markdown_score < 2:
+                    return self._document("text")
+
+            fence_count += line.count(_CODE_FENCE)
+
+            if stripped.startswith(_CODE_FENCE):
+                in_code_block = not in_code_block
+                if in_code_block:
+                    fence_line = number
+                    self._add_node(
+                        kind="code_block", line=number, name=stripped[3:].strip()
+                    )
+                continue
+
+            # Skip everything inside code blocks
+            if in_code_block:
+                continue
+
+            if stripped.startswith('#'):
+                self._check_header(number, start, line, stripped)
+            elif _MD_LIST_SPACING_RE.match(line):
+                self.diagnostics.append(MarkupDiagnostic(
+                    line=number,
+                    column=2,
+                    message="missing space after list marker",
+                    severity="warning",
+                    fix_start=start + 1,
+                    fix_end=start + 1,
+                    replacement=' ',
+                ))
+
+        if markdown_score < 2:
+            return self._document("text")
+
+        if fence_count % 2 != 0:
+            self.diagnostics.append(MarkupDiagnostic(
+                line=fence_line,
+                column=1,
+                message="unclosed code block",
+                fix_start=len(content),
+                fix_end=len(content),
+                replacement='\n' + _CODE_FENCE,
+            ))
+
+        return self._document("markdown")
+
+    def _check_header(self, number: int, start: int, line: str, stripped: str) -> None:
+        header = _MD_HEADER_RE.match(stripped)
+        if header:
+            self._add_node(
+                kind="heading",
+                line=number,
+                name=header.group(2).strip()[:100],
+                level=len(header.group(1)),
+            )
+            return
+
+        spacing = _MD_HEADER_SPACING_RE.match(line)
+        if spacing is None:
+            self.diagnostics.append(MarkupDiagnostic(
+                line=number, column=1, message=f"malformed header '{stripped[:50]}'"
+            ))
+            return
+
+        offset = start + spacing.end(1)
+        self.diagnostics.append(MarkupDiagnostic(
+            line=number,
+            column=spacing.end(1) + 1,
+            message="missing space after header marker",
+            fix_start=offset,
+            fix_end=offset,
+            replacement=' ',
+        ))
+
+    def _add_node(self, **fields) -> None:
+        if len(self.nodes) < _MAX_NODES:
+            self.nodes.append(MarkupNode(**fields))
+
+    def _document(self, format_type: str) -> MarkupDocument:
+        return MarkupDocument(
+            format_type=format_type,
+            source_length=len(self.content),
+            source_digest=self.digest,
+            line_count=self.content.count('\n') + 1,
+            nodes=self.nodes if format_type == "markdown" else [],
+            diagnostics=self.diagnostics if format_type == "markdown" else [],
+        )
+
+
+class _XmlParser:
+    """Incremental XML tokenizer that validates markup around a tag stack.
+
+    The scanner walks the content once and records a diagnostic, with a
+    splice that repairs it, for every problem it meets: stray ``&`` and
+    ``<`` are escaped, unquoted attribute values are quoted, unmatched
+    closing tags are dropped and unclosed elements are closed. Tag scanning
+    never crosses the next ``<``, so every character is visited a bounded
+    number of times and run time stays linear on adversarial input.
+    """
+
+    def __init__(self, content: str, digest: str):
+        self.content = content
+        self.digest = digest
+        self.length = len(content)
+        self.pos = 0
+        self.nodes: List[MarkupNode] = []
+        self.diagnostics: List[MarkupDiagnostic] = []
+        # Open elements as (name, offset), plus a count per name so
+        # closing-tag lookups are O(1) regardless of nesting depth
+        self.stack: List[Tuple[str, int]] = []
+        self.open_counts: Dict[str, int] = {}
+        # Newline offsets, built on the first position lookup
+        self._newlines: Optional[List[int]] = None
+
+    def parse(self) -> MarkupDocument:
+        content = self.content
+
+        while self.pos < self.length:
+            match = _XML_MARKUP_CHAR_RE.search(content, self.pos)
+            if match is None:
+                break
+
+            self.pos = match.start()
+            if content[self.pos] == '&':
+                self._scan_entity()
+            else:
+                self._scan_markup()
+
+        for name, offset in reversed(self.stack):
+            self._fix(
+                offset, f"closed unclosed <{name}> tag",
+                self.length, self.length, f"</{name}>",
+            )
+
+        return MarkupDocument(
+            format_type="xml",
+            source_length=self.length,
+            source_digest=self.digest,
+            line_count=content.count('\n') + 1,
+            nodes=self.nodes,
+            diagnostics=self.diagnostics,
+        )
+
+    def _position(self, offset: int) -> Tuple[int, int]:
+        """Translate an offset into a 1-based (line, column) pair."""
+        if self._newlines is None:
+            self._newlines = [m.start() for m in re.finditer('\n', self.content)]
+        line_index = bisect_right(self._newlines, offset - 1)
+        line_start = self._newlines[line_index - 1] + 1 if line_index else 0
+        return line_index + 1, offset - line_start + 1
+
+    def _fix(
+        self,
+        offset: int,
+        message: str,
+        start: int,
+        end: int,
+        replacement: str,
+    ) -> None:
+        """Record a diagnostic at ``offset`` whose fix splices [start, end)."""
+        line, column = self._position(offset)
+        self.diagnostics.append(MarkupDiagnostic(
+            line=line,
+            column=column,
+            message=message,
+            fix_start=start,
+            fix_end=end,
+            replacement=replacement,
+        ))
+
+    def _scan_entity(self) -> None:
+        match = _XML_ENTITY_RE.match(self.content, self.pos)
+        if match:
+            self.pos = match.end()
+        else:
+            self._fix(self.pos, "escaped stray '&'", self.pos, self.pos + 1, '&amp;')
+            self.pos += 1
+
+    def _escape_lt(self) -> None:
+        self._fix(self.pos, "escaped stray '<'", self.pos, self.pos + 1, '&lt;')
+        self.pos += 1
+
+    def _scan_markup(self) -> None:
+        content = self.content
+
+        for opener, terminator, label in _XML_VERBATIM_SECTIONS:
+            if content.startswith(opener, self.pos):
+                end = content.find(terminator, self.pos + len(opener))
+                if end == -1:
+                    self._fix(
+                        self.pos, f"closed unterminated {label}",
+                        self.length, self.length, terminator,
+                    )
+                    self.pos = self.length
+                else:
+                    self.pos = end + len(terminator)
+                return
+
+        if content.startswith('<!', self.pos):
+            self._scan_declaration()
+        elif content.startswith('</', self.pos):
+            self._scan_end_tag()
+        else:
+            self._scan_start_tag()
+
+    def _scan_declaration(self) -> None:
+        end = self._find_tag_end(self.pos + 2)
+        if end == -1:
+            self._escape_lt()
+            return
+        self.pos = end + 1
+
+    def _find_tag_end(self, start: int) -> int:
+        """Find the '>' closing a tag, stopping early at the next '<'."""
+        content = self.content
+        reopen = content.find('<', start)
+        return content.find('>', start, self.length if reopen == -1 else reopen)
+
+    def _scan_end_tag(self) -> None:
+        content = self.content
+        name_match = _XML_NAME_RE.match(content, self.pos + 2)
+        if not name_match:
+            self._escape_lt()
+            return
+
+        end = _XML_SPACE_RE.match(content, name_match.end()).end()
+        if end >= self.length or content[end] != '>':
+            self._escape_lt()
+            return
+
+        name = name_match.group()
+        if not self.open_counts.get(name):
+            self._fix(
+                self.pos, f"removed unmatched closing tag </{name}>",
+                self.pos, end + 1, '',
+            )
+            self.pos = end + 1
+            return
+
+        # Close any elements left open inside the one being closed
+        while self.stack[-1][0] != name:
+            inner, offset = self._pop()
+            self._fix(
+                offset, f"closed unclosed <{inner}> tag before </{name}>",
+                self.pos, self.pos, f"</{inner}>",
+            )
+        self._pop()
+        self.pos = end + 1
+
+    def _scan_start_tag(self) -> None:
+        content = self.content
+        tag_start = self.pos
+        name_match = _XML_NAME_RE.match(content, tag_start + 1)
+        if not name_match:
+            self._escape_lt()
+            return
+
+        # Attribute fixes as (offset, message, end, replacement); recorded
+        # only once the whole tag has scanned cleanly
+        tag_fixes: List[Tuple[int, str, int, str]] = []
+        self_closing: Optional[bool] = None
+        p = name_match.end()
+
+        while self_closing is None:
+            p = _XML_SPACE_RE.match(content, p).end()
+            if p >= self.length or content[p] == '<':
+                self._escape_lt()
+                return
+
+            if content[p] == '>':
+                self_closing = False
+                p += 1
+                break
+            if content.startswith('/>', p):
+                self_closing = True
+                p += 2
+                break
+
+            attr_match = _XML_NAME_RE.match(content, p)
+            if not attr_match:
+                self._escape_lt()
+                return
+            attr = attr_match.group()
+            p = attr_match.end()
+
+            eq = _XML_SPACE_RE.match(content, p).end()
+            if eq < self.length and content[eq] == '=':
+                value_start = _XML_SPACE_RE.match(content, eq + 1).end()
+                quote = content[value_start] if value_start < self.length else ''
+                if quote in _XML_QUOTED_VALUE_RE:
+                    value_match = _XML_QUOTED_VALUE_RE[quote].match(
+                        content, value_start
+                    )
+                    if not value_match:
+                        self._escape_lt()
+                        return
+                else:
+                    value_match = _XML_UNQUOTED_VALUE_RE.match(content, value_start)
+                    if not value_match:
+                        self._escape_lt()
+                        return
+                    tag_fixes.append((
+                        value_start,
+                        f"quoted value of attribute '{attr}'",
+                        value_match.end(),
+                        f'"{value_match.group()}"',
+                    ))
+                p = value_match.end()
+            else:
+                tag_fixes.append(
+                    (p, f"added value to bare attribute '{attr}'", p, f'="{attr}"')
+                )
+
+        for offset, message, end, replacement in tag_fixes:
+            self._fix(offset, message, offset, end, replacement)
+
+        name = name_match.group()
+        if not self.stack and len(self.nodes) < _MAX_NODES:
+            line, _ = self._position(tag_start)
+            self.nodes.append(MarkupNode(kind="element", line=line, name=name))
+        if not self_closing:
+            self.stack.append((name, tag_start))
+            self.open_counts[name] = self.open_counts.get(name, 0) + 1
+
+        self.pos = p
+
+    def _pop(self) -> Tuple[str, int]:
+        entry = self.stack.pop()
+        self.open_counts[entry[0]] -= 1
+        return entry
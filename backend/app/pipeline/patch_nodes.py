@@ -1,53 +1,103 @@
 """Patch generation pipeline node."""
 
+import asyncio
 import logging
-from typing import Any
+import re
+from typing import TYPE_CHECKING, Any
 
-from app.schemas.pipeline import PipelineState
+from app.core.config import settings
+from app.pipeline.vocab_nodes import _match_case
+from app.schemas.pipeline import ImprovementList, PipelineState
 from app.schemas.prompts import Patch
 from app.services.llm import get_llm_service
+from app.services.patches import anchor_patches, diff_span, remap_patches
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable
 
 logger = logging.getLogger(__name__)
 
+PATCH_STAGE_ORDER = ("format", "vocab", "contradiction", "quality", "clarity")
+
+# Stages whose patches are written by an LLM against the working text
+LLM_PATCH_STAGES = ("contradiction", "quality", "clarity")
+
+# Reply layout parsed by _parse_improvements; structured output needs none
+_QUALITY_FREE_TEXT_FORMAT = """
+
+Format:
+IMPROVEMENT 1:
+Change: [specific text to change]
+To: [replacement text]
+Why: [brief reason]
+
+IMPROVEMENT 2:
+[etc.]"""
+
+# Matches the change descriptions written by the vocabulary node
+VOCAB_CHANGE_RE = re.compile(r"^(?:Replaced|Simplified phrase:) '(.+?)' (?:with|→) '(.*?)'(?: \(|$)")
+
 
 async def propose_patches_node(state: PipelineState) -> PipelineState:
     """Generate improvement patches based on analysis results."""
     try:
         content = state.get_current_content()
-        patches = []
-
-        # Generate patches based on different analysis results
-
-        # 1. Format fixes
-        if not state.format_valid:
-            format_patches = await _generate_format_patches(content, state.format_type)
-            patches.extend(format_patches)
 
-        # 2. Vocabulary improvements
-        if state.vocab_changes:
-            vocab_patches = _generate_vocab_patches(state.vocab_changes)
-            patches.extend(vocab_patches)
+        # Independent generators run concurrently; the limiter bounds how many
+        # LLM requests are in flight at once across all of them.
+        limiter = asyncio.Semaphore(max(1, settings.llm_max_concurrency))
+        generators: dict[str, Awaitable[list[Patch]]] = {}
 
-        # 3. Contradiction fixes
+        # 1. Contradiction fixes
         if state.contradictions:
-            contradiction_patches = await _generate_contradiction_patches(
-                content, state.contradictions
+            generators["contradiction"] = _generate_contradiction_patches(
+                content, state.contradictions, limiter
             )
-            patches.extend(contradiction_patches)
 
-        # 4. General quality improvements based on judge score
+        # 2. General quality improvements based on judge score
         if state.llm_judge_score and state.llm_judge_score < 8.0:
-            quality_patches = await _generate_quality_patches(
-                content, state.llm_judge_score, state.llm_judge_reasoning or ""
+            generators["quality"] = _generate_quality_patches(
+                content, state.llm_judge_score, state.llm_judge_reasoning or "", limiter
             )
-            patches.extend(quality_patches)
 
-        # 5. Semantic clarity improvements
+        # 3. Semantic clarity improvements
         if state.entropy_score and state.entropy_score > 0.5:
-            clarity_patches = await _generate_clarity_patches(
-                content, state.entropy_score
+            generators["clarity"] = _generate_clarity_patches(
+                content, state.entropy_score, limiter
             )
-            patches.extend(clarity_patches)
+
+        results = dict(
+            zip(generators, await asyncio.gather(*generators.values()), strict=True)
+        )
+
+        # LLM patches are anchored in the text they were written against,
+        # then moved to the same text in the prompt. A translation shares no
+        # text with the prompt, so those patches are only found by their text.
+        generated = [patch for stage in LLM_PATCH_STAGES for patch in results.get(stage, [])]
+        anchor_patches(content, generated)
+        if state.translated:
+            for patch in generated:
+                patch.start = patch.end = None
+        else:
+            remap_patches(content, state.prompt_content, generated)
+
+        # Format and vocabulary improvements need no LLM call
+        if not state.format_valid:
+            results["format"] = _generate_format_patches(
+                state.prompt_content, state.format_type
+            )
+        if state.vocab_changes:
+            results["vocab"] = _generate_vocab_patches(
+                state.prompt_content, state.vocab_changes
+            )
+
+        # Merge in a fixed stage order so patch order does not depend on timing
+        patches = [
+            patch for stage in PATCH_STAGE_ORDER for patch in results.get(stage, [])
+        ]
+
+        # Anchor the remaining patches to their text in the analyzed prompt
+        anchor_patches(state.prompt_content, patches)
 
         # Update state
         state.patches = patches
@@ -67,7 +117,7 @@ async def propose_patches_node(state: PipelineState) -> PipelineState:
         return state
 
 
-async def _generate_format_patches(content: str, format_type: str) -> list[Patch]:
+def _generate_format_patches(content: str, format_type: str) -> list[Patch]:
     """Generate patches for format issues."""
     patches = []
 
@@ -80,7 +130,7 @@ async def _generate_format_patches(content: str, format_type: str) -> list[Patch
                     type="safe",
                     category="markup",
                     description="Wrap content in XML root element",
-                    original=content[:100] + "..." if len(content) > 100 else content,
+                    original=content,
                     improved=f"<root>{content}</root>",
                     rationale="XML content should be wrapped in a root element",
                     confidence=0.9,
@@ -88,7 +138,7 @@ async def _generate_format_patches(content: str, format_type: str) -> list[Patch
             )
 
     elif format_type == "markdown":
-        lines = content.split("\n")
+        lines = content.split("\n", 3)
 
         # Check for missing title
         if not any(line.strip().startswith("#") for line in lines[:3]):
@@ -98,79 +148,107 @@ async def _generate_format_patches(content: str, format_type: str) -> list[Patch
                     type="safe",
                     category="markup",
                     description="Add markdown title",
-                    original=lines[0][:50] + "..."
-                    if lines and len(lines[0]) > 50
-                    else (lines[0] if lines else ""),
-                    improved=f"# Document Title\n\n{lines[0] if lines else ''}",
+                    original="",
+                    improved="# Document Title\n\n",
                     rationale="Markdown documents should have a clear title",
                     confidence=0.8,
+                    start=0,
+                    end=0,
                 )
             )
 
     return patches
 
 
-def _generate_vocab_patches(vocab_changes: list[str]) -> list[Patch]:
-    """Convert vocabulary changes to patches."""
+def _generate_vocab_patches(prompt: str, vocab_changes: list[str]) -> list[Patch]:
+    """Convert vocabulary changes to one patch per occurrence in the prompt."""
     patches = []
 
     for i, change in enumerate(vocab_changes):
-        # Parse change description to extract details
-        if "Replaced" in change and "with" in change:
-            try:
-                # Extract old and new terms
-                parts = change.split("'")
-                if len(parts) >= 4:
-                    old_term = parts[1]
-                    new_term = parts[3]
-
-                    patches.append(
-                        Patch(
-                            id=f"vocab_{i}",
-                            type="safe",
-                            category="vocabulary",
-                            description=f"Replace '{old_term}' with '{new_term}'",
-                            original=old_term,
-                            improved=new_term,
-                            rationale="Vocabulary standardization for consistency",
-                            confidence=0.9,
-                        )
-                    )
-            except Exception:
-                # If parsing fails, create a general patch
-                patches.append(
-                    Patch(
-                        id=f"vocab_{i}",
-                        type="safe",
-                        category="vocabulary",
-                        description=change,
-                        original="[vocabulary improvement]",
-                        improved="[improved vocabulary]",
-                        rationale="Vocabulary improvement based on analysis",
-                        confidence=0.7,
-                    )
+        match = VOCAB_CHANGE_RE.match(change)
+        if not match:
+            continue
+
+        # Phrase simplifications quote their regex; only the phrase is needed
+        old_term = match.group(1).replace("\\\\b", "").replace("\\b", "")
+        new_term = match.group(2)
+        if not old_term:
+            continue
+
+        pattern = re.compile(r"\b" + re.escape(old_term) + r"\b", re.IGNORECASE)
+
+        for k, occurrence in enumerate(pattern.finditer(prompt)):
+            patches.append(
+                _vocab_patch(
+                    f"vocab_{i}_{k}",
+                    occurrence.start(),
+                    occurrence.end(),
+                    occurrence.group(),
+                    _match_case(occurrence.group(), new_term),
                 )
+            )
 
     return patches
 
 
+def _vocab_patch(patch_id: str, start: int, end: int, original: str, improved: str) -> Patch:
+    """Span patch for one vocabulary rewrite."""
+    return Patch(
+        id=patch_id,
+        # Rewording can change tone or meaning, so it is never auto-applied
+        type="risky",
+        category="vocabulary",
+        description=f"Replace '{original}' with '{improved}'",
+        original=original,
+        improved=improved,
+        rationale="Vocabulary standardization for consistency",
+        confidence=0.8,
+        start=start,
+        end=end,
+    )
+
+
 async def _generate_contradiction_patches(
-    content: str, contradictions: list[dict[str, Any]]
+    content: str, contradictions: list[dict[str, Any]], limiter: asyncio.Semaphore
 ) -> list[Patch]:
     """Generate patches to resolve contradictions."""
-    patches = []
+    # Limit to 3 contradictions
+    results = await asyncio.gather(
+        *(
+            _generate_contradiction_patch(i, contradiction, content, limiter)
+            for i, contradiction in enumerate(contradictions[:3])
+        )
+    )
 
-    llm = get_llm_service()
+    return [patch for patch in results if patch is not None]
 
-    for i, contradiction in enumerate(contradictions[:3]):  # Limit to 3 contradictions
-        try:
-            sentence1 = contradiction.get("sentence_1", "")
-            sentence2 = contradiction.get("sentence_2", "")
 
-            if not sentence1 or not sentence2:
-                continue
+async def _generate_contradiction_patch(
+    i: int, contradiction: dict[str, Any], content: str, limiter: asyncio.Semaphore
+) -> Patch | None:
+    """
+    Generate a single patch resolving one contradiction.
+
+    The patch spans both statements: the earlier one is removed and the
+    later one is replaced by the resolution, keeping the text between them.
+    """
+    try:
+        sentence1 = contradiction.get("sentence_1", "")
+        sentence2 = contradiction.get("sentence_2", "")
+
+        if not sentence1 or not sentence2:
+            return None
+
+        (first_start, first), (second_start, second) = sorted(
+            [(content.find(sentence1), sentence1), (content.find(sentence2), sentence2)]
+        )
+        first_end = first_start + len(first)
+        if first_start < 0 or second_start < first_end:
+            return None
+
+        llm = get_llm_service()
 
-            prompt = f"""These two statements contradict each other:
+        prompt = f"""These two statements contradict each other:
 
 Statement 1: "{sentence1}"
 Statement 2: "{sentence2}"
@@ -182,29 +260,35 @@ Provide a single, clear statement that resolves this contradiction by either:
 
 Respond with just the resolved statement (1-2 sentences max):"""
 
+        async with limiter:
             resolution = await llm.ask("standard", prompt, max_tokens=150)
 
-            patches.append(
-                Patch(
-                    id=f"contradiction_{i}",
-                    type="risky",  # Contradiction resolution changes meaning
-                    category="clarity",
-                    description="Resolve contradiction between statements",
-                    original=f"{sentence1} ... {sentence2}",
-                    improved=resolution.strip(),
-                    rationale=f"Resolves {contradiction.get('type', 'contradiction')}",
-                    confidence=0.6,
-                )
-            )
-
-        except Exception as e:
-            logger.error(f"Failed to generate contradiction patch {i}: {e}")
+        # Drop the earlier statement with the whitespace after it
+        kept_from = first_end
+        while kept_from < second_start and content[kept_from].isspace():
+            kept_from += 1
+        end = second_start + len(second)
+
+        return Patch(
+            id=f"contradiction_{i}",
+            type="risky",  # Contradiction resolution changes meaning
+            category="clarity",
+            description="Resolve contradiction between statements",
+            original=content[first_start:end],
+            improved=content[kept_from:second_start] + resolution.strip(),
+            rationale=f"Resolves {contradiction.get('type', 'contradiction')}",
+            confidence=0.6,
+            start=first_start,
+            end=end,
+        )
 
-    return patches
+    except Exception as e:
+        logger.error(f"Failed to generate contradiction patch {i}: {e}")
+        return None
 
 
 async def _generate_quality_patches(
-    content: str, judge_score: float, reasoning: str
+    content: str, judge_score: float, reasoning: str, limiter: asyncio.Semaphore
 ) -> list[Patch]:
     """Generate patches to improve overall quality."""
     patches = []
@@ -222,21 +306,28 @@ Suggest 2-3 specific improvements to increase the score. For each improvement, p
 2. What to change it to
 3. Why this improves the prompt
 
-Focus on the biggest impact improvements. Be concise.
-
-Format:
-IMPROVEMENT 1:
-Change: [specific text to change]
-To: [replacement text]
-Why: [brief reason]
-
-IMPROVEMENT 2:
-[etc.]"""
-
-        response = await llm.ask("standard", prompt, max_tokens=400)
+Focus on the biggest impact improvements. Be concise."""
 
-        # Parse improvements
-        improvements = _parse_improvements(response)
+        if settings.llm_structured_output:
+            async with limiter:
+                structured = await llm.ask_structured(
+                    "standard", prompt, ImprovementList, max_tokens=400
+                )
+            improvements = [
+                {
+                    **improvement.model_dump(),
+                    "description": f"Change '{improvement.current[:30]}...' to improve quality",
+                }
+                for improvement in structured.improvements
+                if improvement.current and improvement.suggested
+            ]
+        else:
+            prompt += _QUALITY_FREE_TEXT_FORMAT
+            async with limiter:
+                response = await llm.ask("standard", prompt, max_tokens=400)
+
+            # Parse improvements
+            improvements = _parse_improvements(response)
 
         for i, improvement in enumerate(improvements):
             patches.append(
@@ -245,8 +336,8 @@ IMPROVEMENT 2:
                     type="risky",  # Quality changes can alter meaning
                     category="clarity",
                     description=improvement.get("description", "Quality improvement"),
-                    original=improvement.get("current", "")[:100],
-                    improved=improvement.get("suggested", "")[:200],
+                    original=improvement.get("current", ""),
+                    improved=improvement.get("suggested", ""),
                     rationale=improvement.get(
                         "reasoning", "Improves overall prompt quality"
                     ),
@@ -260,7 +351,9 @@ IMPROVEMENT 2:
     return patches
 
 
-async def _generate_clarity_patches(content: str, entropy: float) -> list[Patch]:
+async def _generate_clarity_patches(
+    content: str, entropy: float, limiter: asyncio.Semaphore
+) -> list[Patch]:
     """Generate patches to improve semantic clarity."""
     patches = []
 
@@ -279,22 +372,29 @@ Rewrite to be more specific and unambiguous. Focus on:
 
 Provide the improved version:"""
 
-            improved = await llm.ask("standard", prompt, max_tokens=len(content) + 200)
+            async with limiter:
+                improved = await llm.ask(
+                    "standard", prompt, max_tokens=len(content) + 200
+                )
 
-            patches.append(
-                Patch(
-                    id="clarity_overall",
-                    type="risky",
-                    category="clarity",
-                    description="Improve overall clarity and reduce ambiguity",
-                    original=content[:100] + "..." if len(content) > 100 else content,
-                    improved=improved.strip()[:300] + "..."
-                    if len(improved.strip()) > 300
-                    else improved.strip(),
-                    rationale=f"Reduces semantic ambiguity (entropy: {entropy:.2f})",
-                    confidence=0.7,
+            # Replace only the part of the prompt the rewrite changed
+            improved = improved.strip()
+            if improved and improved != content:
+                start, end, improved_end = diff_span(content, improved)
+                patches.append(
+                    Patch(
+                        id="clarity_overall",
+                        type="risky",
+                        category="clarity",
+                        description="Improve overall clarity and reduce ambiguity",
+                        original=content[start:end],
+                        improved=improved[start:improved_end],
+                        rationale=f"Reduces semantic ambiguity (entropy: {entropy:.2f})",
+                        confidence=0.7,
+                        start=start,
+                        end=end,
+                    )
                 )
-            )
 
         except Exception as e:
             logger.error(f"Failed to generate clarity patch: {e}")
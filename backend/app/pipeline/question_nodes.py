@@ -1,44 +1,37 @@
 """Clarification question generation pipeline node."""
 
+import asyncio
 import logging
-from typing import Any, Dict, List
+import re
+from typing import Any, Dict, List, Optional
 
-from app.schemas.pipeline import PipelineState
+from app.core.config import settings
+from app.schemas.pipeline import PipelineState, QuestionList, RankedQuestionList
 from app.schemas.prompts import ClarifyQuestion
 from app.services.llm import get_llm_service
 
 logger = logging.getLogger(__name__)
 
 
+MAX_QUESTIONS = 5
+
+
 async def build_questions_node(state: PipelineState) -> PipelineState:
     """Generate clarification questions based on analysis results."""
     try:
         content = state.get_current_content()
-        questions = []
-
-        # Generate questions based on different analysis issues
-
-        # 1. Questions about contradictions
-        if state.contradictions:
-            contradiction_questions = await _generate_contradiction_questions(state.contradictions)
-            questions.extend(contradiction_questions)
-
-        # 2. Questions about ambiguity (high semantic entropy)
-        if state.entropy_score and state.entropy_score > 0.5:
-            ambiguity_questions = await _generate_ambiguity_questions(content, state.entropy_score)
-            questions.extend(ambiguity_questions)
+        questions: List[ClarifyQuestion] = []
 
-        # 3. Questions about missing details (low judge score)
-        if state.llm_judge_score and state.llm_judge_score < 7.0:
-            detail_questions = await _generate_detail_questions(content, state.llm_judge_score, state.llm_judge_reasoning or "")
-            questions.extend(detail_questions)
+        # One ranked request covering every detected issue
+        if settings.llm_structured_output:
+            try:
+                questions = await _generate_ranked_questions(state, content)
+            except Exception as e:
+                logger.warning(f"Consolidated question generation failed, using per-issue generators: {e}")
 
-        # 4. General clarification questions
-        general_questions = await _generate_general_questions(content)
-        questions.extend(general_questions)
-
-        # Limit to most important questions
-        questions = questions[:5]  # Max 5 questions
+        # Fall back to the per-issue generators, run concurrently
+        if not questions:
+            questions = await _generate_questions_concurrently(state, content)
 
         # Update state
         state.clarify_questions = questions
@@ -53,21 +46,124 @@ async def build_questions_node(state: PipelineState) -> PipelineState:
         return state
 
 
+async def _generate_ranked_questions(state: PipelineState, content: str) -> List[ClarifyQuestion]:
+    """Generate a ranked, deduplicated question list in a single request."""
+    llm = get_llm_service()
+
+    findings = []
+    for contradiction in state.contradictions[:2]:
+        sentence1 = contradiction.get("sentence_1", "")
+        sentence2 = contradiction.get("sentence_2", "")
+        if sentence1 and sentence2:
+            findings.append(f'- Contradiction: "{sentence1}" vs "{sentence2}"')
+    if state.entropy_score and state.entropy_score > 0.5:
+        findings.append(f"- High semantic ambiguity (entropy: {state.entropy_score:.2f})")
+    if state.llm_judge_score and state.llm_judge_score < 7.0:
+        findings.append(
+            f"- Judge scored {state.llm_judge_score:.1f}/10. Feedback: {state.llm_judge_reasoning or 'none'}"
+        )
+    if not findings:
+        findings.append("- No specific issues detected")
+
+    findings_text = "\n".join(findings)
+
+    prompt = f"""Analyze this prompt and the issues found in it:
+
+"{content}"
+
+Issues:
+{findings_text}
+
+Generate up to {MAX_QUESTIONS} distinct clarifying questions that would help the user improve the prompt. Cover the listed issues first, then general gaps such as target audience, expected output format, constraints or missing context.
+
+Order the questions from most to least important. Do not ask the same thing twice. For each question give its category (contradiction, ambiguity, details or general) and priority (high, medium or low)."""
+
+    structured = await llm.ask_structured(
+        "cheap", prompt, RankedQuestionList, max_tokens=400
+    )
+
+    questions = []
+    counts: Dict[str, int] = {}
+    for ranked in structured.questions:
+        question_text = ranked.question.strip()
+        if len(question_text) <= 10:
+            continue
+        if not question_text.endswith('?'):
+            question_text += '?'
+
+        index = counts.get(ranked.category, 0)
+        counts[ranked.category] = index + 1
+        questions.append(ClarifyQuestion(
+            id=f"{ranked.category}_{index}",
+            question=question_text,
+            category=ranked.category,
+            priority=ranked.priority,
+        ))
+
+    return _deduplicate_questions(questions)[:MAX_QUESTIONS]
+
+
+async def _generate_questions_concurrently(state: PipelineState, content: str) -> List[ClarifyQuestion]:
+    """Run the per-issue question generators concurrently and merge in priority order."""
+    generators = []
+
+    # 1. Questions about contradictions
+    if state.contradictions:
+        generators.append(_generate_contradiction_questions(state.contradictions))
+
+    # 2. Questions about ambiguity (high semantic entropy)
+    if state.entropy_score and state.entropy_score > 0.5:
+        generators.append(_generate_ambiguity_questions(content, state.entropy_score))
+
+    # 3. Questions about missing details (low judge score)
+    if state.llm_judge_score and state.llm_judge_score < 7.0:
+        generators.append(_generate_detail_questions(content, state.llm_judge_score, state.llm_judge_reasoning or ""))
+
+    # 4. General clarification questions
+    generators.append(_generate_general_questions(content))
+
+    results = await asyncio.gather(*generators)
+
+    questions = [question for group in results for question in group]
+    return _deduplicate_questions(questions)[:MAX_QUESTIONS]
+
+
+def _deduplicate_questions(questions: List[ClarifyQuestion]) -> List[ClarifyQuestion]:
+    """Drop questions whose normalized text was already asked."""
+    seen = set()
+    unique = []
+    for question in questions:
+        key = " ".join(re.sub(r"[^\w\s]", " ", question.question.lower()).split())
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(question)
+    return unique
+
+
 async def _generate_contradiction_questions(contradictions: List[Dict[str, Any]]) -> List[ClarifyQuestion]:
     """Generate questions to resolve contradictions."""
-    questions = []
+    # Limit to 2 contradictions
+    results = await asyncio.gather(*(
+        _generate_contradiction_question(i, contradiction)
+        for i, contradiction in enumerate(contradictions[:2])
+    ))
 
-    llm = get_llm_service()
+    return [question for question in results if question is not None]
+
+
+async def _generate_contradiction_question(i: int, contradiction: Dict[str, Any]) -> Optional[ClarifyQuestion]:
+    """Generate a single question resolving one contradiction."""
+    try:
+        sentence1 = contradiction.get("sentence_1", "")
+        sentence2 = contradiction.get("sentence_2", "")
 
-    for i, contradiction in enumerate(contradictions[:2]):  # Limit to 2 contradictions
-        try:
-            sentence1 = contradiction.get("sentence_1", "")
-            sentence2 = contradiction.get("sentence_2", "")
+        if not sentence1 or not sentence2:
+            return None
 
-            if not sentence1 or not sentence2:
-                continue
+        llm = get_llm_service()
 
-            prompt = f"""These statements seem contradictory:
+        prompt = f"""These statements seem contradictory:
 
 Statement 1: "{sentence1}"
 Statement 2: "{sentence2}"
@@ -76,25 +172,24 @@ Generate a clarifying question to resolve this contradiction. The question shoul
 
 Provide just the question (one sentence):"""
 
-            response = await llm.ask("cheap", prompt, max_tokens=100)
-            question_text = response.strip().rstrip('?') + '?'
+        response = await llm.ask("cheap", prompt, max_tokens=100)
+        question_text = response.strip().rstrip('?') + '?'
+
+        return ClarifyQuestion(
+            id=f"contradiction_{i}",
+            question=question_text,
+            category="contradiction",
+            priority="high",
+            context={
+                "contradiction_type": contradiction.get("type", "unknown"),
+                "sentence_1": sentence1[:100],
+                "sentence_2": sentence2[:100]
+            }
+        )
 
-            questions.append(ClarifyQuestion(
-                id=f"contradiction_{i}",
-                question=question_text,
-                category="contradiction",
-                priority="high",
-                context={
-                    "contradiction_type": contradiction.get("type", "unknown"),
-                    "sentence_1": sentence1[:100],
-                    "sentence_2": sentence2[:100]
-                }
-            ))
-
-        except Exception as e:
-            logger.error(f"Failed to generate contradiction question {i}: {e}")
-
-    return questions
+    except Exception as e:
+        logger.error(f"Failed to generate contradiction question {i}: {e}")
+        return None
 
 
 async def _generate_ambiguity_questions(content: str, entropy: float) -> List[ClarifyQuestion]:
@@ -102,22 +197,17 @@ async def _generate_ambiguity_questions(content: str, entropy: float) -> List[Cl
     questions = []
 
     try:
-        llm = get_llm_service()
-
         prompt = f"""This prompt has high semantic ambiguity (entropy: {entropy:.2f}):
 
 "{content}"
 
-Generate 2 specific questions that would help clarify the most ambiguous aspects. Focus on the parts that could be interpreted in multiple ways.
-
-Format:
-1. [First question]
-2. [Second question]"""
-
-        response = await llm.ask("cheap", prompt, max_tokens=200)
+Generate 2 specific questions that would help clarify the most ambiguous aspects. Focus on the parts that could be interpreted in multiple ways."""
 
-        # Parse questions
-        parsed_questions = _parse_numbered_questions(response)
+        parsed_questions = await _ask_for_questions(
+            prompt,
+            "1. [First question]\n2. [Second question]",
+            max_tokens=200,
+        )
 
         for i, question_text in enumerate(parsed_questions[:2]):
             questions.append(ClarifyQuestion(
@@ -142,21 +232,17 @@ async def _generate_detail_questions(content: str, judge_score: float, reasoning
     questions = []
 
     try:
-        llm = get_llm_service()
-
         prompt = f"""This prompt scored {judge_score:.1f}/10. Judge feedback: {reasoning}
 
 Prompt: "{content}"
 
-Generate 1-2 questions that would help the user provide missing details or clarify unclear aspects. Focus on what would most improve the prompt quality.
-
-Format:
-1. [Question about missing details]
-2. [Question about unclear aspects]"""
-
-        response = await llm.ask("cheap", prompt, max_tokens=150)
+Generate 1-2 questions that would help the user provide missing details or clarify unclear aspects. Focus on what would most improve the prompt quality."""
 
-        parsed_questions = _parse_numbered_questions(response)
+        parsed_questions = await _ask_for_questions(
+            prompt,
+            "1. [Question about missing details]\n2. [Question about unclear aspects]",
+            max_tokens=150,
+        )
 
         for i, question_text in enumerate(parsed_questions[:2]):
             questions.append(ClarifyQuestion(
@@ -195,27 +281,14 @@ Focus on:
 
 Generate practical questions that would lead to actionable improvements:"""
 
-        response = await llm.ask("cheap", prompt, max_tokens=200)
-
-        # Try to extract questions from response
-        import re
-
-        # Look for question patterns
-        question_patterns = [
-            r'\\?[^\\?]*\\?',  # Text ending with ?
-            r'^[-*•]\\s*(.+\\?)$',  # Bullet points with questions
-            r'^\\d+\\.\\s*(.+\\?)$',  # Numbered questions
-        ]
-
-        found_questions = []
-        for pattern in question_patterns:
-            matches = re.findall(pattern, response, re.MULTILINE)
-            found_questions.extend(matches)
-
-        # If no structured questions found, try to split by sentences
-        if not found_questions:
-            sentences = [s.strip() for s in response.split('.') if '?' in s]
-            found_questions = [s + ('?' if not s.endswith('?') else '') for s in sentences]
+        if settings.llm_structured_output:
+            structured = await llm.ask_structured(
+                "cheap", prompt, QuestionList, max_tokens=200
+            )
+            found_questions = structured.questions
+        else:
+            response = await llm.ask("cheap", prompt, max_tokens=200)
+            found_questions = _extract_questions(response)
 
         # Create question objects
         for i, question_text in enumerate(found_questions[:2]):
@@ -235,6 +308,50 @@ Generate practical questions that would lead to actionable improvements:"""
     return questions
 
 
+async def _ask_for_questions(prompt: str, layout: str, max_tokens: int) -> List[str]:
+    """Ask the cheap model for a list of questions.
+
+    ``layout`` is the numbered-list format spelled out for free-text replies;
+    structured output gets the list shape from the schema instead.
+    """
+    llm = get_llm_service()
+
+    if settings.llm_structured_output:
+        structured = await llm.ask_structured(
+            "cheap", prompt, QuestionList, max_tokens=max_tokens
+        )
+        questions = [q.strip() for q in structured.questions if q.strip()]
+        return [q if q.endswith('?') else q + '?' for q in questions]
+
+    prompt += f"\n\nFormat:\n{layout}"
+    response = await llm.ask("cheap", prompt, max_tokens=max_tokens)
+    return _parse_numbered_questions(response)
+
+
+def _extract_questions(response: str) -> List[str]:
+    """Extract free-form questions from an unstructured response."""
+    import re
+
+    # Look for question patterns
+    question_patterns = [
+        r'\\?[^\\?]*\\?',  # Text ending with ?
+        r'^[-*•]\\s*(.+\\?)$',  # Bullet points with questions
+        r'^\\d+\\.\\s*(.+\\?)$',  # Numbered questions
+    ]
+
+    found_questions = []
+    for pattern in question_patterns:
+        matches = re.findall(pattern, response, re.MULTILINE)
+        found_questions.extend(matches)
+
+    # If no structured questions found, try to split by sentences
+    if not found_questions:
+        sentences = [s.strip() for s in response.split('.') if '?' in s]
+        found_questions = [s + ('?' if not s.endswith('?') else '') for s in sentences]
+
+    return found_questions
+
+
 def _parse_numbered_questions(text: str) -> List[str]:
     """Parse numbered questions from text."""
     import re
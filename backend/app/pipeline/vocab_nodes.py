@@ -3,6 +3,7 @@
 import logging
 import re
 from collections import Counter
+from collections.abc import Callable
 from typing import Dict, List, Tuple
 
 from app.schemas.pipeline import PipelineState
@@ -33,112 +34,167 @@ async def vocab_unify_node(state: PipelineState) -> PipelineState:
         return state
 
 
+# Define safe vocabulary unifications
+# These are conservative replacements that shouldn't change meaning
+_UNIFICATIONS = {
+    # Common contractions expansion
+    "can't": "cannot",
+    "won't": "will not",
+    "don't": "do not",
+    "doesn't": "does not",
+    "isn't": "is not",
+    "aren't": "are not",
+    "wasn't": "was not",
+    "weren't": "were not",
+    "shouldn't": "should not",
+    "wouldn't": "would not",
+    "couldn't": "could not",
+
+    # Spelling standardizations (US English)
+    "colour": "color",
+    "flavour": "flavor",
+    "behaviour": "behavior",
+    "centre": "center",
+    "metre": "meter",
+    "theatre": "theater",
+    "realise": "realize",
+    "organise": "organize",
+    "analyse": "analyze",
+
+    # Technical term standardizations. Open forms such as "set up" and
+    # "log in" are verbs, so only the hyphenated nouns are closed up
+    "e-mail": "email",
+    "web site": "website",
+    "web-site": "website",
+    "log-in": "login",
+    "set-up": "setup",
+
+    # Common redundancies
+    "in order to": "to",
+    "due to the fact that": "because",
+    "at this point in time": "now",
+    "for the purpose of": "to",
+    "with regard to": "regarding",
+    "as a matter of fact": "actually",
+
+    # Formal vs informal consistency
+    "it's": "it is",
+    "you're": "you are",
+    "we're": "we are",
+    "they're": "they are",
+    "there's": "there is",
+}
+
+# Phrase-level improvements
+_PHRASE_IMPROVEMENTS = {
+    # Reduce redundant phrases
+    "very unique": "unique",
+    "more better": "better",
+    "free gift": "gift",
+    "future plans": "plans",
+    "past history": "history",
+    "unexpected surprise": "surprise",
+
+    # Simplify complex constructions
+    "in the event that": "if",
+    "prior to": "before",
+    "subsequent to": "after",
+    "during the course of": "during",
+    "in the vicinity of": "near",
+
+    # Fix common verbose expressions
+    "a large number of": "many",
+    "a small number of": "few",
+    "the majority of": "most",
+    "in spite of the fact that": "although",
+}
+
+
+# Compiled once: (lowercase term for the cheap pre-check, pattern, replacement).
+# Word boundaries avoid partial matches; phrases are plain words and spaces.
+_UNIFICATION_RES = [
+    (old_term.lower(), re.compile(r'\b' + re.escape(old_term) + r'\b', re.IGNORECASE), old_term, new_term)
+    for old_term, new_term in _UNIFICATIONS.items()
+]
+_PHRASE_IMPROVEMENT_RES = [
+    (phrase.lower(), re.compile(r'\b' + phrase + r'\b', re.IGNORECASE), replacement)
+    for phrase, replacement in _PHRASE_IMPROVEMENTS.items()
+]
+
+_WORD_RE = re.compile(r'\b\w+\b')
+
+
 def _unify_vocabulary(content: str) -> Tuple[str, List[str]]:
     """Apply safe vocabulary unifications."""
     changes = []
     unified_content = content
 
-    # Define safe vocabulary unifications
-    # These are conservative replacements that shouldn't change meaning
-    unifications = {
-        # Common contractions expansion
-        "can't": "cannot",
-        "won't": "will not",
-        "don't": "do not",
-        "doesn't": "does not",
-        "isn't": "is not",
-        "aren't": "are not",
-        "wasn't": "was not",
-        "weren't": "were not",
-        "shouldn't": "should not",
-        "wouldn't": "would not",
-        "couldn't": "could not",
-
-        # Spelling standardizations (US English)
-        "colour": "color",
-        "flavour": "flavor",
-        "behaviour": "behavior",
-        "centre": "center",
-        "metre": "meter",
-        "theatre": "theater",
-        "realise": "realize",
-        "organise": "organize",
-        "analyse": "analyze",
-
-        # Technical term standardizations
-        "e-mail": "email",
-        "web site": "website",
-        "web-site": "website",
-        "log in": "login",
-        "log-in": "login",
-        "set up": "setup",
-        "set-up": "setup",
-
-        # Common redundancies
-        "in order to": "to",
-        "due to the fact that": "because",
-        "at this point in time": "now",
-        "for the purpose of": "to",
-        "with regard to": "regarding",
-        "as a matter of fact": "actually",
-
-        # Formal vs informal consistency
-        "it's": "it is",
-        "you're": "you are",
-        "we're": "we are",
-        "they're": "they are",
-        "there's": "there is",
-    }
+    # A term can only match if it occurs as a substring, and a substring
+    # search is much cheaper than a regex pass, so most patterns never run
+    lowered = unified_content.lower()
 
     # Apply word-level replacements
-    for old_term, new_term in unifications.items():
-        # Use word boundaries to avoid partial matches
-        pattern = r'\\b' + re.escape(old_term) + r'\\b'
-
-        new_content = re.sub(pattern, new_term, unified_content, flags=re.IGNORECASE)
-
-        if new_content != unified_content:
-            count = len(re.findall(pattern, unified_content, flags=re.IGNORECASE))
+    for term, pattern, old_term, new_term in _UNIFICATION_RES:
+        if term not in lowered:
+            continue
+        unified_content, count = pattern.subn(_case_preserving(new_term), unified_content)
+        if count:
             changes.append(f"Replaced '{old_term}' with '{new_term}' ({count} times)")
-            unified_content = new_content
+            lowered = unified_content.lower()
 
     # Apply phrase-level improvements
-    phrase_improvements = [
-        # Reduce redundant phrases
-        (r'\\bvery unique\\b', 'unique'),
-        (r'\\bmore better\\b', 'better'),
-        (r'\\bfree gift\\b', 'gift'),
-        (r'\\bfuture plans\\b', 'plans'),
-        (r'\\bpast history\\b', 'history'),
-        (r'\\bunexpected surprise\\b', 'surprise'),
-
-        # Simplify complex constructions
-        (r'\\bin the event that\\b', 'if'),
-        (r'\\bprior to\\b', 'before'),
-        (r'\\bsubsequent to\\b', 'after'),
-        (r'\\bduring the course of\\b', 'during'),
-        (r'\\bin the vicinity of\\b', 'near'),
-
-        # Fix common verbose expressions
-        (r'\\ba large number of\\b', 'many'),
-        (r'\\ba small number of\\b', 'few'),
-        (r'\\bthe majority of\\b', 'most'),
-        (r'\\bin spite of the fact that\\b', 'although'),
-    ]
-
-    for pattern, replacement in phrase_improvements:
-        new_content = re.sub(pattern, replacement, unified_content, flags=re.IGNORECASE)
-
-        if new_content != unified_content:
-            changes.append(f"Simplified phrase: '{pattern}' → '{replacement}'")
-            unified_content = new_content
+    for term, pattern, replacement in _PHRASE_IMPROVEMENT_RES:
+        if term not in lowered:
+            continue
+        unified_content, count = pattern.subn(_case_preserving(replacement), unified_content)
+        if count:
+            changes.append(f"Simplified phrase: '{pattern.pattern}' → '{replacement}'")
+            lowered = unified_content.lower()
 
     return unified_content, changes
 
 
+def _find_vocabulary_rewrites(content: str) -> List[Tuple[int, int, str, str]]:
+    """
+    Every (start, end, original, improved) rewrite the vocabulary rules make.
+
+    The rules are matched against the content as written rather than applied
+    one after another, so the spans anchor to it directly; each replacement
+    keeps the capitalization of the text it replaces.
+    """
+    rewrites = []
+    lowered = content.lower()
+
+    rules = [(term, pattern, new_term) for term, pattern, _, new_term in _UNIFICATION_RES]
+    for term, pattern, replacement in rules + _PHRASE_IMPROVEMENT_RES:
+        if term not in lowered:
+            continue
+        for match in pattern.finditer(content):
+            original = match.group()
+            rewrites.append(
+                (match.start(), match.end(), original, _match_case(original, replacement))
+            )
+
+    return rewrites
+
+
+def _match_case(original: str, replacement: str) -> str:
+    """Carry the capitalization of the replaced text over to its replacement."""
+    if len(original) > 1 and original.isupper():
+        return replacement.upper()
+    if original[:1].isupper():
+        return replacement[:1].upper() + replacement[1:]
+    return replacement
+
+
+def _case_preserving(replacement: str) -> Callable[[re.Match], str]:
+    """Substitution callback replacing each match in the case it was written in."""
+    return lambda match: _match_case(match.group(), replacement)
+
+
 def _analyze_vocabulary_complexity(content: str) -> Dict[str, float]:
     """Analyze vocabulary complexity metrics."""
-    words = re.findall(r'\\b\\w+\\b', content.lower())
+    words = _WORD_RE.findall(content.lower())
 
     if not words:
         return {"complexity": 0.0, "diversity": 0.0, "avg_length": 0.0}
@@ -8,6 +8,86 @@ from pydantic import BaseModel, Field
 from app.schemas.prompts import ClarifyQuestion, MetricReport, Patch
 
 
+class MarkupDiagnostic(BaseModel):
+    """Positioned finding produced by the markup parser."""
+
+    line: int = Field(..., ge=1, description="1-based line of the finding")
+    column: int = Field(..., ge=1, description="1-based column of the finding")
+    message: str = Field(..., description="What was found")
+    severity: Literal["error", "warning"] = "error"
+
+    # Safe fix expressed as a splice of the source text, if one exists
+    fix_start: Optional[int] = None
+    fix_end: Optional[int] = None
+    replacement: Optional[str] = None
+
+    @property
+    def fixable(self) -> bool:
+        """Whether the finding carries a safe fix."""
+        return self.replacement is not None
+
+    def describe(self) -> str:
+        """Render the finding as a human-readable line."""
+        return f"Line {self.line}, column {self.column}: {self.message}"
+
+
+class MarkupNode(BaseModel):
+    """Structural landmark in a parsed document (heading, fence, element)."""
+
+    kind: Literal["heading", "code_block", "element"]
+    line: int = Field(..., ge=1)
+    name: str = Field(default="", description="Heading text or element name")
+    level: int = Field(default=0, ge=0, description="Heading level or nesting depth")
+
+
+class MarkupDocument(BaseModel):
+    """Lightweight document model shared by format detection, validation and linting."""
+
+    format_type: Literal["markdown", "xml", "text"]
+    source_length: int = Field(..., ge=0)
+    source_digest: str = Field(..., description="Digest of the parsed content")
+    line_count: int = Field(default=0, ge=0)
+    nodes: List[MarkupNode] = Field(default_factory=list)
+    diagnostics: List[MarkupDiagnostic] = Field(default_factory=list)
+
+    @property
+    def is_valid(self) -> bool:
+        """Whether the document parsed without errors."""
+        return not any(d.severity == "error" for d in self.diagnostics)
+
+    @property
+    def errors(self) -> List[MarkupDiagnostic]:
+        """Diagnostics that make the document invalid."""
+        return [d for d in self.diagnostics if d.severity == "error"]
+
+
+class SentenceSignals(BaseModel):
+    """A sentence and the contradiction pattern groups it matches."""
+
+    text: str
+    positive: List[int] = Field(default_factory=list)
+    negative: List[int] = Field(default_factory=list)
+
+
+class BlockAnalysis(BaseModel):
+    """Block-local results for one paragraph of a prompt, keyed by its hash."""
+
+    hash: str = Field(..., description="Digest of the block text")
+    translated_content: Optional[str] = None
+    unified_content: Optional[str] = Field(
+        default=None, description="Block after vocabulary unification, if anything changed"
+    )
+    vocab_changes: List[str] = Field(default_factory=list)
+    sentences: List[SentenceSignals] = Field(default_factory=list)
+
+
+class BlockIndex(BaseModel):
+    """Block-local results of an analysis, kept for incremental re-analysis."""
+
+    detected_language: Optional[str] = None
+    blocks: Dict[str, BlockAnalysis] = Field(default_factory=dict)
+
+
 class PipelineState(BaseModel):
     """Central state object that flows through the analysis pipeline."""
 
@@ -23,6 +103,7 @@ class PipelineState(BaseModel):
     # Format validation
     format_valid: bool = False
     markup_fixes: List[str] = Field(default_factory=list)
+    markup_document: Optional[MarkupDocument] = None
 
     # Vocabulary analysis
     vocab_unified: bool = False
@@ -31,7 +112,11 @@ class PipelineState(BaseModel):
     # Contradiction detection
     contradictions: List[Dict[str, Any]] = Field(default_factory=list)
 
+    # Analysis whose judge and entropy results were seeded into this run
+    reused_from: Optional[str] = None
+
     # Semantic entropy
+    entropy_mode: Optional[Literal["sampling", "logprob"]] = None
     semantic_samples: List[str] = Field(default_factory=list)
     semantic_embeddings: List[List[float]] = Field(default_factory=list)
     entropy_score: Optional[float] = None
@@ -41,6 +126,8 @@ class PipelineState(BaseModel):
     # LLM Judge scoring
     llm_judge_score: Optional[float] = None
     llm_judge_reasoning: Optional[str] = None
+    llm_judge_tier: Optional[str] = None
+    llm_judge_escalation: Optional[str] = None
 
     # Patches and improvements
     patches: List[Patch] = Field(default_factory=list)
@@ -64,6 +151,15 @@ class PipelineState(BaseModel):
         """Add an error to the pipeline state."""
         self.errors.append(f"{datetime.utcnow().isoformat()}: {error}")
 
+    def judge_details(self) -> Dict[str, Any]:
+        """Describe which judge tier decided the score, and why."""
+        details: Dict[str, Any] = {}
+        if self.llm_judge_tier:
+            details["decided_by_tier"] = self.llm_judge_tier
+        if self.llm_judge_escalation:
+            details["escalation_reason"] = self.llm_judge_escalation
+        return details
+
     def to_metric_report(self) -> MetricReport:
         """Convert pipeline state to final metric report."""
         from app.schemas.prompts import Contradiction, MetricScore, SemanticEntropy
@@ -74,7 +170,7 @@ class PipelineState(BaseModel):
         judge_score = MetricScore(
             score=self.llm_judge_score or 5.0,
             rationale=self.llm_judge_reasoning or "Analysis completed",
-            details={}
+            details=self.judge_details()
         )
 
         # Create semantic entropy object
@@ -92,7 +188,8 @@ class PipelineState(BaseModel):
                 type=contradiction.get("type", "intra"),
                 description=contradiction.get("description", ""),
                 severity=contradiction.get("severity", "medium"),
-                locations=[contradiction.get("sentence_1", ""), contradiction.get("sentence_2", "")]
+                locations=[contradiction.get("sentence_1", ""), contradiction.get("sentence_2", "")],
+                source=contradiction.get("source", "pattern"),
             ))
 
         return MetricReport(
@@ -198,3 +295,70 @@ class QuestionGenerationResult(BaseModel):
     questions: List[ClarifyQuestion] = Field(default_factory=list)
     priority_questions: List[str] = Field(default_factory=list)
     question_categories: List[str] = Field(default_factory=list)
+
+
+# Structured LLM output schemas. These are sent to the model as strict JSON
+# schemas, so they avoid defaults and numeric constraints; values are
+# range-checked by the nodes after parsing.
+
+
+class LanguageGuess(BaseModel):
+    """Structured language detection response."""
+
+    language: str = Field(..., description="ISO 639-1 language code, e.g. en or ru")
+    confidence: float = Field(..., description="Detection confidence from 0.0 to 1.0")
+
+
+class ContradictionVerdict(BaseModel):
+    """Structured verdict on whether two statements conflict."""
+
+    verdict: Literal["YES", "NO", "MAYBE"]
+    explanation: str = Field(..., description="Brief explanation, empty if NO")
+
+
+class JudgeEvaluation(BaseModel):
+    """Structured LLM-as-judge scores."""
+
+    clarity: float
+    specificity: float
+    actionability: float
+    completeness: float
+    structure: float
+    overall_score: float
+    reasoning: str = Field(..., description="2-3 sentence overall assessment")
+
+
+class ImprovementSuggestion(BaseModel):
+    """Single structured improvement suggestion."""
+
+    current: str = Field(..., description="Exact text from the prompt to change")
+    suggested: str = Field(..., description="Replacement text")
+    reasoning: str = Field(..., description="Why this improves the prompt")
+
+
+class ImprovementList(BaseModel):
+    """Structured list of improvement suggestions."""
+
+    improvements: List[ImprovementSuggestion]
+
+
+class QuestionList(BaseModel):
+    """Structured list of clarification questions."""
+
+    questions: List[str] = Field(..., description="One question per item")
+
+
+class RankedQuestion(BaseModel):
+    """Single clarification question with the issue it addresses."""
+
+    question: str = Field(..., description="The clarification question")
+    category: Literal["contradiction", "ambiguity", "details", "general"]
+    priority: Literal["low", "medium", "high"]
+
+
+class RankedQuestionList(BaseModel):
+    """Clarification questions ordered from most to least important."""
+
+    questions: List[RankedQuestion] = Field(
+        ..., description="Distinct questions, most important first"
+    )
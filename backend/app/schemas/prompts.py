@@ -48,6 +48,9 @@ class Contradiction(BaseModel):
         ..., description="Severity level"
     )
     locations: list[str] = Field(..., description="Where contradictions were found")
+    source: Literal["pattern", "semantic"] = Field(
+        default="pattern", description="Found by phrase patterns or by an LLM verdict"
+    )
 
 
 class Patch(BaseModel):
@@ -63,6 +66,22 @@ class Patch(BaseModel):
     improved: str = Field(..., description="Improved text")
     rationale: str = Field(..., description="Why this improvement helps")
     confidence: float = Field(..., ge=0, le=1, description="Confidence in this patch")
+    start: Optional[int] = Field(
+        default=None, ge=0, description="Offset of the original text in the analyzed prompt"
+    )
+    end: Optional[int] = Field(
+        default=None, ge=0, description="End offset (exclusive) of the original text"
+    )
+
+
+class PatchConflict(BaseModel):
+    """Patch that could not be applied."""
+
+    patch_id: str = Field(..., description="ID of the rejected patch")
+    reason: str = Field(..., description="Why the patch was not applied")
+    conflicts_with: Optional[str] = Field(
+        default=None, description="ID of the applied patch whose span overlaps this one"
+    )
 
 
 class ClarifyQuestion(BaseModel):
@@ -83,6 +102,29 @@ class ClarifyAnswer(BaseModel):
     answer: str = Field(..., description="The answer provided")
 
 
+class AnalysisReuse(BaseModel):
+    """Marks results carried over from a near-duplicate analysis."""
+
+    source_prompt_id: str = Field(..., description="Analysis the results came from")
+    similarity: float = Field(..., description="Cosine similarity to the source prompt")
+    reused: list[str] = Field(..., description="Report sections taken from the source")
+
+
+class IncrementalUpdate(BaseModel):
+    """Describes how an incremental analysis built on its previous analysis."""
+
+    previous_prompt_id: str = Field(..., description="Analysis the edit was applied to")
+    blocks_total: int = Field(..., description="Paragraph blocks in the new text")
+    blocks_analyzed: int = Field(..., description="Blocks whose block-local nodes were rerun")
+    change_ratio: float = Field(..., description="Share of the text in added or removed blocks")
+    recomputed_global: bool = Field(
+        ..., description="Whether judge, entropy and other LLM nodes were rerun"
+    )
+    carried_over: list[str] = Field(
+        default_factory=list, description="Report sections taken from the previous analysis"
+    )
+
+
 class MetricReport(BaseModel):
     """Comprehensive analysis report."""
 
@@ -119,6 +161,12 @@ class MetricReport(BaseModel):
     improvement_priority: Literal["low", "medium", "high"] = Field(
         ..., description="How urgently this prompt needs improvement"
     )
+    reuse: Optional[AnalysisReuse] = Field(
+        default=None, description="Set when results were reused from a similar prompt"
+    )
+    incremental: Optional[IncrementalUpdate] = Field(
+        default=None, description="Set when produced by incremental re-analysis of an edit"
+    )
 
 
 class PromptImproved(BaseModel):
@@ -131,6 +179,12 @@ class PromptImproved(BaseModel):
     )
     improvement_summary: str = Field(..., description="Summary of changes made")
     quality_gain: float = Field(..., description="Estimated quality improvement")
+    conflicts: list[PatchConflict] = Field(
+        default_factory=list, description="Requested patches that were not applied"
+    )
+    diff: str = Field(
+        default="", description="Unified diff from the original to the improved prompt"
+    )
 
 
 class AnalyzeRequest(BaseModel):
@@ -140,6 +194,11 @@ class AnalyzeRequest(BaseModel):
     include_entropy: bool = Field(
         default=True, description="Include semantic entropy analysis"
     )
+    entropy_mode: Optional[Literal["sampling", "logprob"]] = Field(
+        default=None,
+        description="Entropy estimator override (defaults to server setting); "
+        "logprob is rejected until the server is calibrated",
+    )
     include_clarify: bool = Field(
         default=True, description="Include clarification questions"
     )
@@ -148,12 +207,94 @@ class AnalyzeRequest(BaseModel):
     )
 
 
+class IncrementalAnalyzeRequest(BaseModel):
+    """Request to re-analyze an edited prompt against an earlier analysis."""
+
+    previous_prompt_id: str = Field(..., description="ID of the analysis being edited")
+    prompt: PromptInput
+    entropy_mode: Optional[Literal["sampling", "logprob"]] = Field(
+        default=None,
+        description="Entropy estimator override (defaults to server setting); "
+        "logprob is rejected until the server is calibrated",
+    )
+
+
+class LintRequest(BaseModel):
+    """Request to lint a prompt with the deterministic stages only."""
+
+    prompt: PromptInput
+
+
+class LintDiagnostic(BaseModel):
+    """Finding from a deterministic lint stage."""
+
+    source: Literal["markup", "vocabulary", "contradiction"] = Field(
+        ..., description="Stage that produced the finding"
+    )
+    severity: Literal["error", "warning", "info"] = Field(..., description="Severity level")
+    message: str = Field(..., description="What was found")
+    line: Optional[int] = Field(default=None, description="1-based line, when known")
+    column: Optional[int] = Field(default=None, description="1-based column, when known")
+
+
+class LintReport(BaseModel):
+    """Diagnostics and patches from the deterministic stages."""
+
+    format_type: str = Field(..., description="Detected format of the prompt")
+    format_valid: bool = Field(..., description="Whether the markup parsed without errors")
+    diagnostics: list[LintDiagnostic] = Field(default_factory=list)
+    contradictions: list[Contradiction] = Field(default_factory=list)
+    patches: list[Patch] = Field(default_factory=list)
+    duration_ms: float = Field(..., description="Time spent linting")
+
+
+class StageTiming(BaseModel):
+    """Wall time of one pipeline node or request stage."""
+
+    name: str
+    duration_ms: float
+
+
+class LLMCallTiming(BaseModel):
+    """Latency and token usage of one OpenAI request."""
+
+    operation: str = Field(..., description="Service method, e.g. ask or sample_for_entropy")
+    model: str
+    tier: Optional[str] = None
+    duration_ms: float
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    cached_tokens: Optional[int] = Field(
+        default=None, description="Prompt tokens served from OpenAI's prompt cache"
+    )
+    failed: bool = False
+
+
+class CacheStats(BaseModel):
+    """Hits and misses of one cache while serving a request."""
+
+    hits: int = 0
+    misses: int = 0
+
+
+class AnalysisTimings(BaseModel):
+    """Where the time of one analysis request went."""
+
+    total_ms: float
+    stages: list[StageTiming] = Field(default_factory=list)
+    llm_calls: list[LLMCallTiming] = Field(default_factory=list)
+    cache: dict[str, CacheStats] = Field(default_factory=dict)
+
+
 class AnalyzeResponse(BaseModel):
     """Response from prompt analysis."""
 
     report: MetricReport
     patches: list[Patch]
     questions: list[ClarifyQuestion]
+    timings: Optional[AnalysisTimings] = Field(
+        default=None, description="Per-stage timings, included when requested with ?timings=true"
+    )
 
 
 class ApplyPatchesRequest(BaseModel):
@@ -173,6 +314,18 @@ class ClarifyRequest(BaseModel):
     )
 
 
+class DependencyHealth(BaseModel):
+    """Last probe result for one backing service, as cached by the health monitor."""
+
+    status: Literal["ok", "failing", "unknown", "disabled"] = "unknown"
+    latency_ms: Optional[float] = Field(default=None, description="Duration of the last probe")
+    checked_at: Optional[datetime] = None
+    age_seconds: Optional[float] = Field(default=None, description="Time since the last probe")
+    stale: bool = Field(default=False, description="Whether the last probe is too old to trust")
+    consecutive_failures: int = 0
+    error: Optional[str] = None
+
+
 class HealthResponse(BaseModel):
     """Health check response."""
 
@@ -183,3 +336,11 @@ class HealthResponse(BaseModel):
     openai_configured: bool = Field(
         ..., description="Whether OpenAI is properly configured"
     )
+    dependencies: dict[str, DependencyHealth] = Field(default_factory=dict)
+
+
+class ReadinessResponse(BaseModel):
+    """Readiness probe response built from cached dependency health."""
+
+    ready: bool
+    dependencies: dict[str, DependencyHealth] = Field(default_factory=dict)
@@ -0,0 +1,225 @@
+"""Pre-fork server: warm the app once, then fork workers that share it copy-on-write.
+
+``uvicorn --workers N`` starts every worker as a fresh interpreter, so each
+one imports the app, compiles the analysis graph and builds its static
+tables separately. Here the master does that work once, moves everything it
+allocated out of the garbage collector's reach with ``gc.freeze()`` and
+forks the workers, which start serving with those pages shared.
+
+    python -m app.serve --workers 4 --port 8000
+
+``--measure`` starts the app both ways and compares per-worker memory and
+the time until every worker is serving.
+"""
+
+import argparse
+import contextlib
+import gc
+import importlib
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import IO, Optional
+
+import uvicorn
+
+from app.core import startup
+from app.core.config import settings
+from app.core.logging import configure_logging, shutdown_logging
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# A worker that dies sooner than this after starting is restarted only after a pause
+WORKER_RESTART_DELAY_SECONDS = 1.0
+
+logger = logging.getLogger(__name__)
+
+
+def preload() -> None:
+    """Import and build everything workers would otherwise build themselves."""
+    from app.main import app  # noqa: F401 - imports routers, nodes and settings
+    from app.pipeline.graph import get_analysis_pipeline
+
+    get_analysis_pipeline()
+
+    # Modules the app defers until first use; workers would each load them
+    for module in startup.DEFERRED_MODULES:
+        with contextlib.suppress(ImportError):
+            importlib.import_module(module)
+
+
+def serve(host: str, port: int, workers: int) -> None:
+    """Warm the app, then fork and supervise workers sharing one listening socket."""
+    # Collections in the master would only scatter objects across pages
+    gc.disable()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    started = time.perf_counter()
+    preload()
+
+    # Workers must not inherit the log writer thread, which fork does not copy
+    shutdown_logging()
+    gc.collect()
+    gc.freeze()
+    logger.info(
+        f"Preloaded app in {(time.perf_counter() - started) * 1000:.0f} ms, "
+        f"froze {gc.get_freeze_count()} objects, forking {workers} workers"
+    )
+
+    children: dict[int, float] = {}
+    stopping = False
+
+    def stop(_signum, _frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            with contextlib.suppress(ProcessLookupError):
+                os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(workers):
+        children[_fork_worker(sock)] = time.monotonic()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        forked_at = children.pop(pid, None)
+        if forked_at is None or stopping:
+            continue
+
+        exit_code = os.waitstatus_to_exitcode(status)
+        logger.warning(f"Worker {pid} exited with status {exit_code}, restarting")
+        if time.monotonic() - forked_at < WORKER_RESTART_DELAY_SECONDS:
+            time.sleep(WORKER_RESTART_DELAY_SECONDS)
+        if not stopping:
+            children[_fork_worker(sock)] = time.monotonic()
+
+    logger.info("All workers stopped")
+
+
+def _fork_worker(sock: socket.socket) -> int:
+    """Fork a worker that serves on the shared socket until told to stop."""
+    pid = os.fork()
+    if pid:
+        return pid
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    gc.enable()
+    configure_logging(settings.log_level, settings.log_queue_size, settings.log_debug_sample_rate)
+
+    # Report worker startup from the fork, not from the master's imports
+    startup.IMPORT_STARTED = time.perf_counter()
+
+    from app.main import app
+
+    config = uvicorn.Config(app, log_level=settings.log_level.lower())
+    try:
+        uvicorn.Server(config).run(sockets=[sock])
+    finally:
+        shutdown_logging()
+        os._exit(0)
+
+
+def measure(workers: int, port: int, settle_seconds: float) -> None:
+    """Compare ``uvicorn --workers`` with the pre-fork server on memory and startup time."""
+    modes = {
+        "uvicorn --workers": [sys.executable, "-m", "uvicorn", "app.main:app", "--workers"],
+        "app.serve (pre-fork)": [sys.executable, "-m", "app.serve", "--workers"],
+    }
+    # Build the graph before reporting ready, so both modes do the same work
+    env = {**os.environ, "STARTUP_PRELOAD": "eager"}
+
+    for name, command in modes.items():
+        # Logs go to a file that is polled, so a chatty worker never blocks on a full pipe
+        with tempfile.TemporaryFile(mode="w+") as log:
+            started = time.perf_counter()
+            process = subprocess.Popen(
+                command + [str(workers), "--port", str(port)],
+                cwd=BACKEND_DIR,
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=log,
+                text=True,
+            )
+            try:
+                while _count_ready(log) < workers:
+                    if process.poll() is not None:
+                        raise RuntimeError(f"{name} exited with status {process.returncode}")
+                    time.sleep(0.01)
+                startup_ms = (time.perf_counter() - started) * 1000
+
+                time.sleep(settle_seconds)
+                master = _memory_kb(process.pid)
+                usage = [_memory_kb(pid) for pid in _child_pids(process.pid)]
+            finally:
+                process.terminate()
+                process.wait()
+
+        print(f"{name}: all {workers} workers serving after {startup_ms:.0f} ms")
+        for field in ("Rss", "Pss", "Uss"):
+            values = [memory[field] / 1024 for memory in usage]
+            print(
+                f"  {field}: {sum(values) / len(values):7.1f} MB per worker, "
+                f"{sum(values) + master[field] / 1024:7.1f} MB total with master"
+            )
+
+
+def _count_ready(log: IO[str]) -> int:
+    """Number of workers that have logged startup completion so far."""
+    log.seek(0)
+    return log.read().count("Application startup complete")
+
+
+def _child_pids(pid: int) -> list[int]:
+    children = Path(f"/proc/{pid}/task/{pid}/children").read_text().split()
+    return [int(child) for child in children]
+
+
+def _memory_kb(pid: int) -> dict[str, int]:
+    """Resident, proportional and unique set sizes of a process in kB."""
+    fields = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        key, value = line.split(":", 1)
+        fields[key] = int(value.split()[0])
+    return {
+        "Rss": fields["Rss"],
+        "Pss": fields["Pss"],
+        "Uss": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1))
+    )
+    parser.add_argument("--measure", action="store_true", help="Compare with uvicorn --workers")
+    parser.add_argument("--settle-seconds", type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    if args.measure:
+        measure(args.workers, args.port, args.settle_seconds)
+    else:
+        serve(args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    main()
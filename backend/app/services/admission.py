@@ -0,0 +1,172 @@
+"""Admission control for pipeline runs in this process."""
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Literal, Optional
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.timing import record_stage
+
+logger = logging.getLogger(__name__)
+
+Lane = Literal["interactive", "batch"]
+LANES: tuple[Lane, ...] = ("interactive", "batch")
+
+# Assumed run duration until the first runs have been timed
+DEFAULT_RUN_SECONDS = 10.0
+
+# Weight of the latest run in the moving average of run durations
+RUN_SECONDS_SMOOTHING = 0.2
+
+
+class AdmissionRejected(Exception):
+    """Raised when a run cannot be admitted; carries the suggested retry delay."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Bounds concurrent pipeline runs, with a short deadline-bound wait queue.
+
+    A run is admitted immediately while fewer than ``max_in_flight`` runs
+    are active. Otherwise it waits in its lane's queue for up to
+    ``queue_timeout`` seconds; a full queue or an expired wait is rejected
+    with a retry delay estimated from recent run durations. Freed slots go
+    to interactive waiters first, and batch runs may never take the last
+    ``interactive_reserved`` slots, so bulk callers cannot starve editors.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        max_queue: int,
+        queue_timeout: float,
+        interactive_reserved: int = 0,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.batch_max_in_flight = max(1, max_in_flight - interactive_reserved)
+        self._in_flight: dict[Lane, int] = dict.fromkeys(LANES, 0)
+        self._waiters: dict[Lane, deque[asyncio.Future]] = {lane: deque() for lane in LANES}
+        self._run_seconds = DEFAULT_RUN_SECONDS
+
+    @property
+    def in_flight(self) -> int:
+        return sum(self._in_flight.values())
+
+    @property
+    def queued(self) -> int:
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    @asynccontextmanager
+    async def admit(self, lane: Lane = "interactive") -> AsyncIterator[None]:
+        """Hold a run slot for the duration of the block, or raise AdmissionRejected."""
+        await self._acquire(lane)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(lane, time.monotonic() - started)
+
+    def retry_after(self) -> int:
+        """Seconds until a new run is likely to be admitted."""
+        backlog = self.queued + 1
+        waves = math.ceil(backlog / max(1, self.max_in_flight))
+        return max(1, math.ceil(waves * self._run_seconds))
+
+    def _can_start(self, lane: Lane) -> bool:
+        if self.in_flight >= self.max_in_flight:
+            return False
+        return lane == "interactive" or self._in_flight["batch"] < self.batch_max_in_flight
+
+    async def _acquire(self, lane: Lane) -> None:
+        # Waiters of this lane go first; interactive runs also overtake batch waiters
+        if not self._waiters[lane] and self._can_start(lane):
+            self._start(lane)
+            return
+
+        if self.queued >= self.max_queue:
+            self._reject(lane, "queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[lane].append(waiter)
+        self._record_gauges()
+        waited = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.queue_timeout)
+        except TimeoutError:
+            self._abandon(lane, waiter)
+            self._reject(lane, "queue_timeout")
+        except asyncio.CancelledError:
+            self._abandon(lane, waiter)
+            raise
+        metrics.observe("admission.wait_seconds", time.perf_counter() - waited)
+        record_stage("admission_wait", waited)
+
+    def _abandon(self, lane: Lane, waiter: asyncio.Future) -> None:
+        """Remove a waiter that gave up, passing on a slot it was just handed."""
+        if waiter.done():
+            # The slot was handed over as the wait ended
+            self._release(lane, None)
+        else:
+            waiter.cancel()
+            self._waiters[lane].remove(waiter)
+        self._record_gauges()
+
+    def _start(self, lane: Lane) -> None:
+        self._in_flight[lane] += 1
+        metrics.increment(f"admission.admitted.{lane}")
+        self._record_gauges()
+
+    def _release(self, lane: Lane, duration: Optional[float]) -> None:
+        self._in_flight[lane] -= 1
+        if duration is not None:
+            self._run_seconds += RUN_SECONDS_SMOOTHING * (duration - self._run_seconds)
+
+        # Hand freed slots straight to waiters so new arrivals cannot barge in
+        for next_lane in LANES:
+            waiters = self._waiters[next_lane]
+            while waiters and self._can_start(next_lane):
+                self._start(next_lane)
+                waiters.popleft().set_result(None)
+        self._record_gauges()
+
+    def _reject(self, lane: Lane, reason: str) -> None:
+        retry_after = self.retry_after()
+        metrics.increment(f"admission.rejected.{reason}")
+        logger.warning(
+            f"Rejected {lane} run ({reason}): {self.in_flight} in flight, "
+            f"{self.queued} queued, retry after {retry_after}s"
+        )
+        raise AdmissionRejected(reason, retry_after)
+
+    def _record_gauges(self) -> None:
+        metrics.set_gauge("admission.in_flight", self.in_flight)
+        metrics.set_gauge("admission.queued", self.queued)
+
+
+# Global controller instance
+_admission_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """Get the global admission controller instance."""
+    global _admission_controller
+    if _admission_controller is None:
+        _admission_controller = AdmissionController(
+            max_in_flight=settings.admission_max_in_flight,
+            max_queue=settings.admission_max_queue,
+            queue_timeout=settings.admission_queue_timeout_seconds,
+            interactive_reserved=settings.admission_interactive_reserved,
+        )
+    return _admission_controller
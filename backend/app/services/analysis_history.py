@@ -0,0 +1,250 @@
+"""Write-behind persistence of completed analyses into analysis_results."""
+
+import asyncio
+import contextlib
+import itertools
+import logging
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlmodel import select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.prompts import AnalysisResult
+from app.schemas.prompts import MetricReport
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL's limit on bind parameters in one statement, which caps the
+# rows per multi-row insert
+MAX_BIND_PARAMETERS = 32767
+
+
+class AnalysisHistoryWriter:
+    """
+    Buffers completed reports and writes them to the database in batches.
+
+    Reports are queued without touching the database, so the request path
+    never waits on a write. A background task flushes the buffer in
+    multi-row upserts of up to ``batch_size`` reports when it reaches the
+    batch size or the flush interval elapses, and drains it on shutdown.
+    Reports stay buffered until their batch is written, so a failed write
+    is retried on the next flush.
+    """
+
+    def __init__(
+        self, enabled: bool, batch_size: int, flush_seconds: float, max_pending: int
+    ):
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self._pending: dict[str, MetricReport] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def enqueue(self, report: MetricReport) -> None:
+        """Queue a report for persistence; a newer report for the same ID wins."""
+        if not self.enabled:
+            return
+
+        self._pending.pop(report.prompt_id, None)
+        self._pending[report.prompt_id] = report
+
+        while len(self._pending) > self.max_pending:
+            dropped = next(iter(self._pending))
+            del self._pending[dropped]
+            logger.warning(f"Analysis history buffer full, dropped {dropped}")
+
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def load(self, prompt_id: str) -> Optional[MetricReport]:
+        """Load a report from the buffer or the analysis_results table."""
+        if not self.enabled:
+            return None
+
+        if prompt_id in self._pending:
+            return self._pending[prompt_id]
+
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    select(AnalysisResult).where(AnalysisResult.id == prompt_id)
+                )
+                row = result.scalars().first()
+        except Exception as e:
+            logger.error(f"Failed to load analysis {prompt_id} from history: {e}")
+            return None
+
+        return _row_to_report(row) if row else None
+
+    def start(self) -> None:
+        """Start the background flush task."""
+        if self.enabled and self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush task and write everything still buffered."""
+        if self._task is not None:
+            # Let an in-flight flush finish rather than cancelling it mid-write
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+
+        await self.flush()
+
+    async def flush(self) -> int:
+        """
+        Write buffered reports in batches until the buffer is empty or a write fails.
+
+        Returns the number of reports written.
+        """
+        columns = len(AnalysisResult.__table__.columns)
+        batch_size = max(1, min(self.batch_size, MAX_BIND_PARAMETERS // columns))
+
+        written = 0
+        while self._pending:
+            batch = list(itertools.islice(self._pending.values(), batch_size))
+            persisted = await self._write(batch)
+            if persisted is None:
+                # Retry later; move the batch back so one bad batch cannot
+                # hold up the rest of the buffer
+                for report in batch:
+                    if self._pending.get(report.prompt_id) is report:
+                        del self._pending[report.prompt_id]
+                        self._pending[report.prompt_id] = report
+                break
+            written += persisted
+
+        return written
+
+    async def _write(self, batch: list[MetricReport]) -> Optional[int]:
+        """
+        Upsert a batch of reports, removing them from the buffer once written.
+
+        Reports that cannot be mapped to a row are logged and dropped.
+        Returns the number of rows written, or None if the write failed.
+        """
+        from sqlalchemy.dialects.postgresql import insert
+
+        rows = []
+        for report in batch:
+            try:
+                rows.append(_report_to_row(report))
+            except Exception as e:
+                logger.error(f"Dropping analysis {report.prompt_id} from history: {e}")
+                self._discard(report)
+
+        if rows:
+            try:
+                statement = insert(AnalysisResult.__table__).values(rows)
+                statement = statement.on_conflict_do_update(
+                    index_elements=["id"],
+                    set_={
+                        column: statement.excluded[column]
+                        for column in rows[0]
+                        if column != "id"
+                    },
+                )
+                async with AsyncSessionLocal() as session:
+                    await session.execute(statement)
+                    await session.commit()
+            except Exception as e:
+                logger.error(f"Failed to persist {len(rows)} analyses: {e}")
+                return None
+
+        # Reports re-queued with newer results while writing stay buffered
+        for report in batch:
+            self._discard(report)
+
+        logger.debug(f"Persisted {len(rows)} analyses")
+        return len(rows)
+
+    def _discard(self, report: MetricReport) -> None:
+        """Remove a report from the buffer unless a newer one replaced it."""
+        if self._pending.get(report.prompt_id) is report:
+            del self._pending[report.prompt_id]
+
+    async def _run(self) -> None:
+        """Flush on batch size or interval, whichever comes first."""
+        while not self._stopping:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_seconds)
+            self._wakeup.clear()
+            await self.flush()
+
+
+def _report_to_row(report: MetricReport) -> dict[str, Any]:
+    """Map a report onto analysis_results columns."""
+    return {
+        "id": report.prompt_id,
+        "prompt_id": None,  # Analyses are not linked to prompt-base entries
+        "prompt_content": report.original_prompt,
+        "detected_language": report.detected_language[:10],
+        "translated": report.translated,
+        "format_valid": report.format_valid,
+        "overall_score": report.overall_score,
+        "judge_score": report.judge_score.score,
+        "semantic_entropy": report.semantic_entropy.entropy,
+        "complexity_score": report.complexity_score,
+        "length_chars": report.length_chars,
+        "length_words": report.length_words,
+        "contradictions": [c.model_dump(mode="json") for c in report.contradictions],
+        "patches": [p.model_dump(mode="json") for p in report.patches],
+        "clarify_questions": [q.model_dump(mode="json") for q in report.clarify_questions],
+        # Report fields without a column of their own
+        "analysis_extra_metadata": {
+            "judge_score": report.judge_score.model_dump(mode="json"),
+            "semantic_entropy": report.semantic_entropy.model_dump(mode="json"),
+            "improvement_priority": report.improvement_priority,
+        },
+        "created_at": report.analyzed_at,
+    }
+
+
+def _row_to_report(row: AnalysisResult) -> MetricReport:
+    """Rebuild a report from its analysis_results row."""
+    extra = row.analysis_extra_metadata or {}
+
+    return MetricReport(
+        prompt_id=row.id,
+        original_prompt=row.prompt_content,
+        analyzed_at=row.created_at or datetime.utcnow(),
+        detected_language=row.detected_language,
+        translated=row.translated,
+        format_valid=row.format_valid,
+        judge_score=extra.get("judge_score")
+        or {"score": row.judge_score, "rationale": "Loaded from history"},
+        semantic_entropy=extra.get("semantic_entropy")
+        or {"entropy": row.semantic_entropy, "spread": 0.0, "clusters": 1, "samples": []},
+        contradictions=row.contradictions or [],
+        length_chars=row.length_chars,
+        length_words=row.length_words,
+        complexity_score=row.complexity_score,
+        patches=row.patches or [],
+        clarify_questions=row.clarify_questions or [],
+        overall_score=row.overall_score,
+        improvement_priority=extra.get("improvement_priority", "medium"),
+    )
+
+
+# Global writer instance
+_analysis_history: Optional[AnalysisHistoryWriter] = None
+
+
+def get_analysis_history() -> AnalysisHistoryWriter:
+    """Get or create the global analysis history writer."""
+    global _analysis_history
+    if _analysis_history is None:
+        _analysis_history = AnalysisHistoryWriter(
+            enabled=settings.analysis_history_enabled,
+            batch_size=settings.analysis_history_batch_size,
+            flush_seconds=settings.analysis_history_flush_seconds,
+            max_pending=settings.analysis_history_max_pending,
+        )
+    return _analysis_history
@@ -0,0 +1,267 @@
+"""Bounded analysis store shared by the analysis endpoints."""
+
+import gzip
+import hashlib
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+
+import orjson
+
+from app.core.config import settings
+from app.pipeline import PIPELINE_VERSION
+from app.schemas.pipeline import BlockIndex
+from app.schemas.prompts import MetricReport
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisStore(ABC):
+    """
+    Store for completed analysis reports.
+
+    Reports are kept as the gzip-compressed JSON response document rather
+    than live pydantic objects, so every backend holds the same compact form,
+    any worker can decode a report written by another, and the endpoints can
+    send the stored bytes without serializing the report again.
+    """
+
+    async def get(self, prompt_id: str) -> Optional[MetricReport]:
+        """Return the stored report for a prompt, if present."""
+        blob = await self.get_raw(prompt_id)
+        if blob is None:
+            return None
+        return decode_report(blob)
+
+    async def put(self, prompt_id: str, report: MetricReport) -> bytes:
+        """Store the report for a prompt, replacing any previous one.
+
+        Returns the stored document so callers can serve it directly.
+        """
+        document = encode_report(report)
+        await self.put_raw(prompt_id, document)
+        return document
+
+    async def get_blocks(self, prompt_id: str) -> Optional[BlockIndex]:
+        """Return the block-local results kept for incremental re-analysis."""
+        blob = await self.get_raw(f"blocks:{prompt_id}")
+        if blob is None:
+            return None
+        return BlockIndex.model_validate(orjson.loads(gzip.decompress(blob)))
+
+    async def put_blocks(self, prompt_id: str, index: BlockIndex) -> None:
+        """Store the block-local results of an analysis."""
+        blob = gzip.compress(orjson.dumps(index.model_dump(mode="json")), mtime=0)
+        await self.put_raw(f"blocks:{prompt_id}", blob)
+
+    @abstractmethod
+    async def get_raw(self, prompt_id: str) -> Optional[bytes]:
+        """Return the stored document for a key, if present."""
+
+    @abstractmethod
+    async def put_raw(self, prompt_id: str, blob: bytes) -> None:
+        """Store a document under a key, replacing any previous one."""
+
+    @abstractmethod
+    async def delete(self, prompt_id: str) -> None:
+        """Remove the document stored under a key."""
+
+    @abstractmethod
+    async def get_alias(self, key: str) -> Optional[str]:
+        """Resolve a lookup key (fingerprint, idempotency key) to its value."""
+
+    @abstractmethod
+    async def put_alias(self, key: str, value: str, ttl_seconds: float) -> None:
+        """Point a lookup key at a value for a limited time."""
+
+    @abstractmethod
+    async def ping(self) -> None:
+        """Raise if the backend is unreachable."""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Release backend resources."""
+
+
+class MemoryAnalysisStore(AnalysisStore):
+    """In-process LRU store bounded by entry count, total size and age."""
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._size = 0
+        self._aliases: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    async def get_raw(self, prompt_id: str) -> Optional[bytes]:
+        entry = self._entries.get(prompt_id)
+        if entry is None:
+            return None
+
+        expires_at, blob = entry
+        if expires_at <= time.monotonic():
+            self._remove(prompt_id)
+            return None
+
+        self._entries.move_to_end(prompt_id)
+        return blob
+
+    async def put_raw(self, prompt_id: str, blob: bytes) -> None:
+        if prompt_id in self._entries:
+            self._remove(prompt_id)
+
+        self._entries[prompt_id] = (time.monotonic() + self.ttl_seconds, blob)
+        self._size += len(blob)
+        self._evict()
+
+    async def delete(self, prompt_id: str) -> None:
+        if prompt_id in self._entries:
+            self._remove(prompt_id)
+
+    async def get_alias(self, key: str) -> Optional[str]:
+        entry = self._aliases.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._aliases[key]
+            return None
+
+        return value
+
+    async def put_alias(self, key: str, value: str, ttl_seconds: float) -> None:
+        self._aliases.pop(key, None)
+        self._aliases[key] = (time.monotonic() + ttl_seconds, value)
+
+        # Aliases only point at reports, so bound them by the same entry limit
+        while len(self._aliases) > self.max_entries:
+            self._aliases.popitem(last=False)
+
+    async def ping(self) -> None:
+        # In-process entries are always reachable
+        return None
+
+    async def close(self) -> None:
+        self._entries.clear()
+        self._aliases.clear()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, prompt_id: str) -> None:
+        _, blob = self._entries.pop(prompt_id)
+        self._size -= len(blob)
+
+    def _evict(self) -> None:
+        """Drop expired entries from the cold end, then least recently used ones."""
+        now = time.monotonic()
+        while self._entries:
+            prompt_id, (expires_at, _) = next(iter(self._entries.items()))
+            over_limit = len(self._entries) > self.max_entries or self._size > self.max_bytes
+            if not over_limit and expires_at > now:
+                break
+            self._remove(prompt_id)
+
+
+class RedisAnalysisStore(AnalysisStore):
+    """Store shared across workers through Redis, with per-key expiry."""
+
+    key_prefix = "curestry:analysis:"
+    alias_prefix = "curestry:alias:"
+
+    def __init__(self, url: str, ttl_seconds: float):
+        import redis.asyncio as redis
+
+        self.ttl_seconds = int(ttl_seconds)
+        self.client = redis.from_url(url)
+
+    async def get_raw(self, prompt_id: str) -> Optional[bytes]:
+        return await self.client.get(self.key_prefix + prompt_id)
+
+    async def put_raw(self, prompt_id: str, blob: bytes) -> None:
+        await self.client.set(self.key_prefix + prompt_id, blob, ex=self.ttl_seconds)
+
+    async def delete(self, prompt_id: str) -> None:
+        await self.client.delete(self.key_prefix + prompt_id)
+
+    async def get_alias(self, key: str) -> Optional[str]:
+        value = await self.client.get(self.alias_prefix + key)
+        return value.decode("utf-8") if value is not None else None
+
+    async def put_alias(self, key: str, value: str, ttl_seconds: float) -> None:
+        await self.client.set(self.alias_prefix + key, value, ex=max(1, int(ttl_seconds)))
+
+    async def ping(self) -> None:
+        await self.client.ping()
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def content_fingerprint(
+    content: str, format_type: str, entropy_mode: Optional[str] = None
+) -> str:
+    """
+    Fingerprint the inputs that determine an analysis result.
+
+    Runs of spaces and tabs, trailing whitespace and line endings are
+    normalized, but line structure is kept since it matters for markup.
+    """
+    normalized = "\n".join(" ".join(line.split()) for line in content.strip().splitlines())
+    key = "\0".join((PIPELINE_VERSION, format_type, entropy_mode or "", normalized))
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def encode_report(report: MetricReport) -> bytes:
+    """
+    Serialize a report to its stored form: the gzip-compressed JSON body
+    of an AnalyzeResponse.
+
+    The report is dumped once and the patches and questions lists are
+    shared with the top-level keys instead of being serialized separately.
+    A fixed gzip mtime keeps the bytes deterministic for a given report.
+    """
+    data = report.model_dump(mode="json")
+    document = {
+        "report": data,
+        "patches": data["patches"],
+        "questions": data["clarify_questions"],
+    }
+    return gzip.compress(orjson.dumps(document), compresslevel=6, mtime=0)
+
+
+def decode_report(blob: bytes) -> MetricReport:
+    """Rebuild a report from its stored form."""
+    return MetricReport.model_validate(orjson.loads(gzip.decompress(blob))["report"])
+
+
+def create_analysis_store(url: str) -> AnalysisStore:
+    """Create a store for a backend URL (memory:// or redis://)."""
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisAnalysisStore(url, settings.analysis_store_ttl_seconds)
+
+    if url and not url.startswith("memory://"):
+        raise ValueError(f"Unsupported analysis store URL: {url}")
+
+    return MemoryAnalysisStore(
+        max_entries=settings.analysis_store_max_entries,
+        max_bytes=settings.analysis_store_max_bytes,
+        ttl_seconds=settings.analysis_store_ttl_seconds,
+    )
+
+
+# Global store instance
+_analysis_store: Optional[AnalysisStore] = None
+
+
+def get_analysis_store() -> AnalysisStore:
+    """Get or create the global analysis store instance."""
+    global _analysis_store
+    if _analysis_store is None:
+        _analysis_store = create_analysis_store(settings.analysis_store_url)
+    return _analysis_store
@@ -1,12 +1,13 @@
 """Embeddings service for semantic analysis."""
 
 import logging
+import time
 from typing import List, Optional
 
 import numpy as np
-from openai import OpenAI
 
 from app.core.config import settings
+from app.core.timing import record_llm_call
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +16,7 @@ class EmbeddingsService:
     """Service for generating text embeddings using OpenAI."""
 
     def __init__(self):
-        self.client: Optional[OpenAI] = None
+        self.client = None
         self.model = "text-embedding-3-small"  # Efficient embedding model
 
     def _ensure_client(self):
@@ -23,6 +24,8 @@ class EmbeddingsService:
         if self.client is None:
             if not settings.openai_api_key:
                 raise ValueError("OpenAI API key not configured")
+            from openai import OpenAI
+
             self.client = OpenAI(api_key=settings.openai_api_key)
 
     def embed_text(self, text: str) -> List[float]:
@@ -35,10 +38,12 @@ class EmbeddingsService:
             if len(cleaned_text) > 8000:  # Reasonable limit for embeddings
                 cleaned_text = cleaned_text[:8000]
 
+            started = time.perf_counter()
             response = self.client.embeddings.create(
                 model=self.model,
                 input=cleaned_text
             )
+            record_llm_call("embed", self.model, started, response.usage)
 
             embedding = response.data[0].embedding
             logger.debug(f"Generated embedding for text of length {len(text)}")
@@ -70,10 +75,12 @@ class EmbeddingsService:
             for i in range(0, len(cleaned_texts), batch_size):
                 batch = cleaned_texts[i:i + batch_size]
 
+                started = time.perf_counter()
                 response = self.client.embeddings.create(
                     model=self.model,
                     input=batch
                 )
+                record_llm_call("embed", self.model, started, response.usage)
 
                 batch_embeddings = [item.embedding for item in response.data]
                 embeddings.extend(batch_embeddings)
@@ -0,0 +1,96 @@
+"""Cache of rendered report exports, keyed by report version."""
+
+import logging
+from collections import OrderedDict
+from typing import Iterable, Iterator, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ExportCache:
+    """
+    In-process LRU of rendered exports bounded by total size.
+
+    Each (prompt, format) pair holds at most one rendering, tagged with the
+    version of the report it was rendered from, so a re-analysed report
+    simply replaces its stale rendering. Exports larger than the per-entry
+    limit are never cached and keep streaming on every request.
+    """
+
+    def __init__(self, max_bytes: int, max_entry_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries: OrderedDict[tuple[str, str], tuple[str, bytes]] = OrderedDict()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, prompt_id: str, format_type: str, version: str) -> Optional[bytes]:
+        """Return the rendering of this report version, if cached."""
+        key = (prompt_id, format_type)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != version:
+            return None
+
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, prompt_id: str, format_type: str, version: str, content: bytes) -> None:
+        """Cache a rendering, replacing any rendering of an older version."""
+        if len(content) > self.max_entry_bytes:
+            return
+
+        key = (prompt_id, format_type)
+        self._remove(key)
+        self._entries[key] = (version, content)
+        self._size += len(content)
+
+        while self._size > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+
+    def render_through(
+        self, prompt_id: str, format_type: str, version: str, chunks: Iterable[bytes]
+    ) -> Iterator[bytes]:
+        """
+        Pass rendered chunks through while collecting them for the cache.
+
+        Collection stops once the export exceeds the per-entry limit, so
+        memory stays bounded by that limit however large the export is.
+        """
+        collected: Optional[list[bytes]] = []
+        size = 0
+
+        for chunk in chunks:
+            if collected is not None:
+                size += len(chunk)
+                if size > self.max_entry_bytes:
+                    collected = None
+                else:
+                    collected.append(chunk)
+            yield chunk
+
+        if collected is not None:
+            self.put(prompt_id, format_type, version, b"".join(collected))
+
+    def _remove(self, key: tuple[str, str]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[1])
+
+
+# Global cache instance
+_export_cache: Optional[ExportCache] = None
+
+
+def get_export_cache() -> ExportCache:
+    """Get or create the global export cache instance."""
+    global _export_cache
+    if _export_cache is None:
+        _export_cache = ExportCache(
+            max_bytes=settings.export_cache_max_bytes,
+            max_entry_bytes=settings.export_cache_max_entry_bytes,
+        )
+    return _export_cache
@@ -0,0 +1,167 @@
+"""Background health monitor of the services the API depends on."""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.database import check_db_connection
+from app.schemas.prompts import DependencyHealth
+from app.services.analysis_store import RedisAnalysisStore, get_analysis_store
+from app.services.llm import get_llm_service
+
+logger = logging.getLogger(__name__)
+
+# A probe returns normally when its dependency is up and raises otherwise
+Probe = Callable[[], Awaitable[None]]
+
+
+class HealthMonitor:
+    """
+    Probes dependencies on its own schedule and caches the results.
+
+    Each dependency is probed by a separate task every ``interval`` seconds;
+    after a failure the delay doubles up to ``max_backoff`` so an outage is
+    not hammered. Health endpoints only read the cached results, so a probe
+    never runs on the request path and its cost does not grow with the
+    number of replicas or the healthcheck frequency.
+    """
+
+    def __init__(
+        self,
+        probes: dict[str, Optional[Probe]],
+        interval: float,
+        timeout: float,
+        max_backoff: float,
+        stale_after: float,
+    ):
+        self.interval = interval
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.stale_after = stale_after
+        self._probes = {name: probe for name, probe in probes.items() if probe is not None}
+        self._results = {
+            name: DependencyHealth(status="unknown" if probe else "disabled")
+            for name, probe in probes.items()
+        }
+        self._checked: dict[str, float] = {}
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Start one probe task per enabled dependency."""
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._run(name)) for name in self._probes
+            ]
+
+    async def stop(self) -> None:
+        """Cancel the probe tasks."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def snapshot(self) -> dict[str, DependencyHealth]:
+        """Cached result for every dependency, with its current age."""
+        now = time.monotonic()
+        snapshot = {}
+        for name, result in self._results.items():
+            if name in self._checked:
+                age = now - self._checked[name]
+                result = result.model_copy(
+                    update={"age_seconds": round(age, 3), "stale": age > self.stale_after}
+                )
+            snapshot[name] = result
+        return snapshot
+
+    def is_ready(self, required: list[str], snapshot: dict[str, DependencyHealth]) -> bool:
+        """Whether every required dependency is disabled or freshly probed as up."""
+        return all(
+            snapshot[name].status == "disabled"
+            or (snapshot[name].status == "ok" and not snapshot[name].stale)
+            for name in required
+            if name in snapshot
+        )
+
+    async def check(self, name: str) -> DependencyHealth:
+        """Probe one dependency now and cache the result."""
+        previous = self._results[name]
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._probes[name](), timeout=self.timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            result = DependencyHealth(
+                status="failing",
+                consecutive_failures=previous.consecutive_failures + 1,
+                error=error,
+            )
+            if previous.status != "failing":
+                logger.warning(f"Health probe for {name} failing: {error}")
+        else:
+            result = DependencyHealth(status="ok")
+            if previous.status == "failing":
+                logger.info(f"Health probe for {name} recovered")
+
+        result.latency_ms = round((time.perf_counter() - started) * 1000, 2)
+        result.checked_at = datetime.utcnow()
+        self._results[name] = result
+        self._checked[name] = time.monotonic()
+
+        metrics.observe(f"health.{name}.latency_ms", result.latency_ms)
+        metrics.set_gauge(f"health.{name}.up", 1.0 if result.status == "ok" else 0.0)
+        return result
+
+    async def _run(self, name: str) -> None:
+        """Probe a dependency forever, backing off while it fails."""
+        while True:
+            result = await self.check(name)
+            delay = self.interval
+            if result.consecutive_failures:
+                delay = min(self.max_backoff, self.interval * 2 ** (result.consecutive_failures - 1))
+            await asyncio.sleep(delay)
+
+
+async def _probe_openai() -> None:
+    """Look up the cheap model, which checks the key and the API without using tokens."""
+    await get_llm_service().client.models.retrieve(settings.openai_model_cheap)
+
+
+async def _probe_database() -> None:
+    if not await check_db_connection():
+        raise ConnectionError("Database query failed")
+
+
+async def _probe_redis() -> None:
+    await get_analysis_store().ping()
+
+
+# Global monitor instance
+_health_monitor: Optional[HealthMonitor] = None
+
+
+def get_health_monitor() -> HealthMonitor:
+    """Get the global health monitor instance."""
+    global _health_monitor
+    if _health_monitor is None:
+        _health_monitor = HealthMonitor(
+            probes={
+                "openai": _probe_openai if settings.openai_api_key else None,
+                "database": _probe_database,
+                "redis": (
+                    _probe_redis
+                    if isinstance(get_analysis_store(), RedisAnalysisStore)
+                    else None
+                ),
+            },
+            interval=settings.health_probe_interval_seconds,
+            timeout=settings.health_probe_timeout_seconds,
+            max_backoff=settings.health_probe_max_backoff_seconds,
+            stale_after=settings.health_stale_after_seconds,
+        )
+    return _health_monitor
@@ -1,20 +1,31 @@
 import logging
-from typing import List, Literal
+import time
+from typing import List, Literal, TypeVar
 
-from openai import OpenAI
+from pydantic import BaseModel
 
 from app.core.config import settings
+from app.core.timing import record_llm_call
 
 logger = logging.getLogger(__name__)
 
 ModelTier = Literal["cheap", "standard", "premium"]
 
+StructuredOutput = TypeVar("StructuredOutput", bound=BaseModel)
+
+
+class StructuredOutputMissing(ValueError):
+    """A structured request completed but the model refused or returned nothing."""
+
 
 class OpenAIService:
     """OpenAI service with tier-based model selection for cost optimization."""
 
     def __init__(self):
-        self.client = OpenAI(api_key=settings.openai_api_key)
+        # Imported here so the SDK loads with the first LLM call, not at startup
+        from openai import AsyncOpenAI
+
+        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
         self.models = {
             "cheap": settings.openai_model_cheap,
             "standard": settings.openai_model_standard,
@@ -39,12 +50,14 @@ class OpenAIService:
         if "max_tokens" in kwargs:
             kwargs["max_completion_tokens"] = kwargs.pop("max_tokens")
 
+        started = time.perf_counter()
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=model,
                 messages=[{"role": "user", "content": prompt}],
                 **kwargs
             )
+            record_llm_call("ask", model, started, response.usage, tier=model_tier)
 
             result = response.choices[0].message.content
 
@@ -61,6 +74,7 @@ class OpenAIService:
             return result or ""
 
         except Exception as e:
+            record_llm_call("ask", model, started, tier=model_tier, failed=True)
             logger.error(
                 f"OpenAI request failed: {str(e)}",
                 extra={
@@ -72,7 +86,81 @@ class OpenAIService:
             )
             raise
 
-    async def sample_for_entropy(self, prompt: str, n: int = None) -> List[str]:
+    async def ask_structured(
+        self,
+        model_tier: ModelTier,
+        prompt: str,
+        schema: type[StructuredOutput],
+        **kwargs,
+    ) -> StructuredOutput:
+        """
+        Send a prompt and get a response constrained to a pydantic schema.
+
+        The schema is sent as a strict JSON schema response format, so the
+        reply is decoded straight into a validated model instead of being
+        recovered from free text.
+
+        Args:
+            model_tier: Model tier to use (cheap/standard/premium)
+            prompt: The prompt to send
+            schema: Pydantic model describing the expected response
+            **kwargs: Additional parameters for OpenAI API
+
+        Returns:
+            Validated instance of ``schema``
+        """
+        model = self.models[model_tier]
+
+        if "max_tokens" in kwargs:
+            kwargs["max_completion_tokens"] = kwargs.pop("max_tokens")
+
+        started = time.perf_counter()
+        try:
+            response = await self.client.beta.chat.completions.parse(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                response_format=schema,
+                **kwargs
+            )
+            record_llm_call("ask_structured", model, started, response.usage, tier=model_tier)
+
+            message = response.choices[0].message
+            if message.refusal:
+                raise StructuredOutputMissing(
+                    f"Model refused structured request: {message.refusal}"
+                )
+            if message.parsed is None:
+                raise StructuredOutputMissing("Model returned no structured content")
+
+            logger.info(
+                f"OpenAI structured request completed",
+                extra={
+                    "model": model,
+                    "tier": model_tier,
+                    "schema": schema.__name__,
+                    "prompt_length": len(prompt),
+                }
+            )
+
+            return message.parsed
+
+        except Exception as e:
+            # Refusals and empty replies were already recorded as completed calls
+            if not isinstance(e, StructuredOutputMissing):
+                record_llm_call("ask_structured", model, started, tier=model_tier, failed=True)
+            logger.error(
+                f"OpenAI structured request failed: {str(e)}",
+                extra={
+                    "model": model,
+                    "tier": model_tier,
+                    "schema": schema.__name__,
+                    "error": str(e),
+                    "prompt_length": len(prompt),
+                }
+            )
+            raise
+
+    async def sample_for_entropy(self, prompt: str, n: int = None, **kwargs) -> List[str]:
         """
         Generate multiple responses for semantic entropy analysis.
         Uses cheap model for cost efficiency.
@@ -80,20 +168,26 @@ class OpenAIService:
         Args:
             prompt: The prompt to sample responses for
             n: Number of samples (defaults to settings.entropy_n)
+            **kwargs: Additional parameters for OpenAI API (e.g. temperature)
 
         Returns:
             List of response strings
         """
         n = n or settings.entropy_n
 
+        if "max_tokens" in kwargs:
+            kwargs["max_completion_tokens"] = kwargs.pop("max_tokens")
+
+        started = time.perf_counter()
         try:
             # Use cheap model for cost efficiency
-            # Note: max_completion_tokens conversion handled in ask() method
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=self.models["cheap"],
                 messages=[{"role": "user", "content": prompt}],
-                n=n  # Generate multiple responses in one request
+                n=n,  # Generate multiple independent responses in one request
+                **kwargs
             )
+            record_llm_call("sample_for_entropy", self.models["cheap"], started, response.usage, tier="cheap")
 
             results = [choice.message.content or "" for choice in response.choices]
 
@@ -110,6 +204,7 @@ class OpenAIService:
             return results
 
         except Exception as e:
+            record_llm_call("sample_for_entropy", self.models["cheap"], started, tier="cheap", failed=True)
             logger.error(
                 f"Entropy sampling failed: {str(e)}",
                 extra={
@@ -120,6 +215,64 @@ class OpenAIService:
             )
             raise
 
+    async def sample_logprobs(
+        self, prompt: str, top_k: int = 5, **kwargs
+    ) -> tuple[str, List[List[float]]]:
+        """
+        Generate one completion with its top-k token log probabilities.
+        Uses cheap model for cost efficiency.
+
+        Args:
+            prompt: The prompt to complete
+            top_k: Number of alternative tokens returned per position
+            **kwargs: Additional parameters for OpenAI API
+
+        Returns:
+            Tuple of (response text, top-k logprobs for each generated token)
+        """
+        if "max_tokens" in kwargs:
+            kwargs["max_completion_tokens"] = kwargs.pop("max_tokens")
+
+        started = time.perf_counter()
+        try:
+            response = await self.client.chat.completions.create(
+                model=self.models["cheap"],
+                messages=[{"role": "user", "content": prompt}],
+                logprobs=True,
+                top_logprobs=top_k,
+                **kwargs
+            )
+            record_llm_call("sample_logprobs", self.models["cheap"], started, response.usage, tier="cheap")
+
+            choice = response.choices[0]
+            tokens = choice.logprobs.content if choice.logprobs else None
+            distributions = [
+                [alternative.logprob for alternative in token.top_logprobs]
+                for token in tokens or []
+            ]
+
+            logger.info(
+                f"Logprob sampling completed",
+                extra={
+                    "model": self.models["cheap"],
+                    "tokens": len(distributions),
+                    "prompt_length": len(prompt),
+                }
+            )
+
+            return choice.message.content or "", distributions
+
+        except Exception as e:
+            record_llm_call("sample_logprobs", self.models["cheap"], started, tier="cheap", failed=True)
+            logger.error(
+                f"Logprob sampling failed: {str(e)}",
+                extra={
+                    "error": str(e),
+                    "prompt_length": len(prompt),
+                }
+            )
+            raise
+
     async def judge_prompt(self, prompt: str, rubric: str = None) -> str:
         """
         Evaluate prompt quality using premium model for accuracy.
@@ -0,0 +1,173 @@
+"""Span-based patch application engine."""
+
+import difflib
+import logging
+
+from app.schemas.prompts import Patch, PatchConflict
+
+logger = logging.getLogger(__name__)
+
+
+def anchor_patches(text: str, patches: list[Patch]) -> list[Patch]:
+    """
+    Fill in missing spans by locating each patch's original text.
+
+    Patches that already carry a span are left untouched. Patches whose
+    original text does not occur in ``text`` stay unanchored and will be
+    reported as conflicts when applied.
+    """
+    for patch in patches:
+        if patch.start is not None or not patch.original:
+            continue
+
+        start = text.find(patch.original)
+        if start >= 0:
+            patch.start = start
+            patch.end = start + len(patch.original)
+
+    return patches
+
+
+def remap_patches(source: str, target: str, patches: list[Patch]) -> list[Patch]:
+    """
+    Move patch spans from ``source`` to the same text in ``target``.
+
+    Used for patches anchored in the vocabulary-unified text, which differs
+    from the prompt only where terms were replaced. The k-th occurrence of
+    a patch's original text in ``source`` maps to its k-th occurrence in
+    ``target``; when the texts contain it a different number of times, or
+    the span is not one of those occurrences, the patch is left unanchored.
+    """
+    if source == target:
+        return patches
+
+    for patch in patches:
+        if patch.start is None:
+            continue
+
+        source_offsets = _occurrences(source, patch.original)
+        target_offsets = _occurrences(target, patch.original)
+        start = patch.start
+        patch.start = patch.end = None
+        if len(source_offsets) == len(target_offsets) and start in source_offsets:
+            patch.start = target_offsets[source_offsets.index(start)]
+            patch.end = patch.start + len(patch.original)
+
+    return patches
+
+
+def _occurrences(text: str, part: str) -> list[int]:
+    """Offsets of every occurrence of ``part`` in ``text``."""
+    offsets = []
+    start = text.find(part)
+    while start >= 0 and part:
+        offsets.append(start)
+        start = text.find(part, start + 1)
+    return offsets
+
+
+def diff_span(old: str, new: str) -> tuple[int, int, int]:
+    """
+    Locate the part of ``old`` that ``new`` rewrites, widened to whole words.
+
+    Returns (start, old_end, new_end): ``old[start:old_end]`` is replaced by
+    ``new[start:new_end]`` and the text around it is shared.
+    """
+    limit = min(len(old), len(new))
+    start = 0
+    while start < limit and old[start] == new[start]:
+        start += 1
+    suffix = 0
+    while suffix < limit - start and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+
+    while start > 0 and not old[start - 1].isspace():
+        start -= 1
+    while suffix > 0 and not old[len(old) - suffix].isspace():
+        suffix -= 1
+
+    return start, len(old) - suffix, len(new) - suffix
+
+
+def apply_patches(
+    text: str, patches: list[Patch]
+) -> tuple[str, list[str], list[PatchConflict]]:
+    """
+    Apply patches to ``text`` in a single pass over their spans.
+
+    Patches are ordered by span. A patch is rejected when it has no span,
+    when its original text no longer matches the text at its span, or when
+    its span overlaps a patch that was already accepted.
+
+    Args:
+        text: The analyzed prompt the patch spans point into
+        patches: Patches to apply, in request order
+
+    Returns:
+        Tuple of (patched text, applied patch IDs, conflicts)
+    """
+    conflicts: list[PatchConflict] = []
+    candidates: list[tuple[int, int, int, Patch]] = []
+
+    for order, patch in enumerate(patches):
+        if patch.start is None or patch.end is None:
+            conflicts.append(
+                PatchConflict(patch_id=patch.id, reason="Patch is not anchored to the prompt text")
+            )
+        elif patch.start > patch.end or patch.end > len(text):
+            conflicts.append(
+                PatchConflict(patch_id=patch.id, reason="Patch span is outside the prompt")
+            )
+        elif text[patch.start:patch.end] != patch.original:
+            conflicts.append(
+                PatchConflict(
+                    patch_id=patch.id,
+                    reason="Original text does not match the prompt at the patch span",
+                )
+            )
+        else:
+            candidates.append((patch.start, patch.end, order, patch))
+
+    candidates.sort(key=lambda candidate: candidate[:3])
+
+    pieces: list[str] = []
+    applied: list[str] = []
+    cursor = 0
+    previous: Patch | None = None
+
+    for start, end, _, patch in candidates:
+        # Overlapping spans, or two insertions at the same offset, are ambiguous
+        if previous is not None and (
+            start < cursor or (start == end == previous.start == previous.end)
+        ):
+            conflicts.append(
+                PatchConflict(
+                    patch_id=patch.id,
+                    reason="Patch span overlaps another applied patch",
+                    conflicts_with=previous.id,
+                )
+            )
+            continue
+
+        pieces.append(text[cursor:start])
+        pieces.append(patch.improved)
+        applied.append(patch.id)
+        cursor = end
+        previous = patch
+
+    pieces.append(text[cursor:])
+
+    return "".join(pieces), applied, conflicts
+
+
+def unified_diff(original: str, improved: str, name: str = "prompt") -> str:
+    """Build a unified diff between two versions of a prompt."""
+    lines = difflib.unified_diff(
+        original.splitlines(keepends=True),
+        improved.splitlines(keepends=True),
+        fromfile=f"{name} (original)",
+        tofile=f"{name} (improved)",
+    )
+
+    # Keep a missing final newline from gluing two diff lines together
+    return "".join(line if line.endswith("\n") else line + "\n" for line in lines)
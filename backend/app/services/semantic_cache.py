@@ -0,0 +1,90 @@
+"""Near-duplicate lookup of recently analyzed prompts."""
+
+import asyncio
+import logging
+from typing import Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.embeddings import get_embeddings_service
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """
+    In-process vector index over recently analyzed prompts.
+
+    Embeddings are kept unit-normalized in a fixed-size float32 matrix used
+    as a ring buffer, so a lookup is one matrix-vector product. Entries are
+    partitioned by variant (format type and entropy mode) so only analyses
+    produced under the same settings can match.
+    """
+
+    def __init__(self, max_entries: int, threshold: float):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._vectors: Optional[np.ndarray] = None
+        self._prompt_ids: list[Optional[str]] = [None] * max_entries
+        self._variants = np.empty(max_entries, dtype=object)
+        self._next = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    async def embed(self, content: str) -> Optional[np.ndarray]:
+        """Embed a prompt, returning None when embeddings are unavailable."""
+        embeddings_service = get_embeddings_service()
+
+        try:
+            embedding = await asyncio.to_thread(embeddings_service.embed_text, content)
+        except Exception as e:
+            logger.warning(f"Semantic cache embedding failed: {e}")
+            return None
+
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def search(self, variant: str, vector: np.ndarray) -> Optional[tuple[str, float]]:
+        """Return the most similar entry of the same variant above the threshold."""
+        if self._vectors is None or self._size == 0:
+            return None
+
+        similarities = self._vectors[: self._size] @ vector
+        similarities[self._variants[: self._size] != variant] = -1.0
+
+        best = int(np.argmax(similarities))
+        similarity = float(similarities[best])
+        if similarity < self.threshold:
+            return None
+
+        return self._prompt_ids[best], similarity
+
+    def add(self, prompt_id: str, variant: str, vector: np.ndarray) -> None:
+        """Index an analyzed prompt, overwriting the oldest entry when full."""
+        if self._vectors is None:
+            self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+
+        self._vectors[self._next] = vector
+        self._prompt_ids[self._next] = prompt_id
+        self._variants[self._next] = variant
+        self._next = (self._next + 1) % self.max_entries
+        self._size = min(self._size + 1, self.max_entries)
+
+
+# Global cache instance
+_semantic_cache: Optional[SemanticCache] = None
+
+
+def get_semantic_cache() -> SemanticCache:
+    """Get or create the global semantic cache instance."""
+    global _semantic_cache
+    if _semantic_cache is None:
+        _semantic_cache = SemanticCache(
+            max_entries=settings.semantic_cache_max_entries,
+            threshold=settings.semantic_cache_threshold,
+        )
+    return _semantic_cache
@@ -0,0 +1,5 @@
+"""Reproducible benchmarks for the backend hot paths.
+
+Run a benchmark from the backend directory, e.g.
+``python -m benchmarks.markup_repair``.
+"""
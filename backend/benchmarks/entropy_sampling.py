@@ -0,0 +1,108 @@
+"""Entropy sampling benchmark: round-trips, tokens and latency per strategy.
+
+Run ``python -m benchmarks.entropy_sampling`` from the backend directory with
+OPENAI_API_KEY set; it calls the cheap model for every prompt of the entropy
+calibration corpus. Three ways of drawing ``--n`` samples are compared:
+
+* ``list``: the previous path, one completion asked to write N numbered
+  variations, falling back to one call per sample when the list does not parse
+* ``n``: one request with the ``n`` parameter (``_generate_semantic_samples``)
+* ``adaptive``: the node's wave sampling with early stopping, embeddings included
+"""
+
+import argparse
+import asyncio
+import re
+import statistics
+import sys
+import time
+
+from app.core.config import settings
+from app.core.timing import start_collecting
+from app.pipeline.entropy_nodes import (
+    CALIBRATION_CORPUS,
+    _generate_semantic_samples,
+    _sample_adaptively,
+)
+from app.services.llm import get_llm_service
+
+# The numbered-list prompt the entropy node used before switching to ``n``
+LIST_PROMPT = """Given this prompt/instruction, generate {n} different but valid interpretations or responses. Each should capture the essence but vary in approach, focus, or specific details.
+
+Original prompt:
+{content}
+
+Generate {n} variations that are semantically related but show different possible interpretations. Each variation should be 50-200 words.
+
+Format as numbered list:
+1. [First variation]
+2. [Second variation]
+...
+"""
+LIST_ITEM_RE = re.compile(r'^\s*\d+\.\s*(.+?)(?=^\s*\d+\.|\Z)', re.MULTILINE | re.DOTALL)
+
+
+async def _list_samples(content: str, n: int) -> list[str]:
+    llm = get_llm_service()
+    response = await llm.ask("cheap", LIST_PROMPT.format(n=n, content=content), max_tokens=n * 100 + 200)
+    samples = [item.strip() for item in LIST_ITEM_RE.findall(response) if len(item.strip()) > 20]
+    if len(samples) >= n // 2:
+        return samples[:n]
+
+    responses = await asyncio.gather(*(
+        llm.ask("cheap", f"Interpret this prompt from a different angle:\n{content}", max_tokens=200)
+        for _ in range(n)
+    ))
+    return [response.strip() for response in responses]
+
+
+STRATEGIES = {
+    "list": _list_samples,
+    "n": _generate_semantic_samples,
+    "adaptive": lambda content, _n: _sample_adaptively(content),
+}
+
+
+async def measure(strategy: str, content: str, n: int) -> dict:
+    """Draw samples for one prompt and report what it cost."""
+    collector = start_collecting()
+    started = time.perf_counter()
+    result = await STRATEGIES[strategy](content, n)
+    samples = result[0] if isinstance(result, tuple) else result
+
+    return {
+        "ms": (time.perf_counter() - started) * 1000,
+        "calls": len(collector.llm_calls),
+        "tokens": sum(call.completion_tokens or 0 for call in collector.llm_calls),
+        "samples": len(samples),
+    }
+
+
+async def run(n: int, strategies: list[str]) -> None:
+    print(f"{'strategy':<10} {'p50 ms':>9} {'max ms':>9} {'calls':>6} {'tokens':>7} {'samples':>8}")
+    for strategy in strategies:
+        rows = [await measure(strategy, content, n) for content in CALIBRATION_CORPUS]
+        latencies = [row["ms"] for row in rows]
+        print(
+            f"{strategy:<10} {statistics.median(latencies):>9.0f} {max(latencies):>9.0f} "
+            f"{sum(row['calls'] for row in rows):>6} {sum(row['tokens'] for row in rows):>7} "
+            f"{sum(row['samples'] for row in rows):>8}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=settings.entropy_n)
+    parser.add_argument("--strategy", action="append", choices=sorted(STRATEGIES))
+    args = parser.parse_args()
+
+    if not settings.openai_api_key:
+        print("OPENAI_API_KEY is not set; this benchmark calls the OpenAI API")
+        return 2
+
+    asyncio.run(run(args.n, args.strategy or list(STRATEGIES)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""Lint benchmark: p50/p99 latency of lint_prompt by prompt size.
+
+Run ``python -m benchmarks.lint`` from the backend directory. Each size is
+built from realistic instruction paragraphs in plain text, markdown and XML
+(with a few markup errors, contractions and conflicting rules), linted
+``--runs`` times, and reported against ``settings.lint_p99_target_ms``.
+Larger prompts are rejected by /analyze/lint, so with ``--check`` it fails
+when a size at or below ``settings.lint_max_chars`` misses the target.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from collections.abc import Callable
+
+from app.core.config import settings
+from app.pipeline.lint import lint_prompt
+
+PARAGRAPHS = (
+    "You are a support assistant for a payments company. You must always answer "
+    "briefly and cite the policy section you relied on. Don't promise refund dates.",
+    "Never answer briefly when the customer reports fraud; explain every step in "
+    "detail instead. It's fine to ask for the transaction ID in order to help.",
+    "Include the customer's name in the greeting. Remove any card numbers from "
+    "quoted messages. All replies should be in the customer's language.",
+    "Set up a follow-up reminder when a chargeback is opened, and log in to the "
+    "dispute portal to attach the e-mail thread before the deadline.",
+)
+
+
+def _text(kb: int) -> str:
+    return _repeat(lambda i: PARAGRAPHS[i % len(PARAGRAPHS)], "\n\n", kb)
+
+
+def _markdown(kb: int) -> str:
+    return _repeat(
+        lambda i: f"## Rule {i}\n\n-{PARAGRAPHS[i % len(PARAGRAPHS)]}", "\n\n", kb
+    )
+
+
+def _xml(kb: int) -> str:
+    body = _repeat(
+        lambda i: f"<rule id={i}>{PARAGRAPHS[i % len(PARAGRAPHS)]} & more</rule>", "\n", kb
+    )
+    return f"<prompt>\n{body}\n"[:kb * 1024]
+
+
+def _repeat(paragraph: Callable[[int], str], separator: str, kb: int) -> str:
+    parts = []
+    size = 0
+    while size < kb * 1024:
+        parts.append(paragraph(len(parts)))
+        size += len(parts[-1]) + len(separator)
+    return separator.join(parts)[:kb * 1024]
+
+
+FORMATS = {"text": _text, "markdown": _markdown, "xml": _xml}
+
+
+def lint_percentiles(content: str, runs: int) -> tuple[float, float]:
+    """(p50, p99) milliseconds of linting the content."""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        lint_prompt(content)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--kb", type=int, action="append", help="Prompt sizes in KB")
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--check", action="store_true")
+    args = parser.parse_args()
+
+    target = settings.lint_p99_target_ms
+    failed = False
+    print(f"{'format':<9} {'size':>6} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, build in FORMATS.items():
+        for kb in args.kb or [1, 2, 4, 8, 16, 32]:
+            content = build(kb)
+            p50, p99 = lint_percentiles(content, args.runs)
+            gated = len(content) > settings.lint_max_chars
+            note = " (over lint_max_chars)" if gated else ""
+            print(f"{name:<9} {kb:>4}KB {p50:>8.2f} {p99:>8.2f}{note}")
+            if args.check and not gated and p99 > target:
+                print(f"FAIL: {name} at {kb}KB misses the {target:.0f} ms p99 target")
+                failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""Logging benchmark: messages per second with and without the writer thread.
+
+Run ``python -m benchmarks.logging_throughput`` from the backend directory.
+The same burst of JSON log records is written to ``--sink`` (``/dev/null``
+by default) through:
+
+* ``sync``: the previous setup, a StreamHandler formatting and writing on
+  the calling thread
+* ``queue``: the setup from ``configure_logging``, a non-blocking
+  DroppingQueueHandler in front of a JSON writer thread
+
+``caller msg/s`` is what the logging code sees, ``written msg/s`` includes
+draining the queue, and ``dropped`` counts records discarded because the
+queue held ``--queue-size`` records.
+"""
+
+import argparse
+import logging
+import os
+import queue
+import sys
+import time
+
+from app.core.config import settings
+from app.core.logging import DroppingQueueHandler, DropReportingListener, JSONFormatter
+
+
+def _log_burst(logger: logging.Logger, messages: int) -> float:
+    """Seconds the caller spends logging ``messages`` records."""
+    started = time.perf_counter()
+    for i in range(messages):
+        logger.info("Analysis completed for prompt %s, score: %.1f", i, 7.5, extra={"lane": "batch"})
+    return time.perf_counter() - started
+
+
+def measure_sync(sink, messages: int) -> tuple[float, float, int]:
+    """(caller msg/s, written msg/s, dropped) for a synchronous handler."""
+    handler = logging.StreamHandler(sink)
+    handler.setFormatter(JSONFormatter())
+    logger = _logger(handler)
+
+    elapsed = _log_burst(logger, messages)
+    handler.flush()
+    return messages / elapsed, messages / elapsed, 0
+
+
+def measure_queue(sink, messages: int, queue_size: int) -> tuple[float, float, int]:
+    """(caller msg/s, written msg/s, dropped) for the queue handler and writer thread."""
+    stream_handler = logging.StreamHandler(sink)
+    stream_handler.setFormatter(JSONFormatter())
+    queue_handler = DroppingQueueHandler(queue.SimpleQueue(), queue_size)
+    listener = DropReportingListener(queue_handler, stream_handler)
+    logger = _logger(queue_handler)
+
+    listener.start()
+    started = time.perf_counter()
+    elapsed = _log_burst(logger, messages)
+    listener.stop()
+    drained = time.perf_counter() - started
+    stream_handler.flush()
+
+    written = messages - queue_handler.dropped
+    return messages / elapsed, written / drained, queue_handler.dropped
+
+
+def _logger(handler: logging.Handler) -> logging.Logger:
+    logger = logging.getLogger("benchmarks.logging_throughput")
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--queue-size", type=int, default=settings.log_queue_size)
+    parser.add_argument("--sink", default=os.devnull, help="File the JSON lines are written to")
+    args = parser.parse_args()
+
+    print(f"{'setup':<7} {'caller msg/s':>13} {'written msg/s':>14} {'dropped':>8}")
+    with open(args.sink, "w") as sink:
+        rows = [
+            ("sync", measure_sync(sink, args.messages)),
+            ("queue", measure_queue(sink, args.messages, args.queue_size)),
+        ]
+    for name, (caller, written, dropped) in rows:
+        print(f"{name:<7} {caller:>13,.0f} {written:>14,.0f} {dropped:>8}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
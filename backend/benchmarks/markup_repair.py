@@ -0,0 +1,99 @@
+"""Markup repair benchmark: parse and fix adversarial XML at doubling sizes.
+
+Run ``python -m benchmarks.markup_repair`` from the backend directory. Each
+input family is built at doubling sizes; run time should roughly double
+with the size, so the per-KB column stays flat when the parser is linear.
+With ``--max-ratio`` it fails when the largest size costs more per KB than
+that multiple of the smallest one.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from collections.abc import Callable
+
+from app.pipeline.markup_parser import apply_markup_fixes, parse_markup
+
+
+def _nested_open(size: int) -> str:
+    """Deep nesting where no element is ever closed."""
+    return "<root>" + "<a>x" * (size // 4)
+
+
+def _unterminated_quotes(size: int) -> str:
+    """Start tags whose attribute quotes never close before the next tag."""
+    return "<root>" + '<a b="x>' * (size // 8) + "</root>"
+
+
+def _stray_characters(size: int) -> str:
+    """Text full of bare ``&`` and ``<`` that need escaping."""
+    return "<root>" + "a & b < c " * (size // 10) + "</root>"
+
+
+def _unmatched_closes(size: int) -> str:
+    """Closing tags with no matching start tag."""
+    return "<root>" + "</a>" * (size // 4) + "</root>"
+
+
+def _unquoted_attributes(size: int) -> str:
+    """Attributes written without quotes."""
+    return "<root>" + "<a b=c d=e/>" * (size // 12) + "</root>"
+
+
+def _mixed(size: int) -> str:
+    """Every problem above interleaved, the old regex repair's worst case."""
+    unit = '<a>x & <b c=d>y < </e><f g="h>'
+    return "<root>" + unit * (size // len(unit))
+
+
+INPUTS: dict[str, Callable[[int], str]] = {
+    "nested_open": _nested_open,
+    "unterminated_quotes": _unterminated_quotes,
+    "stray_characters": _stray_characters,
+    "unmatched_closes": _unmatched_closes,
+    "unquoted_attributes": _unquoted_attributes,
+    "mixed": _mixed,
+}
+
+
+def repair_ms(content: str, runs: int) -> float:
+    """Median milliseconds to parse the content and apply its fixes."""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        apply_markup_fixes(content, parse_markup(content))
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--min-kb", type=int, default=8)
+    parser.add_argument("--max-kb", type=int, default=256)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ratio", type=float, default=None)
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'input':<22} {'size':>8} {'ms':>10} {'ms/KB':>8}")
+    for name, build in INPUTS.items():
+        per_kb = []
+        kb = args.min_kb
+        while kb <= args.max_kb:
+            content = build(kb * 1024)
+            ms = repair_ms(content, args.runs)
+            per_kb.append(ms / kb)
+            print(f"{name:<22} {kb:>6}KB {ms:>10.2f} {ms / kb:>8.3f}")
+            kb *= 2
+
+        ratio = per_kb[-1] / per_kb[0]
+        if args.max_ratio is not None and ratio > args.max_ratio:
+            print(f"FAIL: {name} costs {ratio:.1f}x more per KB at {args.max_kb}KB")
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
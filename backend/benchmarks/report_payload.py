@@ -0,0 +1,145 @@
+"""Report payload benchmark: response size and encode time per serving path.
+
+Run ``python -m benchmarks.report_payload`` from the backend directory. A
+synthetic report is built for each prompt size (one patch per paragraph, a
+handful of questions) and served through:
+
+* ``model+json``: the previous path, the AnalyzeResponse model rendered by
+  FastAPI's default encoder (jsonable_encoder + json.dumps), uncompressed
+* ``store``: ``encode_report``, the one-time serialization kept in the store
+* ``identity``/``gzip``/``br``: ``document_response`` from the stored bytes,
+  with ``br`` answered from the brotli cache
+* ``br (cold)``: the brotli compression paid on a document's first ``br`` request
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from collections.abc import Callable
+
+from fastapi.encoders import jsonable_encoder
+
+from app.api.encoding import BrotliCache, document_response
+from app.schemas.prompts import (
+    AnalyzeResponse,
+    ClarifyQuestion,
+    MetricReport,
+    MetricScore,
+    Patch,
+    SemanticEntropy,
+)
+from app.services.analysis_store import encode_report
+
+PARAGRAPH = (
+    "You are a support assistant for a payments company. Answer customer "
+    "questions about refunds, chargebacks and payouts in a friendly tone, "
+    "cite the relevant policy section and never promise a refund date."
+)
+
+
+def build_report(kb: int) -> MetricReport:
+    """A report for a prompt of roughly ``kb`` kilobytes."""
+    # Shuffled words keep the text from compressing better than real prompts
+    rng = random.Random(kb)
+    words = PARAGRAPH.split()
+    paragraphs = [
+        f"{i}. " + " ".join(rng.sample(words, len(words)))
+        for i in range(max(1, kb * 1024 // len(PARAGRAPH)))
+    ]
+    content = "\n\n".join(paragraphs)
+
+    patches = [
+        Patch(
+            id=f"quality_{i}",
+            type="risky",
+            category="clarity",
+            description="Clarify the expected tone",
+            original=paragraph[:80],
+            improved=paragraph[:80] + " in two sentences or fewer",
+            rationale="States the length the answer should have",
+            confidence=0.7,
+        )
+        for i, paragraph in enumerate(paragraphs)
+    ]
+    questions = [
+        ClarifyQuestion(
+            id=f"details_{i}",
+            question="Which policy sections may be cited?",
+            category="details",
+            priority="medium",
+        )
+        for i in range(5)
+    ]
+
+    return MetricReport(
+        prompt_id="benchmark",
+        original_prompt=content,
+        detected_language="en",
+        format_valid=True,
+        judge_score=MetricScore(score=6.5, rationale="Clear role, vague limits"),
+        semantic_entropy=SemanticEntropy(
+            entropy=0.4, spread=0.2, clusters=2, samples=paragraphs[:8]
+        ),
+        length_chars=len(content),
+        length_words=len(content.split()),
+        complexity_score=4.2,
+        patches=patches,
+        clarify_questions=questions,
+        overall_score=6.8,
+        improvement_priority="medium",
+    )
+
+
+def median_ms(run: Callable[[], object], runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def measure(report: MetricReport, runs: int) -> list[tuple[str, int, float]]:
+    """(path, response bytes, median ms) for every serving path."""
+
+    def model_json() -> bytes:
+        response = AnalyzeResponse(
+            report=report, patches=report.patches, questions=report.clarify_questions
+        )
+        return json.dumps(jsonable_encoder(response)).encode("utf-8")
+
+    document = encode_report(report)
+
+    def serve(accept_encoding: str) -> Callable[[], bytes]:
+        return lambda: document_response(document, accept_encoding).body
+
+    paths = [
+        ("model+json", model_json),
+        ("store", lambda: encode_report(report)),
+        ("identity", serve("identity")),
+        ("gzip", serve("gzip")),
+        ("br (cold)", lambda: BrotliCache(max_bytes=1 << 30).encode(document)),
+        ("br", serve("br")),
+    ]
+    return [(name, len(run()), median_ms(run, runs)) for name, run in paths]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--kb", type=int, action="append", help="Prompt sizes in KB")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'prompt':>7} {'path':<11} {'bytes':>9} {'ms':>8}")
+    for kb in args.kb or [4, 32, 128]:
+        for name, size, ms in measure(build_report(kb), args.runs):
+            print(f"{kb:>5}KB {name:<11} {size:>9} {ms:>8.2f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""Tests for the analysis store backends."""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.schemas.pipeline import BlockIndex
+from app.schemas.prompts import MetricReport, MetricScore, SemanticEntropy
+from app.services.analysis_store import (
+    MemoryAnalysisStore,
+    RedisAnalysisStore,
+    content_fingerprint,
+    create_analysis_store,
+    decode_report,
+    encode_report,
+)
+
+
+def _report(prompt_id: str = "p1") -> MetricReport:
+    return MetricReport(
+        prompt_id=prompt_id,
+        original_prompt="Summarize the attached notes.",
+        analyzed_at=datetime(2024, 1, 1),
+        detected_language="en",
+        format_valid=True,
+        judge_score=MetricScore(score=7.5, rationale="Clear task"),
+        semantic_entropy=SemanticEntropy(entropy=0.3, spread=0.1, clusters=1, samples=[]),
+        length_chars=29,
+        length_words=4,
+        complexity_score=4.0,
+        overall_score=7.0,
+        improvement_priority="medium",
+    )
+
+
+def _redis_store() -> RedisAnalysisStore:
+    fakeredis = pytest.importorskip("fakeredis")
+    store = RedisAnalysisStore("redis://localhost:6379/0", ttl_seconds=60)
+    store.client = fakeredis.FakeAsyncRedis()
+    return store
+
+
+def _memory_store(**limits) -> MemoryAnalysisStore:
+    return MemoryAnalysisStore(
+        max_entries=limits.get("max_entries", 10),
+        max_bytes=limits.get("max_bytes", 1 << 20),
+        ttl_seconds=limits.get("ttl_seconds", 60),
+    )
+
+
+@pytest.fixture(params=["memory", "redis"])
+def store(request):
+    return _memory_store() if request.param == "memory" else _redis_store()
+
+
+def test_report_round_trip(store):
+    async def run():
+        document = await store.put("p1", _report())
+        assert await store.get_raw("p1") == document
+        assert await store.get("p1") == _report()
+        assert await store.get("missing") is None
+
+        await store.delete("p1")
+        assert await store.get("p1") is None
+        await store.close()
+
+    asyncio.run(run())
+
+
+def test_blocks_are_stored_beside_the_report(store):
+    async def run():
+        index = BlockIndex(detected_language="en")
+        await store.put_blocks("p1", index)
+        assert await store.get_blocks("p1") == index
+        assert await store.get("p1") is None
+        await store.close()
+
+    asyncio.run(run())
+
+
+def test_aliases(store):
+    async def run():
+        assert await store.get_alias("fingerprint") is None
+        await store.put_alias("fingerprint", "p1", ttl_seconds=30)
+        assert await store.get_alias("fingerprint") == "p1"
+        await store.ping()
+        await store.close()
+
+    asyncio.run(run())
+
+
+def test_redis_keys_expire():
+    store = _redis_store()
+
+    async def run():
+        await store.put("p1", _report())
+        await store.put_alias("fingerprint", "p1", ttl_seconds=0.2)
+        assert 0 < await store.client.ttl(store.key_prefix + "p1") <= 60
+        # Sub-second alias lifetimes are rounded up rather than rejected
+        assert await store.client.ttl(store.alias_prefix + "fingerprint") == 1
+        await store.close()
+
+    asyncio.run(run())
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = _memory_store(max_entries=2)
+
+    async def run():
+        for prompt_id in ("a", "b"):
+            await store.put_raw(prompt_id, b"x")
+        await store.get_raw("a")
+        await store.put_raw("c", b"x")
+        return [await store.get_raw(prompt_id) for prompt_id in ("a", "b", "c")]
+
+    assert asyncio.run(run()) == [b"x", None, b"x"]
+
+
+def test_memory_store_is_bounded_by_size():
+    store = _memory_store(max_bytes=10)
+
+    async def run():
+        await store.put_raw("a", b"x" * 6)
+        await store.put_raw("b", b"x" * 6)
+
+    asyncio.run(run())
+    assert len(store) == 1
+
+
+def test_encoding_is_deterministic():
+    assert encode_report(_report()) == encode_report(_report())
+    assert decode_report(encode_report(_report())) == _report()
+
+
+def test_fingerprint_ignores_whitespace_but_not_lines():
+    base = content_fingerprint("Be brief.\nUse lists.", "text")
+
+    assert content_fingerprint("  Be   brief. \r\nUse lists.  ", "text") == base
+    assert content_fingerprint("Be brief. Use lists.", "text") != base
+    assert content_fingerprint("Be brief.\nUse lists.", "markdown") != base
+
+
+def test_unsupported_store_url():
+    with pytest.raises(ValueError):
+        create_analysis_store("postgres://localhost/db")
@@ -0,0 +1,64 @@
+"""Tests for the deterministic lint stages."""
+
+from app.pipeline.contradiction_nodes import _detect_pattern_contradictions
+from app.pipeline.lint import lint_prompt
+from app.pipeline.vocab_nodes import _unify_vocabulary
+
+
+def test_vocabulary_keeps_capitalization():
+    unified, _ = _unify_vocabulary("Don't guess. It's fine. IT'S URGENT. In order to help, ask.")
+
+    assert unified == "Do not guess. It is fine. IT IS URGENT. To help, ask."
+
+
+def test_vocabulary_leaves_phrasal_verbs_alone():
+    unified, changes = _unify_vocabulary("Set up the repo, then log in. Review the set-up.")
+
+    assert unified == "Set up the repo, then log in. Review the setup."
+    assert len(changes) == 1
+
+
+def test_vocabulary_patches_are_risky():
+    report = lint_prompt("Don't guess the answer.")
+
+    [patch] = report.patches
+    assert (patch.type, patch.original, patch.improved) == ("risky", "Don't", "Do not")
+    assert (patch.start, patch.end) == (0, 5)
+
+
+def test_pattern_contradictions_need_a_shared_term():
+    sentences = [
+        "You must always answer briefly",
+        "Never answer briefly, explain in detail",
+        "Always include citations",
+        "Never include the raw logs",
+    ]
+
+    [found] = _detect_pattern_contradictions(sentences)
+
+    assert (found["position_1"], found["position_2"]) == (0, 1)
+    assert "answer" in found["description"]
+
+
+def test_negative_form_is_not_also_positive():
+    sentences = ["Data must not leave the region", "Logs must not contain personal data"]
+
+    assert _detect_pattern_contradictions(sentences) == []
+
+
+def test_diagnostics_are_positioned():
+    report = lint_prompt("Answer briefly.\n  Always answer briefly. Don't guess.\nNever answer briefly here.")
+
+    positions = {
+        diagnostic.source: (diagnostic.line, diagnostic.column)
+        for diagnostic in report.diagnostics
+    }
+    assert positions == {"vocabulary": (2, 26), "contradiction": (2, 3)}
+
+
+def test_pairs_stop_at_the_limit():
+    sentences = ["Always reply in English"] * 5 + ["Never reply in English"] * 5
+
+    found = _detect_pattern_contradictions(sentences, limit=3)
+
+    assert [(f["position_1"], f["position_2"]) for f in found] == [(0, 5), (0, 6), (0, 7)]
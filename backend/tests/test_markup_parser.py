@@ -0,0 +1,55 @@
+"""Tests for the single-pass markup parser and its XML repair."""
+
+from xml.parsers import expat
+
+import pytest
+
+from app.pipeline.markup_parser import apply_markup_fixes, parse_markup
+from benchmarks.markup_repair import INPUTS
+
+
+def _is_well_formed(content: str) -> bool:
+    parser = expat.ParserCreate()
+    try:
+        parser.Parse(content, True)
+    except expat.ExpatError:
+        return False
+    return True
+
+
+@pytest.mark.parametrize("name", sorted(INPUTS))
+def test_adversarial_input_is_repaired(name):
+    content = INPUTS[name](2048)
+    assert not _is_well_formed(content)
+
+    document = parse_markup(content)
+    fixed, fixes = apply_markup_fixes(content, document)
+
+    assert document.format_type == "xml"
+    assert fixes
+    assert _is_well_formed(fixed)
+
+
+def test_well_formed_xml_has_no_fixes():
+    content = '<root><a b="c">x &amp; y</a></root>'
+
+    document = parse_markup(content)
+
+    assert document.is_valid
+    assert apply_markup_fixes(content, document) == (content, [])
+
+
+def test_diagnostics_carry_positions():
+    content = "<root>\n  <a>x & y</b>\n</root>"
+
+    document = parse_markup(content)
+    positions = {d.message: (d.line, d.column) for d in document.diagnostics}
+
+    assert positions["escaped stray '&'"] == (2, 8)
+    assert positions["removed unmatched closing tag </b>"] == (2, 11)
+
+
+def test_unclosed_elements_are_closed_in_order():
+    fixed, _ = apply_markup_fixes("<root><a><b>x", parse_markup("<root><a><b>x"))
+
+    assert fixed == "<root><a><b>x</b></a></root>"